@@ -1,16 +1,35 @@
+import functools
+import hashlib
+import json
 import os
-from dotenv import load_dotenv
-from openai import OpenAI
+import time
 
-load_dotenv()
+# openai and dotenv are imported on first use, not here: importing this
+# module should stay cheap for callers that never reach the API.
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+MODEL = "gpt-3.5-turbo"
 
 
-def create_simple_tasks(task):
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
+@functools.lru_cache(maxsize=None)
+def load_environment():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+@functools.lru_cache(maxsize=None)
+def get_client():
+    # Built on first use and shared afterwards.
+    from openai import OpenAI
+
+    load_environment()
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+
+def build_request(task):
+    return {
+        "model": MODEL,
+        "messages": [
             {
                 "role": "system",
                 "content": (
@@ -24,7 +43,110 @@ def create_simple_tasks(task):
                 "content": f"Break down this task into simple tasks: {task}",
             },
         ],
-        max_tokens=500,
-        temperature=0.7,
+        "max_tokens": 500,
+        "temperature": 0.7,
+    }
+
+
+class ResponseCache:
+    """On-disk cache of AI responses, keyed by a hash of the full request.
+
+    Entries older than ``ttl`` seconds are ignored; ``ttl=0`` disables the
+    cache. The same request (model, prompt and parameters) is only ever
+    sent once per ``ttl``.
+    """
+
+    def __init__(self, directory, ttl=7 * 24 * 3600):
+        self.directory = directory
+        self.ttl = ttl
+
+    def _path(self, request):
+        encoded = json.dumps(request, sort_keys=True).encode("utf-8")
+        key = hashlib.sha256(encoded).hexdigest()
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, request):
+        if self.ttl <= 0:
+            return None
+        path = self._path(request)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)["content"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def set(self, request, content):
+        if self.ttl <= 0:
+            return
+        path = self._path(request)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"content": content}, f)
+        os.replace(tmp_path, path)
+
+
+@functools.lru_cache(maxsize=None)
+def get_response_cache():
+    load_environment()
+    return ResponseCache(
+        os.getenv("AI_CACHE_DIR", ".ai_cache"),
+        ttl=float(os.getenv("AI_CACHE_TTL", 7 * 24 * 3600)),
     )
-    return response.choices[0].message.content.strip()
+
+
+def create_simple_tasks(task, cache=None):
+    cache = get_response_cache() if cache is None else cache
+    request = build_request(task)
+    content = cache.get(request)
+    if content is None:
+        response = get_client().chat.completions.create(**request)
+        content = response.choices[0].message.content.strip()
+        cache.set(request, content)
+    return content
+
+
+async def create_simple_tasks_async(task, async_client, cache=None):
+    cache = get_response_cache() if cache is None else cache
+    request = build_request(task)
+    content = cache.get(request)
+    if content is None:
+        response = await async_client.chat.completions.create(**request)
+        content = response.choices[0].message.content.strip()
+        cache.set(request, content)
+    return content
+
+
+async def create_simple_tasks_many(tasks, concurrency=8, cache=None,
+                                   async_client=None):
+    """Break down several tasks concurrently; results keep the input order.
+
+    At most ``concurrency`` requests are in flight at once. Duplicate tasks
+    in the batch are only requested once.
+    """
+    import asyncio
+
+    if async_client is None:
+        # Async clients are bound to the running event loop, so unlike the
+        # sync client this one is not shared between calls.
+        from openai import AsyncOpenAI
+
+        load_environment()
+        async with AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY")) as owned:
+            return await create_simple_tasks_many(
+                tasks, concurrency, cache, async_client=owned
+            )
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(task):
+        async with semaphore:
+            return await create_simple_tasks_async(task, async_client, cache)
+
+    tasks = list(tasks)
+    unique = list(dict.fromkeys(tasks))
+    results = await asyncio.gather(*(bounded(task) for task in unique))
+    by_task = dict(zip(unique, results))
+    return [by_task[task] for task in tasks]
@@ -0,0 +1,95 @@
+"""AI task breakdown throughput against a local mock OpenAI server.
+
+Starts an HTTP server that answers /v1/chat/completions after a fixed delay
+(standing in for network + model latency) and reports tasks/sec for
+create_simple_tasks_many at several concurrency levels, then with a warm
+response cache.
+
+Usage: python benchmarks/bench_ai.py [--tasks N] [--latency SECONDS]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from openai import AsyncOpenAI  # noqa: E402
+
+import ai_service  # noqa: E402
+from ai_service import ResponseCache  # noqa: E402
+
+
+def make_handler(latency):
+    class MockOpenAI(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            time.sleep(latency)
+            body = json.dumps({
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request["model"],
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": "1. Do it"},
+                }],
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return MockOpenAI
+
+
+async def run(base_url, tasks, concurrency, cache):
+    async with AsyncOpenAI(base_url=base_url, api_key="benchmark") as client:
+        start = time.perf_counter()
+        await ai_service.create_simple_tasks_many(
+            tasks, concurrency=concurrency, cache=cache, async_client=client
+        )
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=128)
+    parser.add_argument("--latency", type=float, default=0.1)
+    args = parser.parse_args()
+
+    ThreadingHTTPServer.request_queue_size = 256
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    tasks = [f"Task {i}" for i in range(args.tasks)]
+
+    print(f"{args.tasks} tasks, {args.latency * 1000:.0f} ms mock latency")
+    with tempfile.TemporaryDirectory() as tmp:
+        no_cache = ResponseCache(tmp, ttl=0)
+        for concurrency in (1, 4, 16, 64):
+            seconds = asyncio.run(run(base_url, tasks, concurrency, no_cache))
+            print(f"concurrency {concurrency:>3}: {args.tasks / seconds:>10.1f} tasks/sec")
+
+        cache = ResponseCache(tmp)
+        asyncio.run(run(base_url, tasks, 16, cache))
+        seconds = asyncio.run(run(base_url, tasks, 16, cache))
+        print(f"warm cache     : {args.tasks / seconds:>10.1f} tasks/sec")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Bulk TaskManager methods vs looping over the single-item ones.
+
+Usage: python benchmarks/bench_bulk.py [--tasks N]
+"""
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from sqlite_store import SQLiteTaskStore  # noqa: E402
+from task_manager import TaskManager, TaskStore  # noqa: E402
+from task_table import TaskTable  # noqa: E402
+
+
+def timed(func):
+    # Single-item methods print a line per call; send it to a buffer, as a
+    # caller importing tasks would have to.
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+
+
+def single(manager, items, ids):
+    return (
+        timed(lambda: [manager.add_task(t, d) for t, d in items]),
+        timed(lambda: [manager.complete_task(i) for i in ids]),
+        timed(lambda: [manager.delete_task(i) for i in ids]),
+    )
+
+
+def bulk(manager, items, ids):
+    return (
+        timed(lambda: manager.add_tasks(items)),
+        timed(lambda: manager.complete_tasks(ids)),
+        timed(lambda: manager.delete_tasks(ids)),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100_000)
+    args = parser.parse_args()
+
+    items = [(f"Task {i}", f"Description {i}") for i in range(args.tasks)]
+    # Complete and delete every other task.
+    ids = list(range(1, args.tasks + 1, 2))
+    print(f"{args.tasks} adds, {len(ids)} completes and deletes; times in ms")
+    print(f"{'engine':<10} {'mode':<7}{'add':>10}{'complete':>10}{'delete':>10}")
+    for name, store_class in [
+        ("TaskStore", TaskStore),
+        ("TaskTable", TaskTable),
+        ("SQLite", SQLiteTaskStore),
+    ]:
+        for mode, run in [("single", single), ("bulk", bulk)]:
+            times = run(TaskManager(store_class()), items, ids)
+            print(f"{name:<10} {mode:<7}" + "".join(f"{t * 1000:>10.1f}" for t in times))
+
+
+if __name__ == "__main__":
+    main()
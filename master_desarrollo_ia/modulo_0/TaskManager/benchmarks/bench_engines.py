@@ -0,0 +1,88 @@
+"""Compare the in-memory, JSON file and SQLite task engines.
+
+"in-memory" is TaskStore with no persistence, "JSON" is TaskStore saved to
+and reloaded from a JSON Lines file, and "SQLite" is SQLiteTaskStore on disk.
+
+Usage: python benchmarks/bench_engines.py [--tasks N] [--ops N]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from sqlite_store import SQLiteTaskStore  # noqa: E402
+from task_manager import Task, TaskManager, TaskStore  # noqa: E402
+
+
+def timed(func):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+
+
+def run(name, store, args, persist, reopen):
+    tasks = [Task(i, f"Task {i}", f"Description {i}") for i in range(1, args.tasks + 1)]
+    rng = random.Random(0)
+    ids = rng.sample(range(1, args.tasks + 1), args.ops)
+    add_many = getattr(store, "add_many", None)
+
+    def insert():
+        if add_many is not None:
+            add_many(tasks)
+        else:
+            for task in tasks:
+                store.add(task)
+
+    manager = TaskManager(store)
+    results = {
+        "insert": timed(insert),
+        "get": timed(lambda: [manager.get_task(i) for i in ids]),
+        "complete": timed(lambda: [manager.complete_task(i) for i in ids]),
+        "delete": timed(lambda: [manager.delete_task(i) for i in ids[: args.ops // 2]]),
+        "pending": timed(manager.pending_tasks),
+        "prefix": timed(lambda: manager.find_tasks("Task 12")),
+        "persist": timed(lambda: persist(manager)),
+        "reopen": timed(reopen),
+    }
+    print(f"{name:<10}" + "".join(f"{v * 1000:>10.1f}" for v in results.values()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=200_000)
+    parser.add_argument("--ops", type=int, default=10_000)
+    args = parser.parse_args()
+
+    columns = ["insert", "get", "complete", "delete", "pending", "prefix",
+               "persist", "reopen"]
+    print(f"{args.tasks} tasks, {args.ops} ops; times in ms")
+    print(f"{'engine':<10}" + "".join(f"{c:>10}" for c in columns))
+    with tempfile.TemporaryDirectory() as tmp:
+        jsonl = os.path.join(tmp, "tasks.jsonl")
+        db = os.path.join(tmp, "tasks.db")
+
+        run("in-memory", TaskStore(), args, lambda m: None, lambda: None)
+        run(
+            "JSON", TaskStore(), args,
+            lambda m: m.save_tasks(jsonl),
+            lambda: TaskManager().load_tasks(jsonl),
+        )
+        store = SQLiteTaskStore(db)
+        run(
+            "SQLite", store, args,
+            lambda m: None,
+            lambda: SQLiteTaskStore(db).close(),
+        )
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Per-operation latency of TaskManager lookups as the task count grows.
+
+Usage: python benchmarks/bench_lookup.py [--ops N] [--sizes 1000 10000 ...]
+"""
+import argparse
+import contextlib
+import io
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from task_manager import TaskManager  # noqa: E402
+
+
+def build_manager(size):
+    manager = TaskManager()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(size):
+            manager.add_task(f"Task {i}", f"Description {i}")
+    return manager
+
+
+def time_per_op(func, ids):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for task_id in ids:
+            func(task_id)
+        elapsed = time.perf_counter() - start
+    return elapsed / len(ids) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=10_000)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+",
+        default=[1_000, 10_000, 100_000, 1_000_000],
+    )
+    args = parser.parse_args()
+
+    print(f"{'tasks':>10} {'get us':>10} {'complete us':>12} {'delete us':>10}")
+    for size in args.sizes:
+        manager = build_manager(size)
+        rng = random.Random(size)
+        ids = rng.sample(range(1, size + 1), min(args.ops, size))
+        get_us = time_per_op(manager.get_task, ids)
+        complete_us = time_per_op(manager.complete_task, ids)
+        delete_us = time_per_op(manager.delete_task, ids)
+        print(f"{size:>10} {get_us:>10.2f} {complete_us:>12.2f} {delete_us:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Memory used by a large task set in each storage layout, via tracemalloc.
+
+Usage: python benchmarks/bench_memory.py [--tasks N]
+"""
+import argparse
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from task_manager import Task, TaskStore  # noqa: E402
+from task_table import TaskTable  # noqa: E402
+
+TITLES = ["Review PR", "Write report", "Call client", "Plan sprint", "Fix bug"]
+
+
+class DictTask:
+    # The original Task layout, with a per-instance __dict__.
+    def __init__(self, id, title, description, completed=False):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.completed = completed
+
+
+def make_rows(count):
+    for i in range(1, count + 1):
+        yield i, TITLES[i % len(TITLES)], f"Description for task number {i}", i % 3 == 0
+
+
+def build_dict_tasks(count):
+    return {row[0]: DictTask(*row) for row in make_rows(count)}
+
+
+def build_slotted_tasks(count):
+    return {row[0]: Task(*row) for row in make_rows(count)}
+
+
+def build_store(store_class, count):
+    store = store_class()
+    for row in make_rows(count):
+        store.add(Task(*row))
+    return store
+
+
+def measure(build, count):
+    tracemalloc.start()
+    result = build(count)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    layouts = [
+        ("dict Task (original)", build_dict_tasks),
+        ("slotted Task", build_slotted_tasks),
+        ("slotted Task + TaskStore", lambda n: build_store(TaskStore, n)),
+        ("TaskTable (columnar)", lambda n: build_store(TaskTable, n)),
+    ]
+    print(f"{args.tasks} tasks")
+    print(f"{'layout':<26} {'MB':>8} {'peak MB':>8} {'B/task':>8}")
+    for name, build in layouts:
+        current, peak = measure(build, args.tasks)
+        print(
+            f"{name:<26} {current / 2**20:>8.1f} {peak / 2**20:>8.1f} "
+            f"{current / args.tasks:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Save/load throughput (tasks/sec) for the legacy JSON and JSON Lines formats.
+
+Usage: python benchmarks/bench_persistence.py [--tasks N]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from journal import TaskJournal  # noqa: E402
+from task_manager import TaskManager  # noqa: E402
+
+
+def build_manager(count):
+    manager = TaskManager()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(count):
+            manager.add_task(f"Task {i}", f"Description for task {i}")
+    return manager
+
+
+def save_legacy(manager, filename):
+    # The previous save_tasks: one list of dicts, dumped with indent=4.
+    with open(filename, "w") as f:
+        json.dump(
+            [
+                {
+                    "id": task.id,
+                    "title": task.title,
+                    "description": task.description,
+                    "completed": task.completed,
+                }
+                for task in manager._tasks
+            ],
+            f,
+            indent=4,
+        )
+
+
+def timed(func):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=200_000)
+    args = parser.parse_args()
+
+    manager = build_manager(args.tasks)
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = os.path.join(tmp, "tasks.json")
+        jsonl = os.path.join(tmp, "tasks.jsonl")
+        results = [
+            ("save legacy JSON", timed(lambda: save_legacy(manager, legacy))),
+            ("save JSON Lines", timed(lambda: manager.save_tasks(jsonl))),
+            ("load legacy JSON", timed(lambda: TaskManager().load_tasks(legacy))),
+            ("load JSON Lines", timed(lambda: TaskManager().load_tasks(jsonl))),
+        ]
+        print(f"{args.tasks} tasks")
+        for name, seconds in results:
+            print(f"{name:<20} {args.tasks / seconds:>12,.0f} tasks/sec")
+
+        def add_and_append():
+            manager.add_task("One more", "Appended")
+            manager.save_tasks(jsonl, append=True)
+
+        seconds = timed(add_and_append)
+        print(f"{'append one task':<20} {seconds * 1000:>12.3f} ms")
+
+        # Durability per mutation: journaling vs rewriting the whole file.
+        journaled = TaskManager(journal=TaskJournal(os.path.join(tmp, "wal")))
+        runs = 1000
+        seconds = timed(lambda: [journaled.add_task("T", "D") for _ in range(runs)])
+        journaled.close()
+        print(f"{'journal one task':<20} {seconds / runs * 1000:>12.3f} ms")
+        seconds = timed(lambda: manager.save_tasks(jsonl))
+        print(f"{'full rewrite':<20} {seconds * 1000:>12.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Time to list a large task set: per-task print() vs TaskRenderer.
+
+Usage: python benchmarks/bench_render.py [--tasks N]
+"""
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from renderer import TaskRenderer  # noqa: E402
+from task_manager import TaskManager  # noqa: E402
+
+
+def print_tasks(tasks):
+    # The previous TaskManager.list_tasks: two print calls per task.
+    for task in tasks:
+        print(f"ID: {task.id} - {task}")
+        print("-" * 20)
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100_000)
+    args = parser.parse_args()
+
+    manager = TaskManager()
+    manager.add_tasks((f"Task {i}", f"Description {i}") for i in range(args.tasks))
+    manager.complete_tasks(range(1, args.tasks + 1, 2))
+
+    stream = io.StringIO()
+    renderer = TaskRenderer(stream)
+    with contextlib.redirect_stdout(stream):
+        results = [
+            ("print per task", timed(lambda: print_tasks(manager.list_tasks()))),
+        ]
+    results += [
+        ("renderer, cold cache", timed(lambda: renderer.render(manager.list_tasks()))),
+        ("renderer, warm cache", timed(lambda: renderer.render(manager.list_tasks()))),
+        ("renderer, pending only", timed(
+            lambda: renderer.render(manager.list_tasks("pending")))),
+        ("renderer, one page", timed(
+            lambda: renderer.render(manager.list_tasks(), page=10, page_size=50))),
+    ]
+    print(f"{args.tasks} tasks")
+    for name, seconds in results:
+        print(f"{name:<24} {seconds * 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
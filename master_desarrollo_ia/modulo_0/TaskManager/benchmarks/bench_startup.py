@@ -0,0 +1,49 @@
+"""Import-time check for main.py and ai_service.py (python -X importtime).
+
+Each module is imported in a fresh interpreter; its cumulative import time
+is compared against a threshold, and the script exits with status 1 if any
+module is over it, so it can gate CI.
+
+Usage: python benchmarks/bench_startup.py [--max-ms 30] [--runs 5]
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+MODULES = ["main", "ai_service"]
+
+
+def import_time_us(module):
+    # -X importtime writes "import time: self [us] | cumulative | name" lines
+    # to stderr; the target module's line carries its total cost.
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_DIR, capture_output=True, text=True, check=True,
+    )
+    for line in result.stderr.splitlines():
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    raise RuntimeError(f"No import time reported for {module}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-ms", type=float, default=30.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    failed = False
+    for module in MODULES:
+        # Best of several runs, to keep disk cache noise out.
+        best_ms = min(import_time_us(module) for _ in range(args.runs)) / 1000
+        status = "ok" if best_ms <= args.max_ms else "REGRESSION"
+        failed = failed or best_ms > args.max_ms
+        print(f"{module:<12} {best_ms:>8.2f} ms  (max {args.max_ms} ms) {status}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
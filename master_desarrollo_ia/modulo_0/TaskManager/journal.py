@@ -0,0 +1,125 @@
+"""Write-ahead journal that makes every TaskManager mutation durable.
+
+State lives in two JSON Lines files next to ``path`` (same record format as
+``persistence``): ``<path>.snapshot.jsonl`` with the compacted state and
+``<path>.wal`` with the records appended since. When the log grows past
+``compact_bytes`` it is rotated to ``<path>.wal.1`` and a background thread
+folds it into a new snapshot. Recovery replays snapshot, ``.wal.1`` (if a
+compaction was interrupted) and ``.wal``, in that order.
+"""
+import os
+import threading
+
+import persistence
+
+
+class TaskJournal:
+    def __init__(self, path, sync_every=64, compact_bytes=4 * 2**20):
+        self.snapshot_path = f"{path}.snapshot.jsonl"
+        self.log_path = f"{path}.wal"
+        self.rotated_path = f"{path}.wal.1"
+        # fsync once per this many records instead of once per record.
+        self.sync_every = sync_every
+        self.compact_bytes = compact_bytes
+        self._lock = threading.Lock()
+        self._log = open(self.log_path, "a", encoding="utf-8")
+        self._unsynced = 0
+        self._compaction = None
+
+    def replay(self):
+        for filename in (self.snapshot_path, self.rotated_path, self.log_path):
+            if os.path.exists(filename):
+                yield from persistence.iter_records(filename)
+
+    def append(self, record):
+        self.append_many((record,))
+
+    def append_many(self, records):
+        # One flush for the whole batch; it counts as a single record
+        # towards sync_every.
+        with self._lock:
+            persistence.write_records(self._log, records)
+            self._log.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.sync_every:
+                self._sync()
+            if self._log.tell() >= self.compact_bytes:
+                self._start_compaction()
+
+    def sync(self):
+        with self._lock:
+            self._sync()
+
+    def _sync(self):
+        if self._unsynced:
+            os.fsync(self._log.fileno())
+            self._unsynced = 0
+
+    def compact(self):
+        """Fold everything logged so far into the snapshot, blocking."""
+        # Two rounds at most: a leftover rotated log, then the live one.
+        for _ in range(2):
+            self.wait()
+            with self._lock:
+                if not os.path.exists(self.rotated_path) and not self._log.tell():
+                    break
+                self._start_compaction()
+        self.wait()
+
+    def wait(self):
+        compaction = self._compaction
+        if compaction is not None:
+            compaction.join()
+
+    def _start_compaction(self):
+        if self._compaction is not None and self._compaction.is_alive():
+            return
+        # A rotated log left behind by an interrupted compaction is folded
+        # in first; the live log is rotated on a later call.
+        if not os.path.exists(self.rotated_path):
+            self._sync()
+            self._log.close()
+            os.replace(self.log_path, self.rotated_path)
+            self._log = open(self.log_path, "a", encoding="utf-8")
+        self._compaction = threading.Thread(
+            target=self._compact_rotated, name="task-journal-compaction",
+            daemon=True,
+        )
+        self._compaction.start()
+
+    def _compact_rotated(self):
+        # Only reads files the writer no longer touches, so appends carry on
+        # while this runs. Until the rotated log is removed, recovery still
+        # replays it on top of the new snapshot, which is harmless: the last
+        # record for each id is the same either way.
+        state = {}
+        for filename in (self.snapshot_path, self.rotated_path):
+            if os.path.exists(filename):
+                for record in persistence.iter_records(filename):
+                    state[record["id"]] = record
+        persistence.save_records(
+            self.snapshot_path,
+            (record for record in state.values() if not record.get("deleted")),
+            fsync=True,
+        )
+        os.remove(self.rotated_path)
+
+    def reset(self, records):
+        """Replace the journaled state with ``records`` (e.g. after a load)."""
+        self.wait()
+        with self._lock:
+            # Drop the logs before writing the snapshot: a crash in between
+            # loses only the state that was being replaced anyway, never
+            # replays stale records over the new state.
+            self._log.close()
+            if os.path.exists(self.rotated_path):
+                os.remove(self.rotated_path)
+            self._log = open(self.log_path, "w", encoding="utf-8")
+            self._unsynced = 0
+            persistence.save_records(self.snapshot_path, records, fsync=True)
+
+    def close(self):
+        self.wait()
+        with self._lock:
+            self._sync()
+            self._log.close()
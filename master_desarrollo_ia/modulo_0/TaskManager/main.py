@@ -1,3 +1,6 @@
+import functools
+
+
 def show_menu():
     print("\nTask Manager")
     print("1. Add Task")
@@ -21,23 +24,37 @@ def get_int_input(prompt):
 def add_task(manager):
     title = input("Enter task title: ")
     description = input("Enter task description: ")
-    manager.add_task(title, description)
+    task = manager.add_task(title, description)
+    print(f"Task '{title}' added with ID {task.id}.")
+
+
+@functools.lru_cache(maxsize=None)
+def get_renderer():
+    # One renderer for the whole session, so its row cache is reused.
+    from renderer import TaskRenderer
+    return TaskRenderer()
 
 
 def list_tasks(manager):
-    manager.list_tasks()
+    get_renderer().render(manager.list_tasks())
 
 
 def complete_task(manager):
     task_id = get_int_input("Enter task ID to complete: ")
     if task_id is not None:
-        manager.complete_task(task_id)
+        if manager.complete_task(task_id):
+            print(f"Task ID {task_id} marked as completed.")
+        else:
+            print(f"Task ID {task_id} not found.")
 
 
 def delete_task(manager):
     task_id = get_int_input("Enter task ID to delete: ")
     if task_id is not None:
-        manager.delete_task(task_id)
+        if manager.delete_task(task_id):
+            print(f"Task ID {task_id} deleted.")
+        else:
+            print(f"Task ID {task_id} not found.")
 
 
 def save_tasks(manager):
@@ -48,7 +65,11 @@ def save_tasks(manager):
 
 def load_tasks(manager):
     filename = input("Enter filename to load tasks from: ")
-    manager.load_tasks(filename)
+    count = manager.load_tasks(filename)
+    if count is None:
+        print(f"No saved tasks found in {filename}.")
+        return
+    print(f"Loaded {count} tasks from {filename}.")
     print(f"Tasks loaded from {filename}.")
 
 
@@ -60,10 +81,53 @@ def break_down_task_ai():
     print(result)
 
 
-def main():
+def parse_args(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Task Manager")
+    parser.add_argument(
+        "--journal",
+        metavar="PATH",
+        help="Journal every change under PATH and restore tasks from it on start",
+    )
+    parser.add_argument(
+        "--sqlite",
+        metavar="PATH",
+        help="Keep tasks in the SQLite database at PATH instead of in memory",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="SCRIPT",
+        help="Run the commands in SCRIPT ('-' for stdin) instead of the menu",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     from task_manager import TaskManager
 
-    manager = TaskManager()
+    args = parse_args(argv)
+    store = None
+    if args.sqlite:
+        from sqlite_store import SQLiteTaskStore
+        store = SQLiteTaskStore(args.sqlite)
+    journal = None
+    if args.journal:
+        from journal import TaskJournal
+        journal = TaskJournal(args.journal)
+    manager = TaskManager(store=store, journal=journal)
+    try:
+        if args.batch:
+            run_batch_file(manager, args.batch)
+        else:
+            run_menu(manager)
+    finally:
+        manager.close()
+        if store is not None:
+            store.close()
+
+
+def run_menu(manager):
     actions = {
         "1": add_task,
         "2": list_tasks,
@@ -86,5 +150,102 @@ def main():
             print("Invalid choice. Please try again.")
 
 
+# Batch mode: one command per line, e.g.
+#   add "Buy milk" "2 litres"
+#   complete 3 4
+#   delete 5
+#   list pending
+#   save tasks.jsonl
+#   load tasks.jsonl
+# Blank lines and lines starting with "#" are skipped. Runs of consecutive
+# add/complete/delete lines are applied through the bulk TaskManager methods.
+BULK_COMMANDS = {
+    "add": ("add_tasks", "added"),
+    "complete": ("complete_tasks", "completed"),
+    "delete": ("delete_tasks", "deleted"),
+}
+
+
+def parse_command(line):
+    import shlex
+
+    # shlex is slow; only pay for it when the line actually has quotes.
+    if '"' in line or "'" in line:
+        return shlex.split(line)
+    return line.split()
+
+
+def run_batch(manager, lines):
+    from collections import Counter
+
+    summary = Counter()
+    pending_name, pending_args = None, []
+
+    def flush():
+        if not pending_args:
+            return
+        method, label = BULK_COMMANDS[pending_name]
+        result = getattr(manager, method)(pending_args)
+        summary[label] += len(result.applied)
+        summary["not found"] += len(result.missing)
+        pending_args.clear()
+
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        summary["commands"] += 1
+        try:
+            name, *args = parse_command(line)
+            if name in BULK_COMMANDS:
+                if name != pending_name:
+                    flush()
+                    pending_name = name
+                if name == "add":
+                    if not 1 <= len(args) <= 2:
+                        raise ValueError("usage: add TITLE [DESCRIPTION]")
+                    pending_args.append((args[0], args[1] if len(args) == 2 else ""))
+                else:
+                    if not args:
+                        raise ValueError(f"usage: {name} ID [ID ...]")
+                    pending_args.extend([int(arg) for arg in args])
+                continue
+            flush()
+            if name == "list":
+                get_renderer().render(manager.list_tasks(*args[:1]))
+            elif name == "save" and len(args) == 1:
+                manager.save_tasks(args[0])
+            elif name == "load" and len(args) == 1:
+                if manager.load_tasks(args[0]) is None:
+                    raise ValueError(f"no saved tasks found in {args[0]}")
+            else:
+                raise ValueError(f"unknown command: {line}")
+        except ValueError as e:
+            summary["errors"] += 1
+            print(f"Line {line_number}: {e}")
+    flush()
+    return summary
+
+
+def run_batch_file(manager, script):
+    import sys
+    import time
+
+    start = time.perf_counter()
+    if script == "-":
+        summary = run_batch(manager, sys.stdin)
+    else:
+        with open(script, "r", encoding="utf-8") as f:
+            summary = run_batch(manager, f)
+    elapsed = time.perf_counter() - start
+    print(
+        f"Ran {summary['commands']} commands in {elapsed:.2f}s: "
+        f"{summary['added']} added, {summary['completed']} completed, "
+        f"{summary['deleted']} deleted, {summary['not found']} not found, "
+        f"{summary['errors']} errors."
+    )
+    return summary
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,110 @@
+"""Streaming JSON Lines persistence for tasks.
+
+Each line of a task file is one record: either a full task
+(``{"id", "title", "description", "completed"}``) or a tombstone
+(``{"id", "deleted": true}``). Records are applied in order and the last
+one for an id wins, so a file can be extended by appending records instead
+of being rewritten.
+
+Files written by older versions (a single indented JSON array) are still
+read, also lazily.
+"""
+import json
+import os
+
+CHUNK_SIZE = 1 << 16
+
+# File formats, as reported by file_format.
+JSON_LINES = "jsonl"
+JSON_ARRAY = "json"
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+_decoder = json.JSONDecoder()
+
+
+def task_record(task):
+    return {
+        "id": task.id,
+        "title": task.title,
+        "description": task.description,
+        "completed": task.completed,
+    }
+
+
+def deleted_record(task_id):
+    return {"id": task_id, "deleted": True}
+
+
+def write_records(f, records):
+    f.writelines(_encoder.encode(record) + "\n" for record in records)
+
+
+def save_records(filename, records, fsync=False):
+    """Replace ``filename`` with ``records`` without a half-written window."""
+    tmp_filename = f"{filename}.tmp"
+    with open(tmp_filename, "w", encoding="utf-8") as f:
+        write_records(f, records)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_filename, filename)
+
+
+def append_records(filename, records):
+    with open(filename, "a", encoding="utf-8") as f:
+        write_records(f, records)
+
+
+def _is_json_array(head):
+    return head.lstrip().startswith("[")
+
+
+def file_format(filename):
+    """``JSON_ARRAY`` for a legacy file, ``JSON_LINES`` otherwise.
+
+    Only JSON Lines files can be extended with ``append_records``.
+    """
+    with open(filename, "r", encoding="utf-8") as f:
+        return JSON_ARRAY if _is_json_array(f.read(CHUNK_SIZE)) else JSON_LINES
+
+
+def iter_records(filename):
+    """Lazily yield the records stored in ``filename``, in either format."""
+    with open(filename, "r", encoding="utf-8") as f:
+        head = f.read(CHUNK_SIZE)
+        if _is_json_array(head):
+            yield from _iter_json_array(f, head)
+            return
+        f.seek(0)
+        for line in f:
+            if line.strip():
+                yield _decoder.decode(line)
+
+
+def _iter_json_array(f, buffer):
+    # Decode one array element at a time from a sliding window over the
+    # file, so the legacy format never has to be held in memory whole.
+    pos = buffer.index("[") + 1
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos == len(buffer):
+            more = f.read(CHUNK_SIZE)
+            if not more:
+                raise ValueError("Unterminated task list.")
+            buffer, pos = more, 0
+            continue
+        if buffer[pos] == "]":
+            return
+        try:
+            record, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # The element runs past the window (elements are objects, so a
+            # truncated one never decodes); pull in more of the file.
+            more = f.read(CHUNK_SIZE)
+            if not more:
+                raise
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+        yield record
+        pos = end
@@ -0,0 +1,49 @@
+import sys
+from itertools import islice
+
+SEPARATOR = "-" * 20
+
+
+class TaskRenderer:
+    """Formats tasks as text and writes them to a stream in one go.
+
+    Rows are cached by task content, so re-listing an unchanged task set
+    skips the formatting work. A page is joined into one string and written
+    with a single ``write`` call instead of two ``print`` calls per task.
+    """
+
+    def __init__(self, stream=None, max_cached=100_000):
+        # stream=None means sys.stdout, looked up when rendering so that
+        # redirection (and test patching) works.
+        self.stream = stream
+        self.max_cached = max_cached
+        self._rows = {}
+
+    def format_task(self, task):
+        key = (task.id, task.title, task.description, task.completed)
+        row = self._rows.get(key)
+        if row is None:
+            if len(self._rows) >= self.max_cached:
+                self._rows.clear()
+            status = "Completed" if task.completed else "Pending"
+            row = (
+                f"ID: {task.id} - Task: {task.title}\n"
+                f"Description: {task.description}\n"
+                f"Status: {status}\n"
+                f"{SEPARATOR}\n"
+            )
+            self._rows[key] = row
+        return row
+
+    def render(self, tasks, page=1, page_size=None):
+        """Write one page of ``tasks`` (all of them if no page_size).
+
+        Returns the number of tasks written.
+        """
+        if page_size is not None:
+            start = (page - 1) * page_size
+            tasks = islice(tasks, start, start + page_size)
+        rows = list(map(self.format_task, tasks))
+        stream = self.stream if self.stream is not None else sys.stdout
+        stream.write("".join(rows) if rows else "No tasks available.\n")
+        return len(rows)
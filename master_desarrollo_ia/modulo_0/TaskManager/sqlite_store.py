@@ -0,0 +1,145 @@
+import sqlite3
+from contextlib import contextmanager
+
+from task_manager import Task
+
+# The sqlite3 module keeps a per-connection cache of compiled statements
+# keyed by SQL text, so reusing these constants means each one is prepared
+# only once.
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS tasks (
+        id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        title_key TEXT NOT NULL,
+        description TEXT NOT NULL,
+        completed INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS tasks_completed ON tasks (completed, id)",
+    "CREATE INDEX IF NOT EXISTS tasks_title_key ON tasks (title_key)",
+)
+COLUMNS = "id, title, description, completed"
+INSERT = (
+    "INSERT OR REPLACE INTO tasks (id, title, title_key, description, completed) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+SELECT_ONE = f"SELECT {COLUMNS} FROM tasks WHERE id = ?"
+SELECT_ALL = f"SELECT {COLUMNS} FROM tasks ORDER BY id"
+SELECT_BY_STATUS = f"SELECT {COLUMNS} FROM tasks WHERE completed = ? ORDER BY id"
+SELECT_BY_PREFIX = (
+    f"SELECT {COLUMNS} FROM tasks WHERE title_key >= ? AND title_key < ? "
+    "ORDER BY id"
+)
+COMPLETE = "UPDATE tasks SET completed = 1 WHERE id = ?"
+DELETE = "DELETE FROM tasks WHERE id = ?"
+
+
+def _task(row):
+    return Task(row[0], row[1], row[2], bool(row[3]))
+
+
+def _insert_params(task):
+    return (
+        task.id, task.title, task.title.casefold(), task.description,
+        int(task.completed),
+    )
+
+
+class SQLiteTaskStore:
+    """Task storage backed by a SQLite database.
+
+    Same interface as ``task_manager.TaskStore``, so it plugs into
+    ``TaskManager(store=SQLiteTaskStore("tasks.db"))``. Tasks stay on disk
+    and queries (pending tasks, title prefixes) are answered from indexes,
+    so task sets larger than memory work. Every write is its own
+    transaction unless grouped with ``transaction()`` or one of the
+    ``*_many`` methods.
+    """
+
+    def __init__(self, path=":memory:"):
+        # Autocommit mode; transactions are opened explicitly below.
+        self._conn = sqlite3.connect(path, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+        self._in_transaction = False
+
+    @contextmanager
+    def transaction(self):
+        if self._in_transaction:
+            yield
+            return
+        self._conn.execute("BEGIN")
+        self._in_transaction = True
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        else:
+            self._conn.execute("COMMIT")
+        finally:
+            self._in_transaction = False
+
+    def close(self):
+        self._conn.close()
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def __iter__(self):
+        return map(_task, self._conn.execute(SELECT_ALL))
+
+    def max_id(self):
+        return self._conn.execute("SELECT MAX(id) FROM tasks").fetchone()[0] or 0
+
+    def add(self, task):
+        self._conn.execute(INSERT, _insert_params(task))
+
+    def add_many(self, tasks):
+        with self.transaction():
+            self._conn.executemany(INSERT, map(_insert_params, tasks))
+
+    def get(self, task_id):
+        row = self._conn.execute(SELECT_ONE, (task_id,)).fetchone()
+        return None if row is None else _task(row)
+
+    def complete(self, task_id):
+        return self._conn.execute(COMPLETE, (task_id,)).rowcount > 0
+
+    def complete_many(self, task_ids):
+        return self._apply_many(COMPLETE, task_ids)
+
+    def remove(self, task_id):
+        return self._conn.execute(DELETE, (task_id,)).rowcount > 0
+
+    def remove_many(self, task_ids):
+        return self._apply_many(DELETE, task_ids)
+
+    def _apply_many(self, sql, task_ids):
+        # One statement per id (rather than executemany) so the ids that
+        # matched a row can be reported; still a single transaction.
+        execute = self._conn.execute
+        with self.transaction():
+            return [
+                task_id for task_id in task_ids
+                if execute(sql, (task_id,)).rowcount > 0
+            ]
+
+    def clear(self):
+        self._conn.execute("DELETE FROM tasks")
+
+    def pending(self):
+        return map(_task, self._conn.execute(SELECT_BY_STATUS, (0,)))
+
+    def completed(self):
+        return map(_task, self._conn.execute(SELECT_BY_STATUS, (1,)))
+
+    def find(self, prefix):
+        # A range scan over the title_key index; U+10FFFF sorts after any
+        # character that can follow the prefix.
+        prefix = prefix.casefold()
+        rows = self._conn.execute(SELECT_BY_PREFIX, (prefix, prefix + "\U0010ffff"))
+        return [_task(row) for row in rows]
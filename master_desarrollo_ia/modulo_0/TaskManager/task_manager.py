@@ -1,4 +1,13 @@
+import os
+
+import persistence
+
+
 class Task:
+    # Slots drop the per-instance __dict__, which dominates memory use once
+    # there are hundreds of thousands of tasks.
+    __slots__ = ("id", "title", "description", "completed")
+
     def __init__(self, id, title, description, completed=False):
         self.id = id
         self.title = title
@@ -17,86 +26,342 @@ class Task:
         )
 
 
-class TaskManager:
+# Titles are bucketed by their first characters so prefix searches only look
+# at the tasks that can possibly match.
+PREFIX_INDEX_LENGTH = 3
+
+
+def _prefix_key(title):
+    return title.casefold()[:PREFIX_INDEX_LENGTH]
+
+
+class BatchResult:
+    # Summary returned by the TaskManager bulk methods: the ids the batch
+    # applied to, and the requested ids that did not exist.
+    __slots__ = ("applied", "missing")
+
+    def __init__(self, applied, missing=()):
+        self.applied = list(applied)
+        self.missing = list(missing)
+
+    def __len__(self):
+        return len(self.applied)
+
+    def __repr__(self):
+        return f"BatchResult(applied={len(self.applied)}, missing={len(self.missing)})"
+
+
+class TaskStore:
+    """Default in-memory task storage.
+
+    Any object with the same methods (see ``task_table.TaskTable``) can be
+    passed to ``TaskManager`` instead. ``add`` replaces an existing task with
+    the same id in place.
+    """
+
     def __init__(self):
-        self._tasks = []
-        self._next_id = 1
+        # Tasks keyed by id. Dicts keep insertion order, so this is both the
+        # lookup index and the ordered task list.
+        self._tasks = {}
+        # Secondary indexes, stored as dicts used as ordered sets of ids.
+        # Tasks are usually completed out of id order, so the completed
+        # index is re-sorted by id the next time it is read after one is.
+        self._pending = {}
+        self._completed = {}
+        self._completed_sorted = True
+        self._by_prefix = {}
+        self._max_id = 0
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def __iter__(self):
+        return iter(self._tasks.values())
+
+    def max_id(self):
+        return self._max_id
+
+    def add(self, task):
+        if task.id in self._tasks:
+            self._unindex(self._tasks[task.id])
+        self._tasks[task.id] = task
+        if task.completed:
+            self._index_completed(task.id)
+        else:
+            self._pending[task.id] = None
+        self._by_prefix.setdefault(_prefix_key(task.title), {})[task.id] = None
+        self._max_id = max(self._max_id, task.id)
+
+    def add_many(self, tasks):
+        for task in tasks:
+            self.add(task)
+
+    def get(self, task_id):
+        return self._tasks.get(task_id)
+
+    def complete_many(self, task_ids):
+        return [task_id for task_id in task_ids if self.complete(task_id)]
+
+    def remove_many(self, task_ids):
+        return [task_id for task_id in task_ids if self.remove(task_id)]
+
+    def complete(self, task_id):
+        task = self._tasks.get(task_id)
+        if task is None:
+            return False
+        task.mark_completed()
+        self._pending.pop(task_id, None)
+        self._index_completed(task_id)
+        return True
+
+    def remove(self, task_id):
+        task = self._tasks.pop(task_id, None)
+        if task is None:
+            return False
+        self._unindex(task)
+        return True
+
+    def _index_completed(self, task_id):
+        if task_id in self._completed:
+            return
+        if self._completed and task_id < next(reversed(self._completed)):
+            self._completed_sorted = False
+        self._completed[task_id] = None
+
+    def _unindex(self, task):
+        self._pending.pop(task.id, None)
+        self._completed.pop(task.id, None)
+        key = _prefix_key(task.title)
+        bucket = self._by_prefix[key]
+        del bucket[task.id]
+        if not bucket:
+            del self._by_prefix[key]
+
+    def clear(self):
+        self._tasks = {}
+        self._pending = {}
+        self._completed = {}
+        self._completed_sorted = True
+        self._by_prefix = {}
+        self._max_id = 0
+
+    def pending(self):
+        return (self._tasks[task_id] for task_id in self._pending)
+
+    def completed(self):
+        if not self._completed_sorted:
+            self._completed = dict.fromkeys(sorted(self._completed))
+            self._completed_sorted = True
+        return (self._tasks[task_id] for task_id in self._completed)
+
+    def find(self, prefix):
+        prefix = prefix.casefold()
+        key = prefix[:PREFIX_INDEX_LENGTH]
+        if len(key) == PREFIX_INDEX_LENGTH:
+            buckets = [self._by_prefix.get(key, {})]
+        else:
+            buckets = [
+                bucket
+                for bucket_key, bucket in self._by_prefix.items()
+                if bucket_key.startswith(key)
+            ]
+        candidates = [
+            self._tasks[task_id] for bucket in buckets for task_id in bucket
+        ]
+        if len(buckets) > 1:
+            candidates.sort(key=lambda task: task.id)
+        return [
+            task for task in candidates
+            if task.title.casefold().startswith(prefix)
+        ]
+
+
+class TaskManager:
+    def __init__(self, store=None, journal=None):
+        self._tasks = TaskStore() if store is None else store
+        # Ids touched since the last save/load (an ordered set), and the file
+        # that save/load used and its format, for incremental appends.
+        self._changed = {}
+        self._saved_to = None
+        self._saved_format = None
+        # Optional journal.TaskJournal: state is recovered from it here and
+        # every mutation is appended to it.
+        self._journal = journal
+        if journal is not None:
+            self._apply_records(journal.replay())
+        self._next_id = self._tasks.max_id() + 1
+
+    def _touch(self, task_id):
+        self._touch_many((task_id,))
+
+    def _touch_many(self, task_ids):
+        self._changed.update(dict.fromkeys(task_ids))
+        if self._journal is not None:
+            self._journal.append_many(self._records_for(task_ids))
+
+    def _records_for(self, task_ids):
+        for task_id in task_ids:
+            task = self._tasks.get(task_id)
+            if task is None:
+                yield persistence.deleted_record(task_id)
+            else:
+                yield persistence.task_record(task)
+
+    def _apply_records(self, records, batch_size=10_000):
+        # Later records for the same id replace earlier ones. Consecutive
+        # adds (or deletes) go to the store as one batch.
+        batch = []
+        deleting = False
+        for data in records:
+            deleted = bool(data.get("deleted"))
+            if batch and (deleted != deleting or len(batch) >= batch_size):
+                self._apply_batch(batch, deleting)
+                batch = []
+            deleting = deleted
+            if deleted:
+                batch.append(data["id"])
+            else:
+                batch.append(
+                    Task(
+                        data["id"],
+                        data["title"],
+                        data["description"],
+                        data["completed"],
+                    )
+                )
+        if batch:
+            self._apply_batch(batch, deleting)
+
+    def _apply_batch(self, batch, deleting):
+        if deleting:
+            self._tasks.remove_many(batch)
+        else:
+            self._tasks.add_many(batch)
+
+    def close(self):
+        if self._journal is not None:
+            self._journal.close()
 
     def add_task(self, title, description):
         task = Task(self._next_id, title, description)
-        self._tasks.append(task)
+        self._tasks.add(task)
+        self._touch(task.id)
         self._next_id += 1
-        print(f"Task '{title}' added with ID {task.id}.")
+        return task
 
-    def list_tasks(self):
-        if not self._tasks:
-            print("No tasks available.")
-            return
-        for task in self._tasks:
-            print(f"ID: {task.id} - {task}")
-            print("-" * 20)
+    def add_tasks(self, items):
+        # Bulk add_task for an iterable of (title, description) pairs;
+        # returns a BatchResult with the new ids.
+        tasks = [
+            Task(task_id, title, description)
+            for task_id, (title, description) in enumerate(items, self._next_id)
+        ]
+        self._tasks.add_many(tasks)
+        self._next_id += len(tasks)
+        ids = [task.id for task in tasks]
+        self._touch_many(ids)
+        return BatchResult(ids)
+
+    def complete_tasks(self, task_ids):
+        return self._apply_to_many(self._tasks.complete_many, task_ids)
+
+    def delete_tasks(self, task_ids):
+        return self._apply_to_many(self._tasks.remove_many, task_ids)
+
+    def _apply_to_many(self, apply, task_ids):
+        requested = list(dict.fromkeys(task_ids))
+        applied = apply(requested)
+        self._touch_many(applied)
+        if len(applied) == len(requested):
+            return BatchResult(applied)
+        found = set(applied)
+        return BatchResult(
+            applied, [task_id for task_id in requested if task_id not in found]
+        )
+
+    def get_task(self, task_id):
+        return self._tasks.get(task_id)
+
+    def pending_tasks(self):
+        return list(self._tasks.pending())
+
+    def completed_tasks(self):
+        return list(self._tasks.completed())
+
+    def find_tasks(self, prefix):
+        # Case-insensitive title prefix search.
+        return self._tasks.find(prefix)
+
+    def list_tasks(self, status=None):
+        # Yields tasks lazily; status is None (all), "pending" or "completed".
+        # Use renderer.TaskRenderer to print them.
+        if status is None:
+            return iter(self._tasks)
+        if status == "pending":
+            return self._tasks.pending()
+        if status == "completed":
+            return self._tasks.completed()
+        raise ValueError(f"Unknown task status: {status!r}")
 
     def complete_task(self, task_id):
-        for task in self._tasks:
-            if task.id == task_id:
-                task.mark_completed()
-                print(f"Task ID {task_id} marked as completed.")
-                return
-        print(f"Task ID {task_id} not found.")
+        # Returns False if there is no task with that id.
+        if not self._tasks.complete(task_id):
+            return False
+        self._touch(task_id)
+        return True
 
     def delete_task(self, task_id):
-        for task in self._tasks:
-            if task.id == task_id:
-                self._tasks.remove(task)
-                print(f"Task ID {task_id} deleted.")
-                return
-        print(f"Task ID {task_id} not found.")
-
-    # Add a persistent method to save tasks to a file
-    # and load tasks from a file for future enhancements. (JSON)
-
-    def save_tasks(self, filename):
-        import json
-
-        with open(filename, "w") as f:
-            json.dump(
-                [
-                    {
-                        "id": task.id,
-                        "title": task.title,
-                        "description": task.description,
-                        "completed": task.completed,
-                    }
-                    for task in self._tasks
-                ],
-                f,
-                indent=4,
+        if not self._tasks.remove(task_id):
+            return False
+        self._touch(task_id)
+        return True
+
+    # Tasks are persisted as JSON Lines (see persistence.py), streamed in
+    # and out one record at a time.
+
+    def save_tasks(self, filename, append=False):
+        # With append=True and a file this manager last saved to or loaded
+        # from, only the tasks changed since then are written. A legacy JSON
+        # array file cannot be appended to, so it is rewritten as JSON Lines.
+        if (
+            append
+            and filename == self._saved_to
+            and self._saved_format == persistence.JSON_LINES
+            and os.path.exists(filename)
+        ):
+            persistence.append_records(filename, self._changed_records())
+        else:
+            persistence.save_records(
+                filename, (persistence.task_record(task) for task in self._tasks)
             )
+        self._changed = {}
+        self._saved_to = filename
+        self._saved_format = persistence.JSON_LINES
 
-    def load_tasks(self, filename):
-        import json
-        import os
+    def _changed_records(self):
+        for task_id in self._changed:
+            task = self._tasks.get(task_id)
+            if task is None:
+                yield persistence.deleted_record(task_id)
+            else:
+                yield persistence.task_record(task)
 
+    def load_tasks(self, filename):
+        # Returns the number of tasks loaded, or None if there is no file.
         if not os.path.exists(filename):
-            print(f"No saved tasks found in {filename}.")
-            return
+            return None
 
-        with open(filename, "r") as f:
-            tasks_data = json.load(f)
-            self._tasks = [
-                Task(
-                    data["id"],
-                    data["title"],
-                    data["description"],
-                    data["completed"],
-                )
-                for data in tasks_data
-            ]
-            if self._tasks:
-                self._next_id = max(task.id for task in self._tasks) + 1
-            else:
-                self._next_id = 1
-        print(f"Loaded {len(self._tasks)} tasks from {filename}.")
+        self._tasks.clear()
+        self._saved_format = persistence.file_format(filename)
+        self._apply_records(persistence.iter_records(filename))
+        self._next_id = self._tasks.max_id() + 1
+        if self._journal is not None:
+            self._journal.reset(
+                persistence.task_record(task) for task in self._tasks
+            )
+        self._changed = {}
+        self._saved_to = filename
+        return len(self._tasks)
 
 
 """ if __name__ == "__main__":
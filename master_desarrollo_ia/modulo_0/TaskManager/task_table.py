@@ -0,0 +1,174 @@
+import sys
+from array import array
+from bisect import bisect_left
+
+from task_manager import Task
+
+PENDING = 0
+COMPLETED = 1
+DELETED = 2
+
+
+class TaskTable:
+    """Columnar, memory-compact task storage.
+
+    Drop-in replacement for ``TaskStore``: ``TaskManager(store=TaskTable())``.
+    Each task is a row spread over flat columns instead of a Python object:
+    ids live in an ``array``, status flags in a ``bytearray``, titles are
+    interned (repeated titles share one string) and descriptions are UTF-8
+    slices of one shared buffer. ``Task`` objects are only built on access.
+
+    Ids are kept sorted, so lookups are a binary search (O(log n)) rather
+    than a dict probe. Deleted rows are tombstoned and squeezed out once
+    they make up half of the table.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._ids = array("q")
+        self._flags = bytearray()
+        self._titles = []
+        self._desc_start = array("q")
+        self._desc_len = array("q")
+        self._descriptions = bytearray()
+        self._deleted = 0
+        self._max_id = 0
+
+    def __len__(self):
+        return len(self._ids) - self._deleted
+
+    def __iter__(self):
+        flags = self._flags
+        for row in range(len(self._ids)):
+            if flags[row] != DELETED:
+                yield self._task(row)
+
+    def max_id(self):
+        return self._max_id
+
+    def _row(self, task_id):
+        row = bisect_left(self._ids, task_id)
+        if (
+            row < len(self._ids)
+            and self._ids[row] == task_id
+            and self._flags[row] != DELETED
+        ):
+            return row
+        return None
+
+    def _task(self, row):
+        start = self._desc_start[row]
+        description = self._descriptions[start:start + self._desc_len[row]]
+        return Task(
+            self._ids[row],
+            self._titles[row],
+            description.decode("utf-8"),
+            self._flags[row] == COMPLETED,
+        )
+
+    def add(self, task):
+        encoded = task.description.encode("utf-8")
+        values = (
+            (self._ids, task.id),
+            (self._flags, COMPLETED if task.completed else PENDING),
+            (self._titles, sys.intern(task.title)),
+            (self._desc_start, len(self._descriptions)),
+            (self._desc_len, len(encoded)),
+        )
+        self._descriptions += encoded
+        if task.id > self._max_id:
+            for column, value in values:
+                column.append(value)
+            self._max_id = task.id
+            return
+        # Replacements and out-of-order ids (e.g. from a hand-edited file)
+        # are rare, so paying for a shift of every column is fine here.
+        row = bisect_left(self._ids, task.id)
+        if row < len(self._ids) and self._ids[row] == task.id:
+            # Replace the existing (or tombstoned) row in place. The old
+            # description bytes stay in the buffer until the next compaction.
+            if self._flags[row] == DELETED:
+                self._deleted -= 1
+            for column, value in values:
+                column[row] = value
+            return
+        for column, value in values:
+            column.insert(row, value)
+
+    def add_many(self, tasks):
+        for task in tasks:
+            self.add(task)
+
+    def get(self, task_id):
+        row = self._row(task_id)
+        return None if row is None else self._task(row)
+
+    def complete(self, task_id):
+        row = self._row(task_id)
+        if row is None:
+            return False
+        self._flags[row] = COMPLETED
+        return True
+
+    def complete_many(self, task_ids):
+        return [task_id for task_id in task_ids if self.complete(task_id)]
+
+    def remove(self, task_id):
+        return bool(self.remove_many((task_id,)))
+
+    def remove_many(self, task_ids):
+        # Tombstone the whole batch first, then compact at most once.
+        removed = []
+        for task_id in task_ids:
+            row = self._row(task_id)
+            if row is not None:
+                self._flags[row] = DELETED
+                self._titles[row] = None
+                removed.append(task_id)
+        self._deleted += len(removed)
+        if self._deleted * 2 > len(self._ids):
+            self._compact()
+        return removed
+
+    def _compact(self):
+        ids, flags, titles = self._ids, self._flags, self._titles
+        desc_start, desc_len = self._desc_start, self._desc_len
+        descriptions, max_id = self._descriptions, self._max_id
+        self.clear()
+        self._max_id = max_id
+        for row in range(len(ids)):
+            if flags[row] == DELETED:
+                continue
+            start = desc_start[row]
+            self._ids.append(ids[row])
+            self._flags.append(flags[row])
+            self._titles.append(titles[row])
+            self._desc_start.append(len(self._descriptions))
+            self._desc_len.append(desc_len[row])
+            self._descriptions += descriptions[start:start + desc_len[row]]
+
+    def _rows_with_flag(self, flag):
+        # bytearray.find scans in C, skipping rows with other flags without
+        # touching them from Python.
+        needle = bytes([flag])
+        row = self._flags.find(needle)
+        while row != -1:
+            yield row
+            row = self._flags.find(needle, row + 1)
+
+    def pending(self):
+        return (self._task(row) for row in self._rows_with_flag(PENDING))
+
+    def completed(self):
+        return (self._task(row) for row in self._rows_with_flag(COMPLETED))
+
+    def find(self, prefix):
+        # No prefix index here: it would cost more memory than the table.
+        prefix = prefix.casefold()
+        return [
+            self._task(row)
+            for row, title in enumerate(self._titles)
+            if title is not None and title.casefold().startswith(prefix)
+        ]
@@ -0,0 +1,105 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import ai_service
+from ai_service import ResponseCache
+
+
+def completion(content):
+    response = MagicMock()
+    response.choices[0].message.content = f"  {content}  "
+    return response
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(self.tmp.name, ttl=60)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        request = ai_service.build_request("Plan a trip")
+        self.assertIsNone(self.cache.get(request))
+        self.cache.set(request, "1. Book flights")
+        self.assertEqual(self.cache.get(request), "1. Book flights")
+        self.assertIsNone(self.cache.get(ai_service.build_request("Other")))
+
+    def test_expired_entries_are_ignored(self):
+        request = ai_service.build_request("Plan a trip")
+        self.cache.set(request, "1. Book flights")
+        with patch("ai_service.time.time", return_value=10**12):
+            self.assertIsNone(self.cache.get(request))
+
+    def test_zero_ttl_disables_cache(self):
+        cache = ResponseCache(self.tmp.name, ttl=0)
+        request = ai_service.build_request("Plan a trip")
+        cache.set(request, "1. Book flights")
+        self.assertIsNone(cache.get(request))
+
+
+class TestCreateSimpleTasks(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sync_call_is_cached(self):
+        client = MagicMock()
+        client.chat.completions.create.return_value = completion("Subtasks")
+        with patch("ai_service.get_client", return_value=client):
+            self.assertEqual(ai_service.create_simple_tasks("Task", self.cache), "Subtasks")
+            self.assertEqual(ai_service.create_simple_tasks("Task", self.cache), "Subtasks")
+        client.chat.completions.create.assert_called_once()
+
+    @patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"})
+    @patch("ai_service.load_environment")
+    def test_client_is_created_once(self, mock_load_environment):
+        ai_service.get_client.cache_clear()
+        try:
+            self.assertIs(ai_service.get_client(), ai_service.get_client())
+        finally:
+            ai_service.get_client.cache_clear()
+        mock_load_environment.assert_called_once()
+
+    def test_many_keeps_order_and_bounds_concurrency(self):
+        in_flight = 0
+        peak = 0
+
+        async def create(**request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return completion(request["messages"][1]["content"].rsplit(": ", 1)[1])
+
+        async_client = MagicMock()
+        async_client.chat.completions.create = AsyncMock(side_effect=create)
+        tasks = [f"Task {i}" for i in range(10)] + ["Task 0"]
+        results = asyncio.run(
+            ai_service.create_simple_tasks_many(
+                tasks, concurrency=3, cache=self.cache, async_client=async_client
+            )
+        )
+        self.assertEqual(results, tasks)
+        self.assertEqual(peak, 3)
+        self.assertEqual(async_client.chat.completions.create.await_count, 10)
+
+        results = asyncio.run(
+            ai_service.create_simple_tasks_many(
+                tasks, cache=self.cache, async_client=async_client
+            )
+        )
+        self.assertEqual(results, tasks)
+        self.assertEqual(async_client.chat.completions.create.await_count, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
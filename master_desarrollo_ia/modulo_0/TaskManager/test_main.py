@@ -1,8 +1,10 @@
+import io
 import unittest
 from unittest.mock import MagicMock, patch
 
 from main import (
     add_task,
+    run_batch,
     break_down_task_ai,
     complete_task,
     delete_task,
@@ -41,17 +43,42 @@ class TestMainModule(unittest.TestCase):
         add_task(manager)
         manager.add_task.assert_called_once_with("Title", "Description")
 
+    @patch("builtins.print")
+    def test_add_task_prints_new_id(self, mock_print):
+        manager = MagicMock()
+        manager.add_task.return_value.id = 7
+        with patch("builtins.input", side_effect=["Title", "Description"]):
+            add_task(manager)
+        mock_print.assert_called_with("Task 'Title' added with ID 7.")
+
     def test_list_tasks_calls_manager(self):
         manager = MagicMock()
         list_tasks(manager)
         manager.list_tasks.assert_called_once()
 
+    @patch("sys.stdout", new_callable=io.StringIO)
+    def test_list_tasks_renders_tasks(self, mock_stdout):
+        from task_manager import TaskManager
+
+        manager = TaskManager()
+        manager.add_task("Buy milk", "2 litres")
+        list_tasks(manager)
+        self.assertIn("ID: 1 - Task: Buy milk\n", mock_stdout.getvalue())
+
     @patch("builtins.input", return_value="1")
     def test_complete_task_valid(self, mock_input):
         manager = MagicMock()
         complete_task(manager)
         manager.complete_task.assert_called_once_with(1)
 
+    @patch("builtins.input", return_value="1")
+    @patch("builtins.print")
+    def test_complete_task_not_found(self, mock_print, mock_input):
+        manager = MagicMock()
+        manager.complete_task.return_value = False
+        complete_task(manager)
+        mock_print.assert_called_with("Task ID 1 not found.")
+
     @patch("builtins.input", return_value="notanumber")
     @patch("builtins.print")
     def test_complete_task_invalid(self, mock_print, mock_input):
@@ -66,6 +93,16 @@ class TestMainModule(unittest.TestCase):
         delete_task(manager)
         manager.delete_task.assert_called_once_with(2)
 
+    @patch("builtins.input", return_value="2")
+    @patch("builtins.print")
+    def test_delete_task_prints_result(self, mock_print, mock_input):
+        manager = MagicMock()
+        delete_task(manager)
+        mock_print.assert_called_with("Task ID 2 deleted.")
+        manager.delete_task.return_value = False
+        delete_task(manager)
+        mock_print.assert_called_with("Task ID 2 not found.")
+
     @patch("builtins.input", return_value="notanumber")
     @patch("builtins.print")
     def test_delete_task_invalid(self, mock_print, mock_input):
@@ -90,15 +127,73 @@ class TestMainModule(unittest.TestCase):
         manager.load_tasks.assert_called_once_with("tasks.json")
         mock_print.assert_called_with("Tasks loaded from tasks.json.")
 
+    @patch("builtins.input", return_value="missing.json")
+    @patch("builtins.print")
+    def test_load_tasks_missing_file(self, mock_print, mock_input):
+        manager = MagicMock()
+        manager.load_tasks.return_value = None
+        load_tasks(manager)
+        mock_print.assert_called_with("No saved tasks found in missing.json.")
+
     @patch("builtins.input", return_value="Breakdown task")
     @patch("ai_service.create_simple_tasks", return_value="Subtasks")
     @patch("builtins.print")
-    def test_break_down_task_ai(self, mock_print, mock_create):
+    def test_break_down_task_ai(self, mock_print, mock_create, mock_input):
         break_down_task_ai()
         mock_create.assert_called_once_with("Breakdown task")
         mock_print.assert_any_call("\nAI-generated breakdown:")
         mock_print.assert_any_call("Subtasks")
 
 
+class TestBatchMode(unittest.TestCase):
+    def setUp(self):
+        from task_manager import TaskManager
+
+        self.manager = TaskManager()
+
+    @patch("builtins.print")
+    def test_runs_commands_in_order(self, mock_print):
+        script = [
+            "# setup",
+            'add "Buy milk" "2 litres"',
+            "add Read",
+            "",
+            "complete 1 7",
+            "add Walk",
+            "delete 2",
+        ]
+        summary = run_batch(self.manager, script)
+        self.assertEqual(summary["commands"], 5)
+        self.assertEqual(summary["added"], 3)
+        self.assertEqual(summary["completed"], 1)
+        self.assertEqual(summary["deleted"], 1)
+        self.assertEqual(summary["not found"], 1)
+        self.assertEqual([t.id for t in self.manager.list_tasks()], [1, 3])
+        self.assertEqual(self.manager.get_task(1).description, "2 litres")
+        self.assertTrue(self.manager.get_task(1).completed)
+        mock_print.assert_not_called()
+
+    @patch("builtins.print")
+    def test_reports_bad_lines_and_continues(self, mock_print):
+        summary = run_batch(self.manager, ["frobnicate", "complete x", "add Ok"])
+        self.assertEqual(summary["errors"], 2)
+        self.assertEqual(summary["added"], 1)
+        mock_print.assert_any_call("Line 1: unknown command: frobnicate")
+
+    @patch("sys.stdout", new_callable=io.StringIO)
+    def test_save_load_and_list(self, mock_stdout):
+        import os
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "tasks.jsonl")
+            run_batch(self.manager, [
+                "add One", "add Two", "complete 2", f"save {filename}",
+                "delete 1", f"load {filename}", "list completed",
+            ])
+        self.assertEqual(len(self.manager.pending_tasks()), 1)
+        self.assertEqual(mock_stdout.getvalue().count("ID: "), 1)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,362 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import persistence
+from journal import TaskJournal
+from renderer import TaskRenderer
+from sqlite_store import SQLiteTaskStore
+from task_manager import Task, TaskManager, TaskStore
+from task_table import TaskTable
+
+
+class TestTaskManager(unittest.TestCase):
+    store_class = TaskStore
+
+    def make_manager(self, *titles):
+        manager = TaskManager(self.store_class())
+        for title in titles:
+            manager.add_task(title, f"{title} description")
+        return manager
+
+    def test_get_task_by_id(self):
+        manager = self.make_manager("Buy milk", "Read book")
+        self.assertEqual(manager.get_task(2).title, "Read book")
+        self.assertIsNone(manager.get_task(3))
+
+    def test_complete_task_updates_pending_index(self):
+        manager = self.make_manager("Buy milk", "Read book", "Call mom")
+        self.assertTrue(manager.complete_task(2))
+        self.assertTrue(manager.get_task(2).completed)
+        self.assertEqual([t.id for t in manager.pending_tasks()], [1, 3])
+        self.assertEqual([t.id for t in manager.completed_tasks()], [2])
+
+    def test_completed_index_follows_ids(self):
+        manager = self.make_manager("Buy milk", "Read book", "Call mom", "Walk")
+        manager.complete_tasks([3, 1, 4])
+        self.assertEqual([t.id for t in manager.completed_tasks()], [1, 3, 4])
+        manager.delete_task(3)
+        manager.complete_task(2)
+        self.assertEqual([t.id for t in manager.completed_tasks()], [1, 2, 4])
+        manager.complete_task(2)
+        self.assertEqual([t.id for t in manager.list_tasks("completed")], [1, 2, 4])
+        self.assertEqual(manager.pending_tasks(), [])
+
+    def test_complete_missing_task(self):
+        manager = self.make_manager("Buy milk")
+        self.assertFalse(manager.complete_task(7))
+
+    def test_delete_task_removes_from_all_indexes(self):
+        manager = self.make_manager("Buy milk", "Buy bread")
+        self.assertTrue(manager.delete_task(1))
+        self.assertIsNone(manager.get_task(1))
+        self.assertEqual([t.id for t in manager.pending_tasks()], [2])
+        self.assertEqual([t.id for t in manager.find_tasks("buy")], [2])
+
+    def test_delete_missing_task(self):
+        manager = self.make_manager()
+        self.assertFalse(manager.delete_task(1))
+
+    def test_find_tasks_by_prefix(self):
+        manager = self.make_manager("Buy milk", "Read book", "buy bread", "B")
+        self.assertEqual([t.id for t in manager.find_tasks("Buy")], [1, 3])
+        self.assertEqual([t.id for t in manager.find_tasks("buy m")], [1])
+        self.assertEqual([t.id for t in manager.find_tasks("b")], [1, 3, 4])
+        self.assertEqual(manager.find_tasks("x"), [])
+
+    def test_add_task_returns_task(self):
+        manager = self.make_manager("Buy milk")
+        task = manager.add_task("Read book", "1984")
+        self.assertEqual((task.id, task.title), (2, "Read book"))
+
+    def test_list_tasks_by_status(self):
+        manager = self.make_manager("Buy milk", "Read book", "Call mom")
+        manager.complete_task(2)
+        self.assertEqual([t.id for t in manager.list_tasks()], [1, 2, 3])
+        self.assertEqual([t.id for t in manager.list_tasks("pending")], [1, 3])
+        self.assertEqual([t.id for t in manager.list_tasks("completed")], [2])
+        with self.assertRaises(ValueError):
+            manager.list_tasks("archived")
+
+    def test_bulk_operations_return_summaries(self):
+        manager = self.make_manager("Existing")
+        added = manager.add_tasks([("Buy milk", ""), ("Read book", ""), ("Call", "")])
+        self.assertEqual(added.applied, [2, 3, 4])
+        completed = manager.complete_tasks([1, 3, 3, 9])
+        self.assertEqual((completed.applied, completed.missing), ([1, 3], [9]))
+        deleted = manager.delete_tasks(iter([2, 3, 8]))
+        self.assertEqual((deleted.applied, deleted.missing), ([2, 3], [8]))
+        self.assertEqual([t.id for t in manager._tasks], [1, 4])
+        self.assertEqual([t.id for t in manager.pending_tasks()], [4])
+        manager.add_task("Next", "")
+        self.assertEqual(manager.get_task(5).title, "Next")
+
+    def test_save_and_load_rebuild_indexes(self):
+        manager = self.make_manager("Buy milk", "Read book")
+        manager.complete_task(1)
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "tasks.json")
+            manager.save_tasks(filename)
+            loaded = TaskManager(self.store_class())
+            loaded.load_tasks(filename)
+        self.assertEqual([t.id for t in loaded.pending_tasks()], [2])
+        self.assertEqual([t.id for t in loaded.find_tasks("read")], [2])
+        loaded.add_task("New", "task")
+        self.assertEqual(loaded.get_task(3).title, "New")
+
+    def test_load_legacy_json_array(self):
+        legacy = [
+            {"id": 1, "title": "Old", "description": "one", "completed": True},
+            {"id": 4, "title": "Older", "description": "two", "completed": False},
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "tasks.json")
+            with open(filename, "w") as f:
+                json.dump(legacy, f, indent=4)
+            manager = TaskManager(self.store_class())
+            with patch.object(persistence, "CHUNK_SIZE", 16):
+                self.assertEqual(manager.load_tasks(filename), 2)
+        self.assertEqual([t.id for t in manager.pending_tasks()], [4])
+        self.assertTrue(manager.get_task(1).completed)
+        manager.add_task("Next", "")
+        self.assertEqual(manager.get_task(5).title, "Next")
+
+    def test_append_save_rewrites_legacy_file(self):
+        legacy = [{"id": 1, "title": "Old", "description": "", "completed": False}]
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "tasks.json")
+            with open(filename, "w") as f:
+                json.dump(legacy, f, indent=4)
+            manager = TaskManager(self.store_class())
+            manager.load_tasks(filename)
+            manager.add_task("New", "")
+            manager.save_tasks(filename, append=True)
+            self.assertEqual(persistence.file_format(filename), persistence.JSON_LINES)
+            manager.add_task("Newer", "")
+            manager.save_tasks(filename, append=True)
+            loaded = TaskManager(self.store_class())
+            self.assertEqual(loaded.load_tasks(filename), 3)
+        self.assertEqual([t.title for t in loaded._tasks], ["Old", "New", "Newer"])
+
+    def test_append_save_writes_only_changes(self):
+        manager = self.make_manager("Buy milk", "Read book", "Call mom")
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "tasks.jsonl")
+            manager.save_tasks(filename)
+            manager.add_task("Walk dog", "")
+            manager.complete_task(1)
+            manager.delete_task(2)
+            manager.save_tasks(filename, append=True)
+            with open(filename) as f:
+                self.assertEqual(len(f.readlines()), 6)
+            loaded = TaskManager(self.store_class())
+            loaded.load_tasks(filename)
+        self.assertEqual([t.id for t in loaded._tasks], [1, 3, 4])
+        self.assertEqual([t.id for t in loaded.pending_tasks()], [3, 4])
+
+
+class TestTaskRenderer(unittest.TestCase):
+    def setUp(self):
+        self.manager = TaskManager()
+        self.manager.add_tasks((f"Task {i}", f"Description {i}") for i in range(5))
+        self.manager.complete_task(2)
+        self.stream = io.StringIO()
+        self.renderer = TaskRenderer(self.stream)
+
+    def test_render_matches_previous_layout(self):
+        self.renderer.render(self.manager.list_tasks("completed"))
+        self.assertEqual(
+            self.stream.getvalue(),
+            "ID: 2 - Task: Task 1\n"
+            "Description: Description 1\n"
+            "Status: Completed\n"
+            "--------------------\n",
+        )
+
+    def test_render_pages(self):
+        count = self.renderer.render(self.manager.list_tasks(), page=2, page_size=2)
+        self.assertEqual(count, 2)
+        output = self.stream.getvalue()
+        self.assertIn("ID: 3 -", output)
+        self.assertIn("ID: 4 -", output)
+        self.assertNotIn("ID: 2 -", output)
+
+    def test_render_empty(self):
+        count = self.renderer.render(self.manager.list_tasks(), page=9, page_size=2)
+        self.assertEqual(count, 0)
+        self.assertEqual(self.stream.getvalue(), "No tasks available.\n")
+
+    def test_rows_are_cached_until_task_changes(self):
+        task = self.manager.get_task(1)
+        row = self.renderer.format_task(task)
+        self.assertIs(self.renderer.format_task(task), row)
+        self.manager.complete_task(1)
+        self.assertIn("Status: Completed", self.renderer.format_task(task))
+
+
+class TestTaskManagerWithTaskTable(TestTaskManager):
+    store_class = TaskTable
+
+
+class TestTaskManagerWithSQLite(TestTaskManager):
+    store_class = SQLiteTaskStore
+
+
+class TestSQLiteTaskStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "tasks.db")
+        self.store = SQLiteTaskStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_batch_operations(self):
+        self.store.add_many(Task(i, f"Task {i}", "") for i in range(1, 6))
+        self.assertEqual(self.store.complete_many([1, 2, 9]), [1, 2])
+        self.assertEqual(self.store.remove_many([2, 3]), [2, 3])
+        self.assertEqual([t.id for t in self.store.pending()], [4, 5])
+        self.assertEqual([t.id for t in self.store.completed()], [1])
+        self.assertEqual(self.store.max_id(), 5)
+
+    def test_transaction_rolls_back_on_error(self):
+        self.store.add(Task(1, "Keep", ""))
+        with self.assertRaises(RuntimeError):
+            with self.store.transaction():
+                self.store.add(Task(2, "Discard", ""))
+                self.store.remove(1)
+                raise RuntimeError
+        self.assertEqual([t.title for t in self.store], ["Keep"])
+
+    def test_tasks_persist_across_connections(self):
+        self.store.add(Task(1, "Buy milk", "2 litres", True))
+        self.store.close()
+        self.store = SQLiteTaskStore(self.path)
+        task = self.store.get(1)
+        self.assertEqual((task.title, task.description), ("Buy milk", "2 litres"))
+        self.assertTrue(task.completed)
+        self.assertEqual(TaskManager(self.store)._next_id, 2)
+
+
+class TestTaskTable(unittest.TestCase):
+    def test_compacts_after_many_deletes(self):
+        table = TaskTable()
+        for i in range(1, 11):
+            table.add(Task(i, f"Task {i}", f"Descripción {i}", i % 2 == 0))
+        for i in range(1, 8):
+            table.remove(i)
+        self.assertEqual(len(table), 3)
+        self.assertLess(len(table._ids), 10)
+        self.assertEqual(table.get(9).description, "Descripción 9")
+        self.assertEqual([t.id for t in table.pending()], [9])
+        self.assertEqual(table.max_id(), 10)
+
+    def test_out_of_order_add_keeps_ids_sorted(self):
+        table = TaskTable()
+        table.add(Task(5, "Five", "5"))
+        table.add(Task(2, "Two", "2", True))
+        self.assertEqual([t.id for t in table], [2, 5])
+        self.assertTrue(table.get(2).completed)
+
+    def test_add_replaces_existing_row(self):
+        table = TaskTable()
+        table.add(Task(1, "One", "1"))
+        table.add(Task(2, "Two", "2"))
+        table.add(Task(1, "Uno", "uno", True))
+        self.assertEqual([t.title for t in table], ["Uno", "Two"])
+        self.assertEqual(len(table), 2)
+        self.assertEqual([t.id for t in table.completed()], [1])
+
+    def test_titles_are_interned(self):
+        table = TaskTable()
+        table.add(Task(1, "".join(["Re", "view"]), ""))
+        table.add(Task(2, "".join(["Rev", "iew"]), ""))
+        self.assertIs(table.get(1).title, table.get(2).title)
+
+
+class TestTaskJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "tasks")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def reopen(self, manager, **kwargs):
+        manager.close()
+        return TaskManager(journal=TaskJournal(self.path, **kwargs))
+
+    def test_mutations_survive_restart(self):
+        manager = TaskManager(journal=TaskJournal(self.path))
+        manager.add_task("Buy milk", "")
+        manager.add_task("Read book", "")
+        manager.add_task("Call mom", "")
+        manager.complete_task(1)
+        manager.delete_task(2)
+        manager = self.reopen(manager)
+        self.assertEqual([t.id for t in manager._tasks], [1, 3])
+        self.assertTrue(manager.get_task(1).completed)
+        manager.add_task("Walk dog", "")
+        self.assertEqual(manager.get_task(4).title, "Walk dog")
+        manager.close()
+
+    def test_bulk_operations_are_journaled(self):
+        manager = TaskManager(journal=TaskJournal(self.path))
+        manager.add_tasks((f"Task {i}", "") for i in range(5))
+        manager.complete_tasks([1, 2])
+        manager.delete_tasks([2, 3])
+        manager = self.reopen(manager)
+        self.assertEqual([t.id for t in manager._tasks], [1, 4, 5])
+        self.assertEqual([t.id for t in manager.completed_tasks()], [1])
+        manager.close()
+
+    def test_compaction_folds_log_into_snapshot(self):
+        journal = TaskJournal(self.path, compact_bytes=200)
+        manager = TaskManager(journal=journal)
+        for i in range(20):
+            manager.add_task(f"Task {i}", "")
+        for task_id in range(1, 16):
+            manager.delete_task(task_id)
+        journal.compact()
+        self.assertFalse(os.path.exists(journal.rotated_path))
+        snapshot = list(persistence.iter_records(journal.snapshot_path))
+        self.assertEqual([r["id"] for r in snapshot], [16, 17, 18, 19, 20])
+        manager = self.reopen(manager)
+        self.assertEqual([t.id for t in manager._tasks], [16, 17, 18, 19, 20])
+        manager.close()
+
+    def test_recovers_from_interrupted_compaction(self):
+        manager = TaskManager(journal=TaskJournal(self.path))
+        manager.add_task("Buy milk", "")
+        manager.close()
+        os.replace(f"{self.path}.wal", f"{self.path}.wal.1")
+        manager = TaskManager(journal=TaskJournal(self.path))
+        manager.complete_task(1)
+        manager = self.reopen(manager)
+        self.assertTrue(manager.get_task(1).completed)
+        manager._journal.compact()
+        self.assertFalse(os.path.exists(f"{self.path}.wal.1"))
+        manager = self.reopen(manager)
+        self.assertTrue(manager.get_task(1).completed)
+        manager.close()
+
+    def test_load_replaces_journaled_state(self):
+        other = TaskManager()
+        other.add_task("From file", "")
+        filename = os.path.join(self.tmp.name, "tasks.jsonl")
+        other.save_tasks(filename)
+        manager = TaskManager(journal=TaskJournal(self.path))
+        manager.add_task("Buy milk", "")
+        manager.add_task("Read book", "")
+        manager.load_tasks(filename)
+        manager = self.reopen(manager)
+        self.assertEqual([t.title for t in manager._tasks], ["From file"])
+        manager.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -30,7 +30,7 @@ def load_environment():
             print("⚠️  No .env file found. Please create one with your API keys.")
 
 
-def create_agent(api_key=None, model_name="gpt-5", temperature=0.7):
+def create_agent(api_key=None, model_name="gpt-5", temperature=0.7, store_path=None, embedding_cache_path=None):
     """Create and configure the RAG agent."""
     try:
         agent = RAGAgent(
@@ -38,7 +38,9 @@ def create_agent(api_key=None, model_name="gpt-5", temperature=0.7):
             model_name=model_name,
             temperature=temperature,
             max_tokens=4000,
-            memory_window=10
+            memory_window=10,
+            store_path=store_path,
+            embedding_cache_path=embedding_cache_path
         )
         return agent
     except Exception as e:
@@ -56,6 +58,8 @@ def main():
     parser.add_argument("--temperature", default=0.7, type=float, help="Temperature for the model")
     parser.add_argument("--share", action="store_true", help="Create a public Gradio link")
     parser.add_argument("--debug", action="store_true", help="Enable debug mode")
+    parser.add_argument("--store-path", default=os.getenv("RAG_STORE_PATH"), help="Directory to save and reload the knowledge base")
+    parser.add_argument("--embedding-cache", default=os.getenv("RAG_EMBEDDING_CACHE"), help="SQLite file caching chunk embeddings across restarts")
     
     args = parser.parse_args()
     
@@ -66,6 +70,8 @@ def main():
     print(f"📍 Host: {args.host}:{args.port}")
     print(f"🤖 Model: {args.model}")
     print(f"🌡️  Temperature: {args.temperature}")
+    if args.store_path:
+        print(f"💾 Knowledge base: {args.store_path}")
     
     # Get API key
     api_key = os.getenv("OPENAI_API_KEY")
@@ -79,7 +85,9 @@ def main():
     agent = create_agent(
         api_key=api_key,
         model_name=args.model,
-        temperature=args.temperature
+        temperature=args.temperature,
+        store_path=args.store_path,
+        embedding_cache_path=args.embedding_cache
     )
     
     print("✅ RAG Agent initialized successfully!")
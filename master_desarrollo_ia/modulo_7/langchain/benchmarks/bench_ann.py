@@ -0,0 +1,86 @@
+"""
+Recall@k and latency of the IVF approximate index vs exact search.
+
+Embeddings are drawn around random cluster centres (real text embeddings are
+clustered too; uniformly random vectors are the worst case for any IVF index).
+Queries are perturbed copies of stored embeddings, and the exact top-k from
+the same store is the ground truth. Documents are added in several batches so
+the index is built incrementally, as with repeated add_documents calls.
+
+Usage: python benchmarks/bench_ann.py [--size 200000] [--dim 128] [--nprobe 1 4 8 16 32]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from langchain_core.documents import Document  # noqa: E402
+
+from bench_vector_search import RandomQueryEmbeddings  # noqa: E402
+from rag.ivf_index import IVFIndex  # noqa: E402
+from rag.vector_store import InMemoryVectorStore  # noqa: E402
+
+
+def clustered_vectors(rng, size: int, dim: int, clusters: int, spread: float) -> np.ndarray:
+    """Gaussian blobs around ``clusters`` random centres."""
+    centres = rng.standard_normal((clusters, dim), dtype=np.float32)
+    labels = rng.integers(clusters, size=size)
+    return centres[labels] + spread * rng.standard_normal((size, dim), dtype=np.float32)
+
+
+def run(store, queries, k: int, exact: bool):
+    """(average ms per query, list of result id sets)."""
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        hits = store.similarity_search_by_vector_with_score(query, k=k, exact=exact)
+        results.append({id(doc) for doc, _ in hits})
+    return (time.perf_counter() - start) / len(queries) * 1000, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batches", type=int, default=4)
+    parser.add_argument("--clusters", type=int, default=1000)
+    parser.add_argument("--spread", type=float, default=1.0)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    vectors = clustered_vectors(rng, args.size, args.dim, args.clusters, spread=args.spread)
+    documents = [Document(page_content=str(i)) for i in range(args.size)]
+
+    index = IVFIndex()
+    store = InMemoryVectorStore(embeddings=RandomQueryEmbeddings(args.dim), ann_index=index)
+    start = time.perf_counter()
+    for chunk in np.array_split(np.arange(args.size), args.batches):
+        store.add_embeddings(documents[chunk[0]:chunk[-1] + 1], vectors[chunk])
+    build_s = time.perf_counter() - start
+    print(
+        f"{args.size} chunks, dim={args.dim}, k={args.k}, {len(index.centroids)} lists, "
+        f"added in {args.batches} batches in {build_s:.2f}s"
+    )
+
+    picks = rng.integers(args.size, size=args.queries)
+    queries = vectors[picks] + args.spread * rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    exact_ms, truth = run(store, queries, args.k, exact=True)
+
+    print(f"{'mode':>10} {'ms/query':>10} {'speedup':>8} {'recall@k':>9}")
+    print(f"{'exact':>10} {exact_ms:>10.3f} {1.0:>8.1f} {1.0:>9.3f}")
+    for nprobe in args.nprobe:
+        index.nprobe = nprobe
+        ann_ms, found = run(store, queries, args.k, exact=False)
+        recall = np.mean([len(a & b) / args.k for a, b in zip(found, truth)])
+        print(f"{f'nprobe={nprobe}':>10} {ann_ms:>10.3f} {exact_ms / ann_ms:>8.1f} {recall:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Context packing: exact token counts and a knapsack packer vs the chars/4 estimate.
+
+The repository's Markdown files are split into chunks as DocumentProcessor
+does (1000 characters, 200 overlap) and added to a store, which records
+each chunk's token count. For --chats simulated chats, k chunks with
+decreasing relevance scores are packed into a token budget three ways:
+
+  legacy  the previous get_context: len(text) // 4 per chunk, the chunk
+          that overflows is cut to the remaining characters + "..."
+  packed  pack_context on the counts recorded at ingestion: the set of
+          whole chunks with the highest total score that fits, in rank order
+  counted the same, without recorded counts (chunks tokenized per chat)
+
+Reported: packing time per chat, the real token count of the
+context, how often it exceeds the budget, how much budget is left
+unused, and the relevance of the chunks included (a cut chunk counts
+pro rata). Tokens are counted with o200k_base if tiktoken can load it;
+offline, a BPE vocabulary built from the corpus stands in for it.
+
+Usage: python benchmarks/bench_context_packing.py [--chats 2000] [--budgets 500,1000,1500] [--ks 4,8]
+"""
+import argparse
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from langchain_core.documents import Document  # noqa: E402
+
+from bench_upsert import HashEmbeddings  # noqa: E402
+from rag.context_packing import CONTEXT_SEPARATOR, pack_context  # noqa: E402
+from rag.text_splitter import RecursiveTextSplitter  # noqa: E402
+from rag.tokenizer import Tokenizer, get_tokenizer  # noqa: E402
+from rag.vector_store import InMemoryVectorStore, RAGRetriever  # noqa: E402
+
+# o200k_base's pre-tokenization, simplified.
+PATTERN = r"""'s|'t|'re|'ve|'m|'ll|'d| ?\p{L}+| ?\p{N}{1,3}| ?[^\s\p{L}\p{N}]+|\s+(?!\S)|\s+"""
+
+
+def corpus_tokenizer(texts, vocabulary: int) -> Tokenizer:
+    """A tiktoken BPE whose merges spell the corpus's most frequent pieces."""
+    import regex
+    import tiktoken
+
+    pieces = Counter(piece.encode("utf-8") for text in texts for piece in regex.findall(PATTERN, text))
+    ranks = {bytes([i]): i for i in range(256)}
+    for piece, _ in pieces.most_common(vocabulary):
+        for end in range(2, len(piece) + 1):
+            ranks.setdefault(piece[:end], len(ranks))
+    return Tokenizer(tiktoken.Encoding(name="corpus-bpe", pat_str=PATTERN, mergeable_ranks=ranks, special_tokens={}))
+
+
+def legacy_context(docs, max_tokens: int):
+    """The previous get_context, returning (context, included fraction per chunk)."""
+    context_parts = []
+    fractions = []
+    current_length = 0
+    for doc in docs:
+        content = doc.page_content
+        content_tokens = len(content) // 4
+        if current_length + content_tokens > max_tokens:
+            remaining_chars = (max_tokens - current_length) * 4
+            context_parts.append(content[:remaining_chars] + "...")
+            fractions.append(min(1.0, max(0, remaining_chars) / max(len(content), 1)))
+            break
+        context_parts.append(content)
+        fractions.append(1.0)
+        current_length += content_tokens
+    return CONTEXT_SEPARATOR.join(context_parts), fractions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", default=str(Path(__file__).resolve().parents[4]))
+    parser.add_argument("--chats", type=int, default=2000)
+    parser.add_argument("--budgets", default="500,1000,1500")
+    parser.add_argument("--ks", default="4,8")
+    parser.add_argument("--vocabulary", type=int, default=30_000, help="corpus BPE pieces when offline")
+    args = parser.parse_args()
+
+    texts = [path.read_text(encoding="utf-8", errors="replace") for path in sorted(Path(args.corpus).rglob("*.md"))]
+    splitter = RecursiveTextSplitter(chunk_size=1000, chunk_overlap=200)
+    chunks = [Document(page_content=chunk) for text in texts for chunk in splitter.split_text(text)]
+    tokenizer = get_tokenizer("gpt-5")
+    if not tokenizer.exact:
+        tokenizer = corpus_tokenizer(texts, args.vocabulary)
+
+    store = InMemoryVectorStore(embeddings=HashEmbeddings(64), deduplicate=False, tokenizer=tokenizer)
+    start = time.perf_counter()
+    store.add_embeddings(chunks, store.embedding_model.embed_documents([doc.page_content for doc in chunks]))
+    embed_and_count = time.perf_counter() - start
+    # The stored copies, as searches return them.
+    chunks = list(store.documents)
+    counts = np.array(store.token_counts(chunks))
+    chars = np.array([len(doc.page_content) for doc in chunks])
+    print(f"{len(chunks)} chunks from {len(texts)} Markdown files, tokens counted with {tokenizer.name}; "
+          f"{chars.sum() / counts.sum():.2f} characters per token (chars/4 assumes 4.00), "
+          f"add_embeddings incl. counting {embed_and_count / len(chunks) * 1e6:.0f}us per chunk")
+
+    rng = np.random.default_rng(0)
+    print(f"{'budget':>6} {'k':>2} {'packer':>7} {'us/chat':>8} {'tokens':>7} {'over %':>7} {'unused':>7} "
+          f"{'relevance':>10}")
+    for budget in map(int, args.budgets.split(",")):
+        for k in map(int, args.ks.split(",")):
+            chats = [
+                (rng.choice(len(chunks), size=k, replace=False), np.sort(rng.uniform(0.3, 0.9, size=k))[::-1])
+                for _ in range(args.chats)
+            ]
+            rows = {}
+            for name in ("legacy", "packed", "counted"):
+                tokens = []
+                relevance = 0.0
+                seconds = 0.0
+                for picks, scores in chats:
+                    docs = [chunks[i] for i in picks]
+                    start = time.perf_counter()
+                    if name == "legacy":
+                        context, fractions = legacy_context(docs, budget)
+                    elif name == "packed":
+                        context = pack_context(docs, scores, budget, tokenizer, store.token_counts(docs))
+                    else:
+                        context = pack_context(docs, scores, budget, tokenizer)
+                    seconds += time.perf_counter() - start
+                    if name != "legacy":
+                        fractions = [1.0 if doc.page_content in context else 0.0 for doc in docs]
+                    tokens.append(tokenizer.count(context))
+                    relevance += float(np.dot(fractions, scores[:len(fractions)]))
+                tokens = np.array(tokens)
+                rows[name] = tokens
+                print(f"{budget:>6} {k:>2} {name:>7} {seconds / args.chats * 1e6:>8.1f} {tokens.mean():>7.0f} "
+                      f"{np.mean(tokens > budget) * 100:>7.1f} {np.maximum(budget - tokens, 0).mean():>7.0f} "
+                      f"{relevance / args.chats:>10.3f}")
+            saved = rows["legacy"].mean() - rows["packed"].mean()
+            print(f"{'':>6} {'':>2} prompt tokens saved per chat by packing: {saved:.0f} "
+                  f"({saved / rows['legacy'].mean() * 100:.1f}%)")
+
+    # End to end through RAGRetriever: the joined context must fit the budget.
+    retriever = RAGRetriever(store, min_score=-1.0)
+    over = 0
+    for i in rng.choice(len(chunks), size=min(200, len(chunks)), replace=False):
+        context = retriever.get_context(chunks[i].page_content[:200], max_tokens=1500, k=8)
+        over += tokenizer.count(context) > 1500
+    print(f"get_context(max_tokens=1500, k=8) over budget: {over}/{min(200, len(chunks))}")
+    if over:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Chunks skipped and embedding work avoided by ingestion-time deduplication.
+
+A synthetic file of --chunks chunks is uploaded, then uploaded again, then a
+lightly edited copy (different page header, collapsed whitespace and one word
+changed per chunk) is uploaded. Each store counts the chunks its embedder is
+asked for; the dedup overhead is timed separately.
+
+Usage: python benchmarks/bench_dedup.py [--chunks 5000]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from langchain_core.documents import Document  # noqa: E402
+
+from bench_vector_search import RandomQueryEmbeddings  # noqa: E402
+from rag.dedup import ChunkDeduplicator  # noqa: E402
+from rag.vector_store import InMemoryVectorStore  # noqa: E402
+
+
+class CountingEmbeddings(RandomQueryEmbeddings):
+    """Random embeddings that count how many chunks were embedded."""
+
+    def __init__(self, dim: int):
+        super().__init__(dim)
+        self.embedded = 0
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+
+def make_chunks(count: int, rng: random.Random):
+    """Chunks of ~150 random words with a page header."""
+    vocabulary = [f"word{i}" for i in range(5000)]
+    return [
+        f"Report 2024 - page {i}\n" + " ".join(rng.choices(vocabulary, k=150))
+        for i in range(count)
+    ]
+
+
+def edit(text: str, rng: random.Random) -> str:
+    """A near-duplicate: new header, collapsed whitespace, one word replaced."""
+    header, body = text.split("\n", 1)
+    words = body.split()
+    words[rng.randrange(len(words))] = "edited"
+    return header.replace("Report 2024", "REPORT (rev. 2)") + "\n" + "  ".join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=128)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    texts = make_chunks(args.chunks, rng)
+    first = [Document(page_content=text) for text in texts]
+    edited = [Document(page_content=edit(text, rng)) for text in texts]
+    uploads = [("upload", first), ("same file again", first), ("edited copy", edited)]
+
+    print(f"{args.chunks} chunks per upload")
+    print(f"{'mode':>8} {'stored':>8} {'embedded':>9} {'exact skip':>11} {'near skip':>10} {'dedup ms/chunk':>15}")
+    for mode, options in (
+        ("off", {"deduplicate": False}),
+        ("exact", {}),
+        ("near", {"near_duplicates": True}),
+    ):
+        embeddings = CountingEmbeddings(args.dim)
+        store = InMemoryVectorStore(embeddings=embeddings, **options)
+        for _, documents in uploads:
+            store.add_documents(documents)
+
+        # Filtering cost alone, on a fresh deduplicator with the same settings.
+        dedup_ms = 0.0
+        if store.deduplicator is not None:
+            deduplicator = ChunkDeduplicator(near_duplicates=store.deduplicator.near_duplicates)
+            start = time.perf_counter()
+            for _, documents in uploads:
+                deduplicator.filter(documents)
+            dedup_ms = (time.perf_counter() - start) / (len(uploads) * args.chunks) * 1000
+        stats = store.deduplicator.stats() if store.deduplicator else {"exact_duplicates": 0, "near_duplicates": 0}
+        print(
+            f"{mode:>8} {len(store):>8} {embeddings.embedded:>9} {stats['exact_duplicates']:>11} "
+            f"{stats['near_duplicates']:>10} {dedup_ms:>15.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Ingestion time with and without the content-addressed EmbeddingCache.
+
+The embedder is a local stand-in that sleeps to simulate API latency (a fixed
+cost per request plus a cost per chunk) and derives vectors from a hash of the
+text, so no API calls are made. Scenarios: a cold upload, re-uploading the same
+file (memory tier), re-uploading after a restart (SQLite tier only) and an
+upload that overlaps the first one by half.
+
+Usage: python benchmarks/bench_embedding_cache.py [--chunks 2000] [--dim 1536]
+"""
+import argparse
+import hashlib
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from langchain_core.documents import Document  # noqa: E402
+from langchain_core.embeddings import Embeddings  # noqa: E402
+
+from rag.embedding_cache import EmbeddingCache  # noqa: E402
+from rag.vector_store import InMemoryVectorStore  # noqa: E402
+
+
+class SlowHashEmbeddings(Embeddings):
+    """Deterministic embeddings with simulated request latency."""
+
+    model = "fake-embedding-model"
+
+    def __init__(self, dim: int, request_ms: float, chunk_ms: float, batch_size: int = 1000):
+        self.dim = dim
+        self.request_ms = request_ms
+        self.chunk_ms = chunk_ms
+        self.batch_size = batch_size
+
+    def _embed(self, text: str):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        return np.random.default_rng(seed).standard_normal(self.dim, dtype=np.float32).tolist()
+
+    def embed_documents(self, texts):
+        requests = -(-len(texts) // self.batch_size)
+        time.sleep((requests * self.request_ms + len(texts) * self.chunk_ms) / 1000)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def ingest(store, documents):
+    """Seconds to add ``documents`` to ``store``."""
+    start = time.perf_counter()
+    store.add_documents(documents)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--request-ms", type=float, default=300.0)
+    parser.add_argument("--chunk-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    embeddings = SlowHashEmbeddings(args.dim, args.request_ms, args.chunk_ms)
+    first = [Document(page_content=f"chunk {i} " + "lorem ipsum " * 80) for i in range(args.chunks)]
+    half = args.chunks // 2
+    overlapping = first[half:] + [
+        Document(page_content=f"other chunk {i} " + "lorem ipsum " * 80) for i in range(half)
+    ]
+
+    print(f"{args.chunks} chunks, dim={args.dim}, {args.request_ms:.0f}ms/request + {args.chunk_ms}ms/chunk")
+    print(f"{'scenario':>22} {'no cache s':>11} {'cache s':>8} {'hits':>6} {'misses':>7} {'saved s':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = str(Path(directory) / "cache.sqlite3")
+        cache = EmbeddingCache(path)
+        uncached = InMemoryVectorStore(embeddings=embeddings)
+        cached = InMemoryVectorStore(embeddings=embeddings, embedding_cache=cache)
+
+        def report(name, documents, store):
+            baseline = ingest(uncached, documents)
+            cache.reset_stats()
+            elapsed = ingest(store, documents)
+            stats = store.embedding_cache.stats()
+            hits = stats["memory_hits"] + stats["disk_hits"]
+            print(
+                f"{name:>22} {baseline:>11.2f} {elapsed:>8.2f} {hits:>6} "
+                f"{stats['misses']:>7} {stats['seconds_saved']:>8.2f}"
+            )
+
+        report("cold upload", first, cached)
+        report("re-upload (memory)", first, cached)
+        cache.close()
+
+        # A fresh cache object on the same file: what a restarted app sees.
+        # It carries over the timing average only so "saved s" can be priced.
+        restarted = EmbeddingCache(path)
+        restarted.record_embedding(cache.embedded, cache.embed_seconds)
+        cache = restarted
+        report("re-upload (SQLite)", first, InMemoryVectorStore(embeddings=embeddings, embedding_cache=cache))
+        report("50% overlap", overlapping, InMemoryVectorStore(embeddings=embeddings, embedding_cache=cache))
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Embedding throughput of EmbeddingPipeline against a fake local embedding server.
+
+Starts an OpenAI-compatible /v1/embeddings server that sleeps per request
+(fixed latency plus a cost per token) and enforces a token-per-second budget
+with a token bucket, answering 429 with retry-after-ms when it is exceeded.
+OpenAIEmbeddings talks to it over HTTP exactly as it would to the real API.
+The baseline is the previous behaviour: one embed_documents call for the
+whole upload, which LangChain sends as sequential 1000-text requests.
+
+Usage: python benchmarks/bench_embedding_pipeline.py [--chunks 4000] [--workers 1 4 8 16]
+"""
+import argparse
+import base64
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from langchain_openai import OpenAIEmbeddings  # noqa: E402
+
+from rag.embedding_pipeline import EmbeddingPipeline, estimate_tokens  # noqa: E402
+
+
+class TokenBucket:
+    """Allows ``rate`` tokens per second, with one second of burst."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.level = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.rejected = 0
+
+    def take(self, tokens: int) -> float:
+        """Consume tokens; return 0, or the seconds to wait if over budget."""
+        with self.lock:
+            now = time.monotonic()
+            self.level = min(self.rate, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+            if tokens <= self.level:
+                self.level -= tokens
+                return 0.0
+            self.rejected += 1
+            return (tokens - self.level) / self.rate
+
+
+def make_handler(dim: int, latency: float, token_latency: float, bucket: TokenBucket):
+    vector = np.random.default_rng(0).standard_normal(dim, dtype=np.float32)
+    encoded = base64.b64encode(vector.tobytes()).decode()
+
+    class FakeEmbeddingServer(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            texts = request["input"]
+            tokens = sum(estimate_tokens(text) for text in texts)
+            wait = bucket.take(tokens)
+            if wait:
+                self._send(429, {"error": {"message": "Rate limit reached", "type": "requests"}},
+                           {"retry-after-ms": str(int(wait * 1000) + 1)})
+                return
+            time.sleep(latency + tokens * token_latency)
+            embedding = encoded if request.get("encoding_format") == "base64" else vector.tolist()
+            self._send(200, {
+                "object": "list",
+                "model": request["model"],
+                "data": [{"object": "embedding", "index": i, "embedding": embedding} for i in range(len(texts))],
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+            })
+
+        def _send(self, status, payload, headers=None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return FakeEmbeddingServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=4000)
+    parser.add_argument("--chunk-chars", type=int, default=1000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per request")
+    parser.add_argument("--token-latency", type=float, default=2e-6, help="seconds per token")
+    parser.add_argument("--tokens-per-second", type=float, default=300_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--batch-tokens", type=int, default=20_000)
+    args = parser.parse_args()
+
+    bucket = TokenBucket(args.tokens_per_second)
+    ThreadingHTTPServer.request_queue_size = 256
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.dim, args.latency, args.token_latency, bucket))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def client(max_retries: int) -> OpenAIEmbeddings:
+        return OpenAIEmbeddings(
+            model="text-embedding-3-small",
+            base_url=f"http://127.0.0.1:{server.server_port}/v1",
+            api_key="benchmark",
+            check_embedding_ctx_length=False,
+            max_retries=max_retries,
+        )
+
+    texts = [f"chunk {i} " + "x" * args.chunk_chars for i in range(args.chunks)]
+    print(
+        f"{args.chunks} chunks of {args.chunk_chars} chars, {args.latency * 1000:.0f} ms/request, "
+        f"{args.tokens_per_second:.0f} tokens/s limit"
+    )
+    print(f"{'mode':>20} {'seconds':>8} {'chunks/s':>9} {'requests':>9} {'429s':>6}")
+
+    # Previous behaviour: a single call, with the OpenAI client's own retries.
+    time.sleep(1)
+    bucket.rejected = 0
+    start = time.perf_counter()
+    client(max_retries=6).embed_documents(texts)
+    elapsed = time.perf_counter() - start
+    print(f"{'single call':>20} {elapsed:>8.2f} {args.chunks / elapsed:>9.0f} {'-':>9} {bucket.rejected:>6}")
+
+    for workers in args.workers:
+        time.sleep(1)  # let the bucket refill between runs
+        bucket.rejected = 0
+        pipeline = EmbeddingPipeline(client(max_retries=0), workers=workers, max_batch_tokens=args.batch_tokens)
+        start = time.perf_counter()
+        vectors = pipeline.embed(texts)
+        elapsed = time.perf_counter() - start
+        assert len(vectors) == len(texts)
+        print(
+            f"{f'pipeline x{workers}':>20} {elapsed:>8.2f} {args.chunks / elapsed:>9.0f} "
+            f"{pipeline.requests:>9} {bucket.rejected:>6}"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Metadata-filtered search: pre-filtering with the store's inverted indexes vs post-filtering.
+
+Builds a store of --size clustered embeddings (as in bench_ann) whose metadata has a "source"
+(--sources files), a skewed "type" and a "page", then runs filters of
+decreasing selectivity three ways:
+
+  post      search top-k, then drop non-matching results (what callers could
+            do before): fast, but returns fewer than k results
+  post-all  search ever larger top-k until k results match (or the search
+            returns fewer than asked for, as IVF does past its candidates)
+  filter    similarity_search_by_vector_with_score(filter=...): a row mask
+            from the metadata index, applied before scoring
+
+Exact top-k of the matching rows is computed by brute force to check that
+the filtered search returns them (recall@k; 1.0 for exact search, and for
+selective filters with --ann, which are scored exactly).
+
+Usage: python benchmarks/bench_filter.py [--size 200000] [--dim 128] [--ann]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from langchain_core.documents import Document  # noqa: E402
+
+from bench_ann import clustered_vectors  # noqa: E402
+from bench_vector_search import RandomQueryEmbeddings  # noqa: E402
+from rag.ivf_index import IVFIndex  # noqa: E402
+from rag.vector_store import InMemoryVectorStore, normalize_rows  # noqa: E402
+
+TYPES = ["pdf", "text", "docx"]
+
+
+def post_filter(store, vector, k: int, matches, fetch: int):
+    """Top-k among matching results of a ``fetch``-sized unfiltered search, and whether it ran out."""
+    results = store.similarity_search_by_vector_with_score(vector, fetch)
+    return [(doc, score) for doc, score in results if matches(doc.metadata)][:k], len(results) < fetch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--sources", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--clusters", type=int, default=1000)
+    parser.add_argument("--ann", action="store_true", help="search with an IVF index")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    sources = rng.integers(args.sources, size=args.size)
+    types = rng.choice(len(TYPES), size=args.size, p=[0.8, 0.15, 0.05])
+    pages = rng.integers(50, size=args.size)
+    documents = [
+        Document(
+            page_content=f"chunk {i}",
+            metadata={"source": f"file_{sources[i]}.pdf", "type": TYPES[types[i]], "page": int(pages[i])},
+        )
+        for i in range(args.size)
+    ]
+    vectors = normalize_rows(clustered_vectors(rng, args.size, args.dim, args.clusters, spread=1.0))
+    store = InMemoryVectorStore(embeddings=RandomQueryEmbeddings(args.dim), ann_index=IVFIndex() if args.ann else None)
+    store.add_embeddings(documents, vectors)
+
+    start = time.perf_counter()
+    store.similarity_search_by_vector_with_score(vectors[0], 1, filter={"source": "", "type": "", "page": 0})
+    print(f"{args.size} chunks, dim={args.dim}, k={args.k}, {'IVF' if args.ann else 'exact'} search; "
+          f"metadata indexed in {time.perf_counter() - start:.2f}s on first use")
+
+    filters = [
+        {"type": "pdf"},
+        {"type": "docx"},
+        {"source": [f"file_{i}.pdf" for i in range(10)]},
+        {"type": "text", "page": [0, 1, 2]},
+        {"source": "file_7.pdf"},
+    ]
+    picks = rng.integers(args.size, size=args.queries)
+    queries = normalize_rows(vectors[picks] + 0.1 * rng.standard_normal((args.queries, args.dim), dtype=np.float32))
+    print(f"{'filter':>42} {'match %':>8} {'search ms':>10} {'post ms':>8} {'post hits':>10} "
+          f"{'post-all ms':>12} {'filter ms':>10} {'recall':>7}")
+    failed = False
+    for metadata_filter in filters:
+        accepted = {field: value if isinstance(value, list) else [value] for field, value in metadata_filter.items()}
+
+        def matches(metadata):
+            return all(metadata[field] in values for field, values in accepted.items())
+
+        matching = np.flatnonzero([matches(doc.metadata) for doc in documents])
+        timings = {"search": 0.0, "post": 0.0, "post-all": 0.0, "filter": 0.0}
+        post_hits = recall = 0
+        for vector in queries:
+            start = time.perf_counter()
+            store.similarity_search_by_vector_with_score(vector, args.k)
+            timings["search"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            post_hits += len(post_filter(store, vector, args.k, matches, args.k)[0])
+            timings["post"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            fetch = args.k
+            while True:
+                results, exhausted = post_filter(store, vector, args.k, matches, fetch)
+                if len(results) == args.k or exhausted:
+                    break
+                fetch *= 2
+            timings["post-all"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            results = store.similarity_search_by_vector_with_score(vector, args.k, filter=metadata_filter)
+            timings["filter"] += time.perf_counter() - start
+
+            if not all(matches(doc.metadata) for doc, _ in results):
+                failed = True
+            scores = vectors[matching] @ vector
+            truth = {f"chunk {matching[i]}" for i in np.argsort(-scores)[:args.k]}
+            recall += len(truth & {doc.page_content for doc, _ in results}) / len(truth)
+
+        ms = {name: total / args.queries * 1000 for name, total in timings.items()}
+        print(
+            f"{str(metadata_filter)[:42]:>42} {len(matching) / args.size * 100:>8.2f} {ms['search']:>10.2f} "
+            f"{ms['post']:>8.2f} {post_hits / args.queries:>7.1f}/{args.k:<2} {ms['post-all']:>12.2f} "
+            f"{ms['filter']:>10.2f} {recall / args.queries:>7.3f}"
+        )
+    if failed:
+        print("FAIL: a filtered search returned a non-matching document")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
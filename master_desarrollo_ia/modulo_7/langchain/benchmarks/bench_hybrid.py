@@ -0,0 +1,162 @@
+"""
+Dense vs BM25 vs hybrid (reciprocal-rank fusion) retrieval on a synthetic corpus.
+
+Chunks are --words words drawn from a Zipf-like vocabulary plus a unique
+identifier ("ref" + number). The embedding of a text is the sum of one
+random vector per concept, where words come in synonym pairs sharing a
+concept, and identifiers are not embedded at all: like a real embedding
+model, it matches meaning but not exact codes. Two query sets target one
+chunk each:
+
+  identifier  the chunk's identifier plus two of its words
+  paraphrase  eight of the chunk's words, each replaced by its synonym
+
+Reported per mode: recall@k (the target chunk is in the top k) and
+retrieval latency. BM25 scores are checked against a plain-Python BM25 on
+the live chunks after removing a source and compacting.
+
+Usage: python benchmarks/bench_hybrid.py [--size 50000] [--words 60] [--k 4]
+"""
+import argparse
+import math
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from langchain_core.documents import Document  # noqa: E402
+from langchain_core.embeddings import Embeddings  # noqa: E402
+
+from rag.bm25_index import BM25Index, tokenize  # noqa: E402
+from rag.vector_store import InMemoryVectorStore, RAGRetriever  # noqa: E402
+
+
+class ConceptEmbeddings(Embeddings):
+    """Sum of concept vectors; word ``w{i}`` has concept i // 2, other tokens none."""
+
+    def __init__(self, vocabulary: int, dim: int, rng: np.random.Generator):
+        self.concepts = rng.standard_normal((vocabulary // 2, dim), dtype=np.float32)
+
+    def embed_ids(self, word_ids: np.ndarray) -> np.ndarray:
+        """Embeddings of texts given as rows of word ids."""
+        return self.concepts[word_ids // 2].sum(axis=1)
+
+    def _embed(self, text: str) -> np.ndarray:
+        ids = [int(token[1:]) for token in tokenize(text) if token[0] == "w" and token[1:].isdigit()]
+        return self.concepts[np.array(ids, dtype=np.int64) // 2].sum(axis=0)
+
+    def embed_documents(self, texts):
+        return np.array([self._embed(text) for text in texts])
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def reference_bm25(texts, query: str, k1: float = 1.5, b: float = 0.75) -> np.ndarray:
+    """BM25 scores of ``texts`` for ``query``, computed directly from the definition."""
+    documents = [Counter(tokenize(text)) for text in texts]
+    lengths = [sum(counts.values()) for counts in documents]
+    average = sum(lengths) / len(documents)
+    scores = np.zeros(len(documents))
+    for term in set(tokenize(query)):
+        df = sum(term in counts for counts in documents)
+        idf = math.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+        for i, counts in enumerate(documents):
+            tf = counts.get(term, 0)
+            scores[i] += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths[i] / average)) if tf else 0.0
+    return scores
+
+
+def check_bm25(texts, queries, k: int) -> bool:
+    """Whether keyword search matches the reference after a removal and a compaction."""
+    store = InMemoryVectorStore(embeddings=ConceptEmbeddings(2, 4, np.random.default_rng(0)),
+                                deduplicate=False, keyword_index=BM25Index())
+    documents = [Document(page_content=text, metadata={"source": f"file_{i % 10}"}) for i, text in enumerate(texts)]
+    store.add_embeddings(documents, np.ones((len(documents), 4), dtype=np.float32))
+    store.remove_source("file_3")
+    store.compact()
+    live = [doc.page_content for doc in documents if doc.metadata["source"] != "file_3"]
+    row = {text: i for i, text in enumerate(live)}
+    for query in queries:
+        expected = reference_bm25(live, query)
+        best = np.sort(expected[expected > 0])[::-1][:k]
+        got = store.keyword_search_with_score(query, k)
+        # Compared by score, since tied chunks may come in either order.
+        if any(doc.page_content not in row for doc, _ in got) or len(got) != len(best):
+            return False
+        scores = np.array([score for _, score in got])
+        if not np.allclose(scores, best, rtol=1e-4):
+            return False
+        if not np.allclose(scores, [expected[row[doc.page_content]] for doc, _ in got], rtol=1e-4):
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=50_000)
+    parser.add_argument("--words", type=int, default=60)
+    parser.add_argument("--vocabulary", type=int, default=20_000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    weights = 1.0 / (np.arange(args.vocabulary) + 10.0)
+    word_ids = rng.choice(args.vocabulary, size=(args.size, args.words), p=weights / weights.sum())
+    texts = [f"ref{i:07d} " + " ".join(f"w{w}" for w in row) for i, row in enumerate(word_ids)]
+    embeddings = ConceptEmbeddings(args.vocabulary, args.dim, rng)
+
+    store = InMemoryVectorStore(embeddings=embeddings, deduplicate=False, keyword_index=BM25Index())
+    plain = InMemoryVectorStore(embeddings=embeddings, deduplicate=False)
+    indexing = {"with BM25": 0.0, "without": 0.0}
+    for start in range(0, args.size, args.batch_size):
+        batch = slice(start, start + args.batch_size)
+        vectors = embeddings.embed_ids(word_ids[batch])
+        for name, target in (("with BM25", store), ("without", plain)):
+            documents = [Document(page_content=text) for text in texts[batch]]
+            begin = time.perf_counter()
+            target.add_embeddings(documents, vectors)
+            indexing[name] += time.perf_counter() - begin
+    print(f"{args.size} chunks of {args.words} words, dim={args.dim}, k={args.k}; add_embeddings in batches "
+          f"of {args.batch_size}: {indexing['without']:.2f}s, {indexing['with BM25']:.2f}s with BM25 indexing")
+
+    targets = rng.choice(args.size, size=args.queries, replace=False)
+    query_sets = {
+        "identifier": [
+            f"ref{t:07d} " + " ".join(f"w{w}" for w in rng.choice(word_ids[t], 2, replace=False))
+            for t in targets
+        ],
+        "paraphrase": [
+            " ".join(f"w{w ^ 1}" for w in rng.choice(word_ids[t], 8, replace=False))
+            for t in targets
+        ],
+    }
+    retriever = RAGRetriever(store)
+    print(f"{'mode':>8} {'queries':>11} {f'recall@{args.k}':>9} {'ms/query':>9}")
+    for mode in RAGRetriever.MODES:
+        for name, queries in query_sets.items():
+            hits = 0
+            start = time.perf_counter()
+            for target, query in zip(targets, queries):
+                results = retriever.retrieve(query, k=args.k, mode=mode)
+                hits += texts[target] in {doc.page_content for doc in results}
+            ms = (time.perf_counter() - start) / len(queries) * 1000
+            print(f"{mode:>8} {name:>11} {hits / len(queries):>9.3f} {ms:>9.2f}")
+
+    check_size = min(args.size, 2000)
+    check_queries = query_sets["identifier"][:10] + query_sets["paraphrase"][:10]
+    ok = check_bm25(texts[:check_size], check_queries, args.k)
+    print(f"BM25 matches a reference implementation on {check_size} chunks after remove + compact: {ok}")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
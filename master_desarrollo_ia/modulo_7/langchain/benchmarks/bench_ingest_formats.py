@@ -0,0 +1,142 @@
+"""
+Ingestion throughput and peak memory of DocumentProcessor per file format.
+
+Writes the same random-word text, in paragraphs, as .txt, .md and .docx
+files of about --megabytes MB of text, plus a synthetic PDF of similar text
+size, then loads and splits each one in a fresh process
+(DocumentProcessor.load_document, no embedding) and reports text throughput
+and that process's peak RSS above its baseline after imports. For
+reference, the text file is also loaded the way LangChain does it: a
+whole-file TextLoader read followed by RecursiveCharacterTextSplitter.
+
+Usage: python benchmarks/bench_ingest_formats.py [--megabytes 20]
+"""
+import argparse
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from bench_streaming_ingest import write_pdf  # noqa: E402
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    "</Types>"
+)
+RELATIONSHIPS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="word/document.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+    "</Relationships>"
+)
+
+
+def paragraphs(megabytes: float, seed: int = 0):
+    """Random-word paragraphs totalling about ``megabytes`` MB of text."""
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(5000)]
+    remaining = int(megabytes * 2**20)
+    while remaining > 0:
+        paragraph = " ".join(rng.choices(vocabulary, k=rng.randint(20, 200)))
+        remaining -= len(paragraph) + 2
+        yield paragraph
+
+
+def write_text(path: str, megabytes: float) -> None:
+    """Write paragraphs separated by blank lines."""
+    with open(path, "w", encoding="utf-8") as f:
+        for paragraph in paragraphs(megabytes):
+            f.write(paragraph + "\n\n")
+
+
+def write_docx(path: str, megabytes: float) -> None:
+    """Write a minimal DOCX with one Word paragraph per text paragraph."""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", CONTENT_TYPES)
+        archive.writestr("_rels/.rels", RELATIONSHIPS)
+        with archive.open("word/document.xml", "w", force_zip64=True) as xml:
+            xml.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+            )
+            for paragraph in paragraphs(megabytes):
+                xml.write(f"<w:p><w:r><w:t>{escape(paragraph)}</w:t></w:r></w:p>".encode("utf-8"))
+            xml.write(b"</w:body></w:document>")
+
+
+def child(mode: str, path: str) -> None:
+    """Load and split ``path`` in this process and print a JSON report."""
+    from langchain_community.document_loaders import TextLoader
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    from rag.document_processor import DocumentProcessor
+
+    processor = DocumentProcessor()
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == "langchain":
+        splitter = RecursiveCharacterTextSplitter(chunk_size=processor.chunk_size, chunk_overlap=processor.chunk_overlap)
+        chunks = splitter.split_documents(TextLoader(path, encoding="utf-8").load())
+    else:
+        chunks = processor.load_document(path)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "chunks": len(chunks),
+        "text_mb": sum(len(chunk.page_content) for chunk in chunks) / 2**20,
+        "seconds": elapsed,
+        "peak_mb": (peak - baseline) / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--megabytes", type=float, default=20)
+    parser.add_argument("--pdf-pages", type=int, default=None, help="defaults to about --megabytes of text")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        files = {}
+        for extension in (".txt", ".md"):
+            files[extension] = str(Path(directory) / f"document{extension}")
+            write_text(files[extension], args.megabytes)
+        files[".docx"] = str(Path(directory) / "document.docx")
+        write_docx(files[".docx"], args.megabytes)
+        files[".pdf"] = str(Path(directory) / "document.pdf")
+        write_pdf(files[".pdf"], args.pdf_pages or int(args.megabytes * 2**20 / 3000))
+
+        runs = [(extension, "processor", path) for extension, path in files.items()]
+        runs.insert(1, (".txt", "langchain", files[".txt"]))
+        print(f"{'format':>6} {'loader':>10} {'file MB':>8} {'chunks':>7} {'seconds':>8} {'text MB/s':>10} {'peak MB':>8}")
+        for extension, mode, path in runs:
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", mode, path], check=True, capture_output=True, text=True
+            ).stdout
+            report = json.loads(output.splitlines()[-1])
+            print(
+                f"{extension:>6} {mode:>10} {Path(path).stat().st_size / 2**20:>8.1f} {report['chunks']:>7} "
+                f"{report['seconds']:>8.2f} {report['text_mb'] / report['seconds']:>10.1f} {report['peak_mb']:>8.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Multi-file PDF loading: serial load_document loop vs load_documents in a process pool.
+
+Copies the sample report from docs/ (or --pdf) --files times into a temporary
+directory and adds one corrupt PDF, which every mode must skip without
+aborting. Reports total time and the time until the first file's chunks are
+available. Speedup is bounded by the number of CPU cores; worker start-up is
+timed separately since the pool is kept between calls.
+
+Usage: python benchmarks/bench_load_documents.py [--files 16] [--workers 1 2 4]
+"""
+import argparse
+import multiprocessing
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from rag.document_processor import DocumentProcessor  # noqa: E402
+
+SAMPLE_PDF = Path(__file__).parent.parent / "docs" / "Arduino Open Source Report 2024 (3).pdf"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pdf", default=str(SAMPLE_PDF))
+    parser.add_argument("--files", type=int, default=16)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i in range(args.files):
+            paths.append(str(Path(directory) / f"report_{i}.pdf"))
+            shutil.copyfile(args.pdf, paths[-1])
+        broken = Path(directory) / "broken.pdf"
+        broken.write_bytes(b"%PDF-1.4 not really a pdf")
+        paths.insert(len(paths) // 2, str(broken))
+
+        print(f"{args.files} PDFs + 1 corrupt file, {multiprocessing.cpu_count()} CPU(s)")
+        print(f"{'mode':>14} {'startup s':>10} {'first s':>8} {'total s':>8} {'files/s':>8} {'chunks':>7} {'failed':>7}")
+
+        processor = DocumentProcessor()
+        start = time.perf_counter()
+        chunks = failed = 0
+        first = None
+        for path in paths:
+            try:
+                chunks += len(processor.load_document(path))
+            except Exception:
+                failed += 1
+            first = first or time.perf_counter() - start
+        total = time.perf_counter() - start
+        print(f"{'serial loop':>14} {0:>10.2f} {first:>8.2f} {total:>8.2f} {args.files / total:>8.2f} {chunks:>7} {failed:>7}")
+
+        for workers in args.workers:
+            processor = DocumentProcessor(workers=workers, min_parallel_bytes=0)
+            # Warm the pool so worker start-up is reported on its own.
+            start = time.perf_counter()
+            list(processor.load_documents(paths[:workers]))
+            startup = time.perf_counter() - start
+
+            start = time.perf_counter()
+            chunks = failed = 0
+            first = None
+            for _, documents, error in processor.load_documents(paths):
+                chunks += len(documents)
+                failed += error is not None
+                first = first or time.perf_counter() - start
+            total = time.perf_counter() - start
+            processor.close()
+            print(
+                f"{f'{workers} worker(s)':>14} {startup:>10.2f} {first:>8.2f} {total:>8.2f} "
+                f"{args.files / total:>8.2f} {chunks:>7} {failed:>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
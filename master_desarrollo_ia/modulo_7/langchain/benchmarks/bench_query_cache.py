@@ -0,0 +1,133 @@
+"""
+Replay a skewed query log through RAGRetriever with and without a QueryCache.
+
+A store of --size chunks is queried --requests times with questions drawn
+from --distinct ones with Zipf-like frequencies (a few questions asked by
+many users), spread over --hours of simulated time. Every --update-every
+requests one file is re-ingested with upsert_source, which bumps the
+store version and so invalidates cached results (not cached embeddings).
+
+Query embeddings are deterministic per text and sleep --latency-ms to
+stand in for the embedding API round trip. Reported per run: time per
+request, embedding calls, and the cache hit rates; cached results are
+checked against an uncached retriever on the same store.
+
+Usage: python benchmarks/bench_query_cache.py [--size 50000] [--requests 5000] [--mode hybrid]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from bench_upsert import HashEmbeddings, file_chunks  # noqa: E402
+from rag.bm25_index import BM25Index  # noqa: E402
+from rag.query_cache import QueryCache  # noqa: E402
+from rag.vector_store import InMemoryVectorStore, RAGRetriever  # noqa: E402
+
+
+class RemoteHashEmbeddings(HashEmbeddings):
+    """HashEmbeddings whose queries take a simulated network round trip."""
+
+    def __init__(self, dim: int, latency: float):
+        super().__init__(dim)
+        self.latency = latency
+        self.query_calls = 0
+
+    def embed_query(self, text):
+        self.query_calls += 1
+        time.sleep(self.latency)
+        return super().embed_query(text)
+
+
+def build_store(args, files):
+    """A store holding every file's chunks."""
+    embeddings = RemoteHashEmbeddings(args.dim, args.latency_ms / 1000)
+    store = InMemoryVectorStore(embeddings=embeddings, keyword_index=BM25Index())
+    documents = [doc for source in files for doc in file_chunks(source, args.file_chunks)]
+    store.add_embeddings(documents, embeddings.embed_documents([doc.page_content for doc in documents]))
+    return store
+
+
+def replay(args, files, log, times, use_cache: bool):
+    """Run the query log, returning (seconds, embedding calls, mismatches, cache or None)."""
+    store = build_store(args, files)
+    now = [0.0]
+    cache = QueryCache(ttl=args.ttl, clock=lambda: now[0]) if use_cache else None
+    retriever = RAGRetriever(store, mode=args.mode, cache=cache)
+    reference = RAGRetriever(store, mode=args.mode)
+    embeddings = store.embedding_model
+    seconds = 0.0
+    calls = mismatches = updates = 0
+    for request, (question, at) in enumerate(zip(log, times)):
+        if request and request % args.update_every == 0:
+            updates += 1
+            source = files[updates % len(files)]
+            store.upsert_source(source, file_chunks(source, args.file_chunks, updates, args.changed))
+        now[0] = at
+        before = embeddings.query_calls
+        start = time.perf_counter()
+        docs = retriever.retrieve(question, k=args.k)
+        seconds += time.perf_counter() - start
+        calls += embeddings.query_calls - before
+        if cache is not None and request % args.check_every == 0:
+            expected = reference.retrieve(question, k=args.k)
+            mismatches += [doc.id for doc in docs] != [doc.id for doc in expected]
+    return seconds, calls, mismatches, cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=50_000)
+    parser.add_argument("--file-chunks", type=int, default=500)
+    parser.add_argument("--changed", type=int, default=50)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--mode", choices=RAGRetriever.MODES, default="hybrid")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--distinct", type=int, default=1000)
+    parser.add_argument("--zipf", type=float, default=1.0, help="skew of question frequencies")
+    parser.add_argument("--hours", type=float, default=8.0, help="simulated time the log spans")
+    parser.add_argument("--ttl", type=float, default=3600.0, help="result cache TTL in seconds")
+    parser.add_argument("--update-every", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="simulated embedding round trip")
+    parser.add_argument("--check-every", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    files = [f"file_{i}.pdf" for i in range(args.size // args.file_chunks)]
+    weights = 1.0 / np.arange(1, args.distinct + 1) ** args.zipf
+    picks = rng.choice(args.distinct, size=args.requests, p=weights / weights.sum())
+    log = [f"file_{i % len(files)}.pdf question {i}" for i in picks]
+    times = np.sort(rng.uniform(0, args.hours * 3600, size=args.requests))
+
+    print(f"{args.requests} requests ({len(set(log))} distinct questions) over {args.hours:g}h, "
+          f"{len(files) * args.file_chunks} chunks, {args.mode} retrieval, k={args.k}, result TTL {args.ttl:g}s, "
+          f"{args.latency_ms:g}ms per query embedding, a file re-ingested every {args.update_every} requests")
+    print(f"{'run':>9} {'ms/request':>11} {'embed calls':>12} {'embedding hits':>15} {'result hits':>12} "
+          f"{'invalidated':>12} {'expired':>8}")
+    failed = False
+    for name, use_cache in (("uncached", False), ("cached", True)):
+        seconds, calls, mismatches, cache = replay(args, files, log, times, use_cache)
+        row = f"{name:>9} {seconds / args.requests * 1000:>11.3f} {calls:>12}"
+        if cache is not None:
+            embedding_stats, result_stats = cache.embeddings.stats(), cache.results.stats()
+            row += (
+                f" {embedding_stats['hit_rate']:>15.1%} {result_stats['hit_rate']:>12.1%} "
+                f"{result_stats['invalidated']:>12} {result_stats['expired'] + embedding_stats['expired']:>8}"
+            )
+            failed = mismatches > 0
+            checked = (args.requests + args.check_every - 1) // args.check_every
+            print(row)
+            print(f"cached results identical to an uncached retriever: {checked - mismatches}/{checked}")
+        else:
+            print(row)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Save/load time of InMemoryVectorStore snapshots, and memory shared between processes.
+
+A store of random embeddings is saved once, then --changed chunks are
+added and as many removed and the store is saved again, which appends to
+the snapshot instead of rewriting it. The snapshot is then loaded with and
+without memory-mapping. Several worker processes then load the same snapshot and run
+a query each; with mmap the embedding pages are file-backed (RssFile) and
+shared through the page cache, instead of private (RssAnon) copies.
+Linux only (reads /proc/self/status).
+
+Usage: python benchmarks/bench_snapshot.py [--size 500000] [--dim 128] [--workers 4] [--changed 1000]
+"""
+import argparse
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from langchain_core.documents import Document  # noqa: E402
+
+from bench_vector_search import RandomQueryEmbeddings  # noqa: E402
+from rag.vector_store import InMemoryVectorStore  # noqa: E402
+
+
+def rss_mb() -> dict:
+    """Resident memory of this process split by kind, in MB."""
+    usage = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("RssAnon:", "RssFile:")):
+                name, value, _ = line.split()
+                usage[name.rstrip(":")] = int(value) / 1024
+    return usage
+
+
+def load_and_query(args):
+    """Worker: load the snapshot, run one query, report load time and memory."""
+    path, dim, mmap = args
+    before = rss_mb()
+    start = time.perf_counter()
+    store = InMemoryVectorStore.load(path, embeddings=RandomQueryEmbeddings(dim), mmap=mmap)
+    load_s = time.perf_counter() - start
+    store.similarity_search_with_score("query", k=4)
+    after = rss_mb()
+    return load_s, {name: after[name] - before[name] for name in after}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=500_000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--changed", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    embeddings = RandomQueryEmbeddings(args.dim)
+    store = InMemoryVectorStore(embeddings=embeddings)
+    store.add_embeddings(
+        [
+            Document(page_content=f"chunk {i}", metadata={"source": f"file_{i // args.changed}", "page": i})
+            for i in range(args.size)
+        ],
+        rng.standard_normal((args.size, args.dim), dtype=np.float32),
+    )
+    matrix_mb = store.vectors.nbytes / 2**20
+
+    with tempfile.TemporaryDirectory() as path:
+        start = time.perf_counter()
+        store.save(path)
+        print(f"{args.size} chunks, dim={args.dim}, matrix {matrix_mb:.0f} MB, saved in {time.perf_counter() - start:.2f}s")
+
+        # Tombstones only: no compaction before the save.
+        store.compact_threshold = 1.0
+        store.add_embeddings(
+            [Document(page_content=f"new chunk {i}", metadata={"source": "new"}) for i in range(args.changed)],
+            rng.standard_normal((args.changed, args.dim), dtype=np.float32),
+        )
+        store.remove_source("file_0")
+        start = time.perf_counter()
+        store.save(path)
+        print(f"{args.changed} chunks added and {args.changed} removed, saved again in "
+              f"{(time.perf_counter() - start) * 1000:.1f}ms")
+        del store
+
+        print(f"{'mode':>8} {'load s':>8} {'anon MB/worker':>15} {'file MB/worker':>15}")
+        context = multiprocessing.get_context("spawn")
+        for mmap in (False, True):
+            with context.Pool(args.workers) as pool:
+                results = pool.map(load_and_query, [(path, args.dim, mmap)] * args.workers)
+            load_s = np.mean([load for load, _ in results])
+            anon = np.mean([usage["RssAnon"] for _, usage in results])
+            file = np.mean([usage["RssFile"] for _, usage in results])
+            print(f"{'mmap' if mmap else 'read':>8} {load_s:>8.2f} {anon:>15.1f} {file:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Peak memory of PDF ingestion: load-everything vs the streaming page pipeline.
+
+Writes a synthetic PDF of --pages text pages, then ingests it in a fresh
+process per mode and reports that process's peak RSS above its baseline
+after imports:
+
+  load    DocumentProcessor.load_document + InMemoryVectorStore.add_documents
+  stream  DocumentProcessor.iter_document + add_documents_streaming
+
+Embeddings are random (no API calls) but returned as Python lists of floats,
+as OpenAIEmbeddings does. The store's own embedding matrix is listed
+separately: it grows with the document either way.
+
+Usage: python benchmarks/bench_streaming_ingest.py [--pages 2000] [--batch-size 256]
+"""
+import argparse
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+
+def write_pdf(path: str, pages: int, chars_per_page: int = 3000, seed: int = 0) -> None:
+    """Write a minimal uncompressed PDF with ``pages`` pages of random words."""
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(5000)]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for _ in range(pages):
+        lines, length = [], 0
+        while length < chars_per_page:
+            line = " ".join(rng.choices(vocabulary, k=10))
+            lines.append(f"({line}) Tj T*")
+            length += len(line) + 1
+        stream = ("BT /F1 8 Tf 10 TL 40 800 Td\n" + "\n".join(lines) + "\nET").encode("ascii")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+def child(mode: str, pdf: str, batch_size: int, dim: int) -> None:
+    """Ingest ``pdf`` in this process and print a JSON report."""
+    from bench_vector_search import RandomQueryEmbeddings
+    from rag.document_processor import DocumentProcessor
+    from rag.vector_store import InMemoryVectorStore
+
+    processor = DocumentProcessor()
+    store = InMemoryVectorStore(embeddings=RandomQueryEmbeddings(dim))
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == "load":
+        store.add_documents(processor.load_document(pdf))
+    else:
+        store.add_documents_streaming(processor.iter_document(pdf), batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "chunks": len(store),
+        "seconds": elapsed,
+        "peak_mb": (peak - baseline) / 1024,
+        "matrix_mb": store.vectors.nbytes / 2**20,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PDF"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child, args.batch_size, args.dim)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        pdf = str(Path(directory) / "synthetic.pdf")
+        write_pdf(pdf, args.pages)
+        size_mb = Path(pdf).stat().st_size / 2**20
+        print(f"{args.pages} pages ({size_mb:.1f} MB PDF), dim={args.dim}, batch size {args.batch_size}")
+        print(f"{'mode':>8} {'chunks':>7} {'seconds':>8} {'peak MB':>8} {'matrix MB':>10}")
+        for mode in ("load", "stream"):
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", mode, pdf,
+                 "--batch-size", str(args.batch_size), "--dim", str(args.dim)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            report = json.loads(output.splitlines()[-1])
+            print(
+                f"{mode:>8} {report['chunks']:>7} {report['seconds']:>8.1f} "
+                f"{report['peak_mb']:>8.0f} {report['matrix_mb']:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
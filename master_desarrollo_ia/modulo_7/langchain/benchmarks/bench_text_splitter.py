@@ -0,0 +1,146 @@
+"""
+Speed and golden parity of RecursiveTextSplitter vs LangChain's RecursiveCharacterTextSplitter.
+
+First checks that both splitters produce identical chunks (and documents) on
+a set of golden inputs: synthetic prose, the sample PDF's pages and edge cases
+(blank runs, words longer than a chunk, non-ASCII text), for several
+chunk_size/chunk_overlap pairs, measuring length in characters and in "tokens"
+(words, plus tiktoken's cl100k_base when its encoding is available offline).
+Exits with status 1 on any mismatch. Then times both on multi-MB texts.
+
+Usage: python benchmarks/bench_text_splitter.py [--megabytes 4] [--skip-parity]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter  # noqa: E402
+
+from rag.text_splitter import RecursiveTextSplitter  # noqa: E402
+
+SAMPLE_PDF = Path(__file__).parent.parent / "docs" / "Arduino Open Source Report 2024 (3).pdf"
+CONFIGS = [(1000, 200), (500, 50), (200, 0), (100, 99), (37, 10), (10, 5), (1, 0)]
+
+
+def prose(rng: random.Random, chars: int, line_breaks: bool = True) -> str:
+    """Random text with paragraphs, lines, odd whitespace and some very long words."""
+    words = ["lorem", "ipsum", "dolor", "sit", "amet", "señal", "日本語", "naïve", "a", "of"]
+    parts, length = [], 0
+    while length < chars:
+        roll = rng.random()
+        if roll < 0.002:
+            word = "x" * rng.randint(50, 3000)
+        elif roll < 0.01:
+            word = rng.choice(["\t", "  ", "   \n", " ", " "])
+        else:
+            word = rng.choice(words) + rng.choice(["", "", "", ",", "."])
+        parts.append(word)
+        length += len(word) + 1
+        if line_breaks:
+            roll = rng.random()
+            if roll < 0.01:
+                parts.append("\n" * rng.randint(2, 5))
+            elif roll < 0.06:
+                parts.append("\n")
+    return " ".join(parts)
+
+
+def length_functions():
+    """(name, function) pairs; None means characters."""
+    functions = [("chars", None), ("words", lambda text: len(text.split()))]
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("cl100k_base")
+        functions.append(("cl100k", lambda text: len(encoding.encode(text, disallowed_special=()))))
+    except Exception:
+        print("tiktoken encoding not available, skipping the token parity check")
+    return functions
+
+
+def golden_inputs():
+    """(name, text) pairs covering the splitter's edge cases."""
+    rng = random.Random(7)
+    inputs = [
+        ("empty", ""),
+        ("blank", " \n\n \t\n  "),
+        ("short", "hello world"),
+        ("one long word", "y" * 2500),
+        ("newline runs", "a\n\n\n\nb\n\n\n" * 300),
+        ("no line breaks", prose(rng, 20_000, line_breaks=False)),
+    ]
+    inputs += [(f"prose {i}", prose(rng, rng.randint(1_000, 30_000))) for i in range(12)]
+    if SAMPLE_PDF.exists():
+        from langchain_community.document_loaders import PyPDFLoader
+
+        inputs += [(f"pdf page {i}", page.page_content) for i, page in enumerate(PyPDFLoader(str(SAMPLE_PDF)).load())]
+    return inputs
+
+
+def check_parity() -> bool:
+    """Compare both splitters on every golden input and configuration."""
+    inputs = golden_inputs()
+    checked = mismatches = 0
+    for name, function in length_functions():
+        for chunk_size, chunk_overlap in CONFIGS:
+            kwargs = {"chunk_size": chunk_size, "chunk_overlap": chunk_overlap}
+            reference = RecursiveCharacterTextSplitter(length_function=function or len, **kwargs)
+            native = RecursiveTextSplitter(length_function=function, **kwargs)
+            for text_name, text in inputs:
+                if chunk_size < 10 and len(text) > 5000:
+                    continue  # LangChain takes minutes at this size
+                checked += 1
+                expected, actual = reference.split_text(text), native.split_text(text)
+                if expected != actual:
+                    mismatches += 1
+                    print(f"MISMATCH {name} size={chunk_size} overlap={chunk_overlap} on {text_name!r}: "
+                          f"{len(expected)} vs {len(actual)} chunks")
+            texts = [text for _, text in inputs[:8]]
+            metadatas = [{"source": f"doc{i}", "page": i} for i in range(len(texts))]
+            if reference.create_documents(texts, metadatas) != native.create_documents(texts, metadatas):
+                mismatches += 1
+                print(f"MISMATCH {name} size={chunk_size} overlap={chunk_overlap} on create_documents")
+    print(f"parity: {checked - mismatches}/{checked} golden splits identical")
+    return mismatches == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--megabytes", type=float, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-parity", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_parity and not check_parity():
+        sys.exit(1)
+
+    rng = random.Random(42)
+    chars = int(args.megabytes * 2**20)
+    texts = [
+        ("paragraphs", prose(rng, chars)),
+        ("no line breaks", prose(rng, chars, line_breaks=False)),
+    ]
+    print(f"{'text':>16} {'MB':>5} {'size':>5} {'langchain s':>12} {'native s':>9} {'speedup':>8}")
+    for name, text in texts:
+        for chunk_size, chunk_overlap in ((1000, 200), (300, 50)):
+            kwargs = {"chunk_size": chunk_size, "chunk_overlap": chunk_overlap}
+            timings = []
+            for splitter in (RecursiveCharacterTextSplitter(length_function=len, **kwargs), RecursiveTextSplitter(**kwargs)):
+                best = float("inf")
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    splitter.split_text(text)
+                    best = min(best, time.perf_counter() - start)
+                timings.append(best)
+            print(
+                f"{name:>16} {len(text) / 2**20:>5.1f} {chunk_size:>5} {timings[0]:>12.3f} "
+                f"{timings[1]:>9.3f} {timings[0] / timings[1]:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
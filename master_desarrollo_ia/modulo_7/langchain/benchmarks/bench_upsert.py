@@ -0,0 +1,170 @@
+"""
+Cost of replacing one changed file: upsert_source vs clearing and re-adding everything.
+
+Builds a store of --size chunks split into files of --file-chunks chunks,
+then changes --changed of one file's chunks and re-ingests it:
+
+  rebuild  clear() + add_documents of every chunk (the only option before)
+  upsert   upsert_source of the changed file (unchanged chunks keep their vector)
+  remove   remove_source of a file
+
+Embeddings are deterministic per text (no API calls); the number of texts
+sent to the embedder is reported next to the time, since with a real API
+that dominates. Then files are upserted until a background compaction
+runs. Searches are checked against a store rebuilt from scratch with the
+same live chunks, before and after compaction: the results must be
+identical.
+
+Usage: python benchmarks/bench_upsert.py [--size 100000] [--file-chunks 500] [--dim 256]
+"""
+import argparse
+import hashlib
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from langchain_core.documents import Document  # noqa: E402
+from langchain_core.embeddings import Embeddings  # noqa: E402
+
+from rag.ivf_index import IVFIndex  # noqa: E402
+from rag.vector_store import InMemoryVectorStore  # noqa: E402
+
+
+class HashEmbeddings(Embeddings):
+    """Random vectors seeded by the text, counting the texts embedded."""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.embedded = 0
+
+    def _vector(self, text: str) -> np.ndarray:
+        seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+        return np.random.default_rng(seed).standard_normal(self.dim, dtype=np.float32)
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return np.array([self._vector(text) for text in texts])
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+def file_chunks(source: str, count: int, version: int = 0, changed: int = 0):
+    """Chunks of a file; the first ``changed`` differ from version 0."""
+    return [
+        Document(
+            page_content=f"{source} chunk {i}" + (f" revision {version}" if i < changed else ""),
+            metadata={"source": source, "page": i // 10},
+        )
+        for i in range(count)
+    ]
+
+
+def build(embeddings: HashEmbeddings, documents, ann: bool) -> InMemoryVectorStore:
+    """A store holding ``documents``, embedded in one go."""
+    store = InMemoryVectorStore(embeddings=embeddings, ann_index=IVFIndex() if ann else None)
+    store.add_embeddings(documents, embeddings.embed_documents([doc.page_content for doc in documents]))
+    return store
+
+
+def timed(embeddings: HashEmbeddings, action):
+    """Run ``action``, returning (seconds, texts embedded)."""
+    before = embeddings.embedded
+    start = time.perf_counter()
+    action()
+    return time.perf_counter() - start, embeddings.embedded - before
+
+
+def search_latency(store: InMemoryVectorStore, queries, k: int) -> float:
+    """Average milliseconds per similarity search."""
+    start = time.perf_counter()
+    for query in queries:
+        store.similarity_search_with_score(query, k=k)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def same_results(store: InMemoryVectorStore, reference: InMemoryVectorStore, queries, k: int, exact: bool) -> bool:
+    """Whether both stores return the same chunks for every query."""
+    for query in queries:
+        vector = store.embedding_model.embed_query(query)
+        got = store.similarity_search_by_vector_with_score(vector, k, exact=exact)
+        expected = reference.similarity_search_by_vector_with_score(vector, k, exact=exact)
+        if [doc.page_content for doc, _ in got] != [doc.page_content for doc, _ in expected]:
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--file-chunks", type=int, default=500)
+    parser.add_argument("--changed", type=int, default=50)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--ann", action="store_true", help="search with an IVF index")
+    args = parser.parse_args()
+
+    files = [f"file_{i}.pdf" for i in range(args.size // args.file_chunks)]
+    versions = {source: 0 for source in files}
+    embeddings = HashEmbeddings(args.dim)
+    store = build(embeddings, [doc for source in files for doc in file_chunks(source, args.file_chunks)], args.ann)
+    queries = [f"query {i}" for i in range(args.queries)]
+    print(f"{len(store)} chunks in {len(files)} files of {args.file_chunks}, dim={args.dim}, "
+          f"{args.changed} chunks changed per update")
+    print(f"{'operation':>28} {'seconds':>9} {'embedded':>9}")
+
+    def current():
+        return [
+            doc for source in files
+            for doc in file_chunks(source, args.file_chunks, versions[source], args.changed)
+        ]
+
+    changed = files[0]
+    versions[changed] = 1
+    seconds, embedded = timed(embeddings, lambda: (store.clear(), store.add_documents(current())))
+    print(f"{'rebuild (clear + re-add)':>28} {seconds:>9.3f} {embedded:>9}")
+
+    versions[changed] = 2
+    update = file_chunks(changed, args.file_chunks, 2, args.changed)
+    seconds, embedded = timed(embeddings, lambda: store.upsert_source(changed, update))
+    print(f"{'upsert_source':>28} {seconds:>9.3f} {embedded:>9}")
+
+    removed = files.pop()
+    seconds, _ = timed(embeddings, lambda: store.remove_source(removed))
+    print(f"{'remove_source':>28} {seconds:>9.3f} {0:>9}")
+    reference = build(HashEmbeddings(args.dim), current(), args.ann)
+    tombstoned_ok = same_results(store, reference, queries, args.k, exact=True)
+
+    # Keep updating files until enough rows are tombstoned for a compaction.
+    updates = 0
+    upsert_seconds = 0.0
+    while store._compaction is None:
+        tombstoned_ms = search_latency(store, queries, args.k)
+        source = files[1 + updates % (len(files) - 1)]
+        versions[source] += 1
+        update = file_chunks(source, args.file_chunks, versions[source], args.changed)
+        seconds, _ = timed(embeddings, lambda: store.upsert_source(source, update))
+        upsert_seconds += seconds
+        updates += 1
+    seconds, _ = timed(embeddings, store.wait_for_compaction)
+    print(f"{f'{updates} more upserts (each)':>28} {upsert_seconds / updates:>9.3f} {args.changed:>9}")
+    print(f"{'compaction (background)':>28} {seconds:>9.3f} {0:>9}")
+    print(f"search ms: {tombstoned_ms:.2f} with tombstones, {search_latency(store, queries, args.k):.2f} after compaction")
+
+    reference = build(HashEmbeddings(args.dim), current(), args.ann)
+    compacted_ok = len(store) == len(reference) and same_results(store, reference, queries, args.k, exact=True)
+    print(f"results match a store rebuilt from scratch: {tombstoned_ok} with tombstones, {compacted_ok} after compaction")
+    removed_returned = any(
+        doc.metadata["source"] == removed for query in queries for doc in store.similarity_search(query, 50)
+    )
+    if not (tombstoned_ok and compacted_ok) or removed_returned:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Query latency of the NumPy-backed InMemoryVectorStore vs LangChain's in-memory store.
+
+Embeddings are random unit vectors, so no API calls are made. LangChain's store
+computes cosine similarity over Python lists and is only run up to --baseline-max
+chunks.
+
+Usage: python benchmarks/bench_vector_search.py [--sizes 10000 100000 1000000] [--dim 128]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from langchain_core.documents import Document  # noqa: E402
+from langchain_core.embeddings import Embeddings  # noqa: E402
+from langchain_core.vectorstores import InMemoryVectorStore as LangChainInMemoryVectorStore  # noqa: E402
+
+from rag.vector_store import InMemoryVectorStore  # noqa: E402
+
+
+class RandomQueryEmbeddings(Embeddings):
+    """Returns a fresh random vector for every query."""
+
+    def __init__(self, dim: int, seed: int = 0):
+        self.dim = dim
+        self.rng = np.random.default_rng(seed)
+
+    def embed_documents(self, texts):
+        return self.rng.standard_normal((len(texts), self.dim)).tolist()
+
+    def embed_query(self, text):
+        return self.rng.standard_normal(self.dim).tolist()
+
+
+def time_queries(store, queries: int, k: int) -> float:
+    """Average milliseconds per similarity_search_with_score call."""
+    start = time.perf_counter()
+    for i in range(queries):
+        store.similarity_search_with_score(f"query {i}", k=k)
+    return (time.perf_counter() - start) / queries * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vector search latency benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--baseline-max", type=int, default=10_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    embeddings = RandomQueryEmbeddings(args.dim)
+    print(f"dim={args.dim}, k={args.k}, {args.queries} queries per size")
+    print(f"{'chunks':>10} {'numpy ms':>10} {'langchain ms':>13}")
+    for size in args.sizes:
+        vectors = rng.standard_normal((size, args.dim), dtype=np.float32)
+        documents = [Document(page_content=str(i)) for i in range(size)]
+
+        store = InMemoryVectorStore(embeddings=embeddings)
+        store.add_embeddings(documents, vectors)
+        numpy_ms = time_queries(store, args.queries, args.k)
+        del store
+
+        baseline = "skipped"
+        if size <= args.baseline_max:
+            lc_store = LangChainInMemoryVectorStore(embeddings)
+            lc_store.add_texts([d.page_content for d in documents], embeddings=vectors.tolist())
+            baseline = f"{time_queries(lc_store, args.queries, args.k):.2f}"
+            del lc_store
+        print(f"{size:>10} {numpy_ms:>10.2f} {baseline:>13}")
+
+
+if __name__ == "__main__":
+    main()
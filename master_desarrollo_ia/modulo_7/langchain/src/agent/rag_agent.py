@@ -2,7 +2,7 @@
 AI Agent implementation using LangChain with RAG capabilities.
 """
 import os
-from typing import List, Optional, Dict, Any, Union, Generator
+from typing import Iterable, List, Optional, Dict, Any, Union, Generator
 from datetime import datetime
 
 from pydantic import SecretStr
@@ -10,7 +10,10 @@ from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, trim_messages
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
-from ..rag import InMemoryVectorStore, RAGRetriever, DocumentProcessor
+from ..rag import InMemoryVectorStore, RAGRetriever, DocumentProcessor, EmbeddingCache, BM25Index, QueryCache
+from ..rag.embedding_pipeline import ProgressCallback
+from ..rag.tokenizer import get_tokenizer
+from ..rag.vector_store import VECTORS_FILE
 
 
 class RAGAgent:
@@ -22,9 +25,27 @@ class RAGAgent:
         model_name: str = "gpt-5",
         temperature: float = 0.7,
         max_tokens: int = 4000,
-        memory_window: int = 10
+        memory_window: int = 10,
+        store_path: Optional[str] = None,
+        embedding_cache_path: Optional[str] = None,
+        retrieval_mode: str = "dense"
     ):
-        """Initialize the RAG Agent."""
+        """Initialize the RAG Agent.
+        
+        If ``store_path`` is set, the knowledge base is loaded from that
+        snapshot directory when it exists and saved back after every change;
+        a save appends the change rather than rewriting the snapshot.
+        Embeddings are cached in memory, and also in the SQLite file at
+        ``embedding_cache_path`` if one is given. ``retrieval_mode`` is
+        "dense" (embedding similarity, best for natural-language questions),
+        "sparse" (BM25) or "hybrid" (BM25 keyword matches fused with
+        embedding similarity, for identifiers and rare terms); a BM25 index
+        is only kept for the last two. Repeated questions reuse their query
+        embedding and, until the knowledge base changes, their retrieved
+        chunks.
+        """
+        if retrieval_mode not in RAGRetriever.MODES:
+            raise ValueError(f"Unknown retrieval mode {retrieval_mode!r}, expected one of {RAGRetriever.MODES}")
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OpenAI API key is required")
@@ -37,8 +58,22 @@ class RAGAgent:
         )
         
         # Initialize RAG components
-        self.vector_store = InMemoryVectorStore(api_key=self.api_key)
-        self.retriever = RAGRetriever(self.vector_store)
+        self.store_path = store_path
+        # Chunk token counts (recorded at ingestion) use the chat model's tokenizer.
+        tokenizer = get_tokenizer(model_name)
+        keyword_index = BM25Index() if retrieval_mode != "dense" else None
+        self.embedding_cache = EmbeddingCache(embedding_cache_path)
+        if store_path and os.path.exists(os.path.join(store_path, VECTORS_FILE)):
+            self.vector_store = InMemoryVectorStore.load(
+                store_path, api_key=self.api_key, embedding_cache=self.embedding_cache,
+                keyword_index=keyword_index, tokenizer=tokenizer
+            )
+        else:
+            self.vector_store = InMemoryVectorStore(
+                api_key=self.api_key, embedding_cache=self.embedding_cache,
+                keyword_index=keyword_index, tokenizer=tokenizer
+            )
+        self.retriever = RAGRetriever(self.vector_store, mode=retrieval_mode, cache=QueryCache())
         self.doc_processor = DocumentProcessor()
         
         # Initialize conversation history storage
@@ -62,23 +97,53 @@ class RAGAgent:
         
         Current time: {current_time}"""
     
-    def add_documents_from_processor(self, documents: List) -> int:
-        """Add documents to the knowledge base."""
+    def add_documents_from_processor(self, documents: List, progress: Optional[ProgressCallback] = None) -> int:
+        """Add documents to the knowledge base, returning how many were new."""
         if not documents:
             return 0
         
-        self.vector_store.add_documents(documents)
-        return len(documents)
+        before = len(self.vector_store)
+        self.vector_store.add_documents(documents, progress=progress)
+        self._save_knowledge_base()
+        return len(self.vector_store) - before
+    
+    def add_document_stream(self, documents: Iterable, progress: Optional[ProgressCallback] = None) -> int:
+        """Add lazily produced chunks in bounded batches, returning how many were new."""
+        added = self.vector_store.add_documents_streaming(documents, progress=progress)
+        self._save_knowledge_base()
+        return added
+    
+    def remove_source(self, source: str) -> int:
+        """Remove a source's chunks from the knowledge base, returning how many were removed."""
+        removed = self.vector_store.remove_source(source)
+        if removed:
+            self._save_knowledge_base()
+        return removed
+    
+    def upsert_source(self, source: str, documents: Iterable, progress: Optional[ProgressCallback] = None) -> int:
+        """Replace a source's chunks (a list or a lazy stream), embedding only the changed ones; returns the chunk count."""
+        stored = self.vector_store.upsert_source(source, documents, progress=progress)
+        self._save_knowledge_base()
+        return stored
     
     def clear_knowledge_base(self) -> None:
         """Clear all documents from the knowledge base."""
         self.vector_store.clear()
+        self._save_knowledge_base()
+    
+    def _save_knowledge_base(self) -> None:
+        """Persist the knowledge base if a store path was configured."""
+        if self.store_path:
+            self.vector_store.save(self.store_path)
     
     def get_knowledge_base_info(self) -> Dict[str, Any]:
         """Get information about the current knowledge base."""
         return {
             "document_count": self.vector_store.get_document_count(),
-            "has_documents": len(self.vector_store) > 0
+            "has_documents": len(self.vector_store) > 0,
+            "embedding_cache": self.embedding_cache.stats(),
+            "query_cache": self.retriever.cache.stats(),
+            "deduplication": self.vector_store.deduplicator.stats() if self.vector_store.deduplicator else None
         }
     
     def _get_relevant_context(self, query: str) -> str:
@@ -177,12 +242,12 @@ class RAGAgent:
         
         return history
     
-    def search_documents(self, query: str, k: int = 3) -> List[Dict[str, Any]]:
-        """Search for relevant documents."""
+    def search_documents(self, query: str, k: int = 3, filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Search for relevant documents, optionally restricted by a metadata ``filter``."""
         if len(self.vector_store) == 0:
             return []
         
-        docs = self.vector_store.similarity_search(query, k=k)
+        docs = self.vector_store.similarity_search(query, k=k, filter=filter)
         
         results = []
         for doc in docs:
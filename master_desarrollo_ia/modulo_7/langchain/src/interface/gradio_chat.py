@@ -2,11 +2,12 @@
 Gradio interface for the ChatGPT-like AI agent.
 """
 import os
-from typing import List, Tuple, Dict
+from typing import Iterable, Iterator, List, Tuple, Dict
 import gradio as gr
+from langchain_core.documents import Document
 
 from ..agent import RAGAgent
-from ..rag import DocumentProcessor
+from ..rag import LOADERS, DocumentProcessor
 
 
 class ChatInterface:
@@ -17,30 +18,60 @@ class ChatInterface:
         self.title = title
         self.doc_processor = DocumentProcessor()
         
-    def process_uploaded_files(self, files: List[str]) -> str:
-        """Process uploaded files and add them to the knowledge base."""
+    @staticmethod
+    def _with_source(documents: Iterable[Document], source: str) -> Iterator[Document]:
+        """Relabel a file's chunks (lazily) with the name it is stored under."""
+        for doc in documents:
+            doc.metadata["source"] = source
+            yield doc
+    
+    def process_uploaded_files(self, files: List[str], progress=gr.Progress()) -> str:
+        """Process uploaded files and add them to the knowledge base.
+        
+        Files are keyed by their name, not by Gradio's temporary upload
+        path, so uploading a file again replaces its previous version
+        (only changed chunks are embedded) instead of adding to it.
+        """
         if not files:
             return "No files uploaded."
         
         total_docs = 0
         processed_files = []
+        errors = []
         
-        for file_path in files:
-            try:
-                # Process the document
-                documents = self.doc_processor.load_document(file_path)
-                
-                # Add to knowledge base
-                self.agent.add_documents_from_processor(documents)
-                
-                total_docs += len(documents)
-                processed_files.append(os.path.basename(file_path))
-                
-            except Exception as e:
-                return f"Error processing {os.path.basename(file_path)}: {str(e)}"
+        def report(name):
+            return lambda done, total: progress((done, total), desc=f"Embedding {name}", unit="chunks")
+        
+        if len(files) == 1:
+            # A single (possibly very large) file gains nothing from the
+            # process pool; stream it page by page to bound memory instead.
+            results = [(files[0], None, None)]
+        else:
+            # Large batches are parsed in parallel; each file is indexed as
+            # soon as it is ready, and a failing file does not stop the rest.
+            results = self.doc_processor.load_documents(files)
+        
+        for file_path, documents, error in results:
+            name = os.path.basename(file_path)
+            if error is None:
+                try:
+                    if documents is None:
+                        documents = self.doc_processor.iter_document(file_path)
+                    total_docs += self.agent.upsert_source(
+                        name, self._with_source(documents, name), progress=report(name)
+                    )
+                except Exception as e:
+                    error = e
+            if error is None:
+                processed_files.append(name)
+            else:
+                errors.append(f"{name}: {str(error)}")
         
         files_list = ", ".join(processed_files)
-        return f"Successfully processed {len(processed_files)} file(s): {files_list}. Added {total_docs} document chunks to knowledge base."
+        message = f"Successfully processed {len(processed_files)} file(s): {files_list}. {total_docs} document chunks in the knowledge base for them."
+        if errors:
+            message += "\nFailed to process " + "; ".join(errors)
+        return message
     
     def add_text_to_knowledge_base(self, text: str) -> str:
         """Add text directly to the knowledge base."""
@@ -49,8 +80,8 @@ class ChatInterface:
         
         try:
             documents = self.doc_processor.process_text_input(text, "manual_input")
-            self.agent.add_documents_from_processor(documents)
-            return f"Added text to knowledge base ({len(documents)} chunks)."
+            added = self.agent.add_documents_from_processor(documents)
+            return f"Added text to knowledge base ({added} new of {len(documents)} chunks)."
         except Exception as e:
             return f"Error adding text: {str(e)}"
     
@@ -67,7 +98,22 @@ class ChatInterface:
     def get_knowledge_base_status(self) -> str:
         """Get the current status of the knowledge base."""
         info = self.agent.get_knowledge_base_info()
-        return f"Documents in knowledge base: {info['document_count']}"
+        cache = info["embedding_cache"]
+        queries = info["query_cache"]
+        status = (
+            f"Documents in knowledge base: {info['document_count']}\n"
+            f"Embedding cache: {cache['memory_hits'] + cache['disk_hits']} hits, "
+            f"{cache['misses']} misses (~{cache['seconds_saved']:.1f}s of embedding saved)\n"
+            f"Query cache hit rate: {queries['embeddings']['hit_rate']:.0%} embeddings, "
+            f"{queries['results']['hit_rate']:.0%} results"
+        )
+        dedup = info["deduplication"]
+        if dedup is not None:
+            status += (
+                f"\nDuplicate chunks skipped: {dedup['skipped']} "
+                f"({dedup['exact_duplicates']} exact, {dedup['near_duplicates']} near)"
+            )
+        return status
     
     def chat_response(self, message: str, history: List[dict]) -> Tuple[List[dict], str]:
         """Generate chat response."""
@@ -170,9 +216,9 @@ class ChatInterface:
                     with gr.Column():
                         gr.Markdown("### Upload Documents")
                         file_upload = gr.File(
-                            label="Upload Files (PDF, TXT, DOCX)",
+                            label="Upload Files (PDF, TXT, MD, DOCX)",
                             file_count="multiple",
-                            file_types=[".pdf", ".txt", ".docx"],
+                            file_types=sorted(LOADERS),
                             elem_classes=["upload-area"]
                         )
                         upload_btn = gr.Button("Process Files", variant="primary")
@@ -2,11 +2,30 @@
 RAG (Retrieval-Augmented Generation) system components.
 """
 
+from .bm25_index import BM25Index
+from .dedup import ChunkDeduplicator
 from .document_processor import DocumentProcessor
+from .embedding_cache import EmbeddingCache
+from .ivf_index import IVFIndex
+from .loaders import LOADERS, register_loader
+from .metadata_index import MetadataIndex
+from .query_cache import QueryCache
+from .text_splitter import RecursiveTextSplitter
+from .tokenizer import Tokenizer
 from .vector_store import InMemoryVectorStore, RAGRetriever
 
 __all__ = [
+    "BM25Index",
+    "ChunkDeduplicator",
     "DocumentProcessor",
+    "EmbeddingCache",
+    "IVFIndex",
     "InMemoryVectorStore", 
-    "RAGRetriever"
+    "LOADERS",
+    "MetadataIndex",
+    "QueryCache",
+    "RAGRetriever",
+    "RecursiveTextSplitter",
+    "Tokenizer",
+    "register_loader"
 ]
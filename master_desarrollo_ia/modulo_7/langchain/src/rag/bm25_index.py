@@ -0,0 +1,156 @@
+"""
+BM25 keyword index over a vector store's documents, with array-backed postings.
+"""
+import math
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens of a text."""
+    return _TOKEN.findall(text.lower())
+
+
+class _TermPostings:
+    """Growable arrays of the rows containing a term and its frequency in each."""
+
+    __slots__ = ("rows", "frequencies", "size")
+
+    def __init__(self):
+        self.rows = np.empty(4, dtype=np.int64)
+        self.frequencies = np.empty(4, dtype=np.float32)
+        self.size = 0
+
+    def extend(self, rows: np.ndarray, frequencies: np.ndarray) -> None:
+        """Append (row, frequency) pairs, growing the arrays geometrically."""
+        needed = self.size + len(rows)
+        if needed > len(self.rows):
+            capacity = max(needed, 2 * len(self.rows))
+            grown_rows = np.empty(capacity, dtype=np.int64)
+            grown_rows[:self.size] = self.rows[:self.size]
+            grown_frequencies = np.empty(capacity, dtype=np.float32)
+            grown_frequencies[:self.size] = self.frequencies[:self.size]
+            self.rows, self.frequencies = grown_rows, grown_frequencies
+        self.rows[self.size:needed] = rows
+        self.frequencies[self.size:needed] = frequencies
+        self.size = needed
+
+
+class BM25Index:
+    """Okapi BM25 ranking of a store's rows for keyword queries.
+
+    Complements dense retrieval on exact identifiers, codes and rare terms.
+    Each term has a posting list of (row, term frequency) NumPy arrays and
+    document lengths are kept in one array, so a query is a few vectorized
+    updates of a score array per query term. Documents are indexed as they
+    are added (``add``); nothing is rebuilt.
+
+    As in Lucene, deleted rows are masked out of results by the caller but
+    still count in the term statistics (document frequency, average length)
+    until ``remap`` drops them after a compaction.
+    """
+
+    # Rows are below this bound, so (term id, row) pairs pack into one int64.
+    _ROW_SPAN = 1 << 32
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """Initialize the index.
+
+        Args:
+            k1: Term frequency saturation
+            b: Strength of the document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all rows."""
+        # Term -> term id, and postings by term id.
+        self._term_ids: Dict[str, int] = {}
+        self._postings: List[_TermPostings] = []
+        self._lengths = np.empty(64, dtype=np.float32)
+        self.size = 0
+        self._total_length = 0.0
+
+    def add(self, documents: Sequence[Document], start: int) -> None:
+        """Index ``documents`` as rows ``start:start + len(documents)``."""
+        if start != self.size:
+            raise ValueError(f"Expected rows from {self.size}, got {start}")
+        term_ids = self._term_ids
+        tokens: List[int] = []
+        lengths = np.empty(len(documents), dtype=np.int64)
+        for offset, doc in enumerate(documents):
+            words = tokenize(doc.page_content)
+            lengths[offset] = len(words)
+            tokens.extend([term_ids.setdefault(word, len(term_ids)) for word in words])
+        self._postings.extend(_TermPostings() for _ in range(len(term_ids) - len(self._postings)))
+
+        # Count (term, row) pairs in one pass: the sorted unique keys come
+        # grouped by term, with rows in increasing order within a term.
+        rows = np.repeat(np.arange(start, start + len(documents), dtype=np.int64), lengths)
+        keys, frequencies = np.unique(np.array(tokens, dtype=np.int64) * self._ROW_SPAN + rows, return_counts=True)
+        terms, rows = np.divmod(keys, self._ROW_SPAN)
+        starts = np.flatnonzero(np.diff(terms, prepend=-1))
+        ends = np.append(starts[1:], len(terms))
+        postings = self._postings
+        for term, lo, hi in zip(terms[starts].tolist(), starts.tolist(), ends.tolist()):
+            postings[term].extend(rows[lo:hi], frequencies[lo:hi])
+
+        end = start + len(documents)
+        if end > len(self._lengths):
+            grown = np.empty(max(end, 2 * len(self._lengths)), dtype=np.float32)
+            grown[:start] = self._lengths[:start]
+            self._lengths = grown
+        self._lengths[start:end] = lengths
+        self.size = end
+        self._total_length += float(lengths.sum())
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every row for ``query`` (0 where no query term occurs)."""
+        scores = np.zeros(self.size, dtype=np.float32)
+        if not self.size or not self._total_length:
+            return scores
+        average_length = self._total_length / self.size
+        lengths = self._lengths[:self.size]
+        for word in dict.fromkeys(tokenize(query)):
+            term = self._term_ids.get(word)
+            if term is None:
+                continue
+            postings = self._postings[term]
+            rows = postings.rows[:postings.size]
+            frequencies = postings.frequencies[:postings.size]
+            idf = math.log(1.0 + (self.size - postings.size + 0.5) / (postings.size + 0.5))
+            norms = self.k1 * (1.0 - self.b + self.b * lengths[rows] / average_length)
+            scores[rows] += idf * frequencies * (self.k1 + 1.0) / (frequencies + norms)
+        return scores
+
+    def search(self, query: str, k: int, mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """(row, score) pairs of the top-k rows within ``mask`` sharing a term with the query."""
+        scores = self.scores(query)
+        if mask is not None:
+            scores[~mask[:self.size]] = 0.0
+        hits = np.flatnonzero(scores)
+        if k < len(hits):
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(int(row), float(scores[row])) for row in hits]
+
+    def remap(self, mapping: np.ndarray) -> None:
+        """Renumber rows after a compaction: row r becomes mapping[r], or is dropped if -1."""
+        for postings in self._postings:
+            remapped = mapping[postings.rows[:postings.size]]
+            kept = remapped >= 0
+            frequencies = postings.frequencies[:postings.size][kept]
+            postings.size = 0
+            postings.extend(remapped[kept], frequencies)
+        kept_lengths = self._lengths[:self.size][mapping[:self.size] >= 0]
+        self._lengths = np.empty(max(len(kept_lengths), 64), dtype=np.float32)
+        self._lengths[:len(kept_lengths)] = kept_lengths
+        self.size = len(kept_lengths)
+        self._total_length = float(kept_lengths.sum())
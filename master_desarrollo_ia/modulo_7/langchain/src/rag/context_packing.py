@@ -0,0 +1,134 @@
+"""
+Choosing which retrieved chunks fit a prompt's token budget.
+"""
+from functools import lru_cache
+from typing import List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+
+from .tokenizer import Tokenizer
+
+# Placed between chunks in a packed context.
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+# Tokens can merge across the boundary between a chunk and a separator, so
+# a joined context may count this many tokens more per boundary than its
+# parts; contexts packed closer than that to the budget are counted whole.
+BOUNDARY_TOKENS = 2
+
+# Up to this many items, every subset is scored at once.
+MAX_EXHAUSTIVE_ITEMS = 12
+# Above this many (items x budget) cells, the exact knapsack gives way to
+# the greedy approximation.
+MAX_KNAPSACK_CELLS = 1 << 22
+
+
+@lru_cache(maxsize=None)
+def _subsets(items: int) -> np.ndarray:
+    """(2**items x items) matrix whose rows are every subset, as 0/1 floats."""
+    masks = np.arange(1 << items)[:, None] >> np.arange(items) & 1
+    return masks.astype(np.float64)
+
+
+def pack(token_counts: Sequence[int], relevances: Sequence[float], budget: int, separator_tokens: int = 0) -> List[int]:
+    """Indices (increasing) of the items with the highest total relevance that fit ``budget`` tokens.
+
+    Each chosen item after the first also costs ``separator_tokens``. This
+    is a 0/1 knapsack, solved exactly: for a handful of items by scoring
+    every subset with two matrix-vector products, otherwise by dynamic
+    programming over the budget (a few vectorized passes per item, since
+    budgets are small), or greedily by relevance per token when that table
+    would be too large. Items with no positive relevance are never chosen.
+    """
+    # n items cost n - 1 separators: charge one to each and add one to the budget.
+    weights = np.asarray(token_counts, dtype=np.int64) + separator_tokens
+    values = np.asarray(relevances, dtype=np.float64)
+    capacity = budget + separator_tokens
+    if capacity <= 0 or not len(weights):
+        return []
+    if len(weights) <= MAX_EXHAUSTIVE_ITEMS:
+        return _pack_exhaustive(weights, np.maximum(values, 0.0), capacity)
+    if len(weights) * (capacity + 1) > MAX_KNAPSACK_CELLS:
+        return _pack_greedy(weights, values, capacity)
+
+    # best[c]: highest relevance within c tokens using the items seen so far.
+    best = np.zeros(capacity + 1)
+    taken = np.zeros((len(weights), capacity + 1), dtype=bool)
+    for item, (weight, value) in enumerate(zip(weights.tolist(), values.tolist())):
+        if weight > capacity or value <= 0:
+            continue
+        with_item = best[:capacity + 1 - weight] + value
+        improved = with_item > best[weight:]
+        taken[item, weight:] = improved
+        best[weight:][improved] = with_item[improved]
+
+    chosen = []
+    remaining = capacity
+    for item in range(len(weights) - 1, -1, -1):
+        if taken[item, remaining]:
+            chosen.append(item)
+            remaining -= int(weights[item])
+    return chosen[::-1]
+
+
+def _pack_exhaustive(weights: np.ndarray, values: np.ndarray, capacity: int) -> List[int]:
+    """The best fitting subset, found by scoring all of them."""
+    subsets = _subsets(len(weights))
+    weights = np.where(values > 0, weights, capacity + 1)
+    totals = np.where(subsets @ weights <= capacity, subsets @ values, -1.0)
+    best = int(np.argmax(totals))
+    return np.flatnonzero(subsets[best]).tolist() if totals[best] > 0 else []
+
+
+def _pack_greedy(weights: np.ndarray, values: np.ndarray, capacity: int) -> List[int]:
+    """Items by decreasing relevance per token while they fit (or the best single item, if better)."""
+    chosen = []
+    used = 0
+    for item in np.argsort(-values / np.maximum(weights, 1), kind="stable").tolist():
+        if values[item] > 0 and used + weights[item] <= capacity:
+            chosen.append(item)
+            used += int(weights[item])
+    fitting = np.flatnonzero((weights <= capacity) & (values > 0))
+    if len(fitting):
+        single = int(fitting[np.argmax(values[fitting])])
+        if values[single] > values[chosen].sum():
+            chosen = [single]
+    return sorted(chosen)
+
+
+def pack_context(
+    documents: Sequence[Document],
+    relevances: Sequence[float],
+    max_tokens: int,
+    tokenizer: Tokenizer,
+    token_counts: Optional[Sequence[int]] = None
+) -> str:
+    """Join the most relevant set of whole ``documents`` that fits ``max_tokens`` tokens, in their order.
+
+    With ``token_counts`` (e.g. recorded by the store at ingestion, see
+    ``InMemoryVectorStore.token_counts``) packing is arithmetic on
+    integers; without them the documents are counted here. The joined
+    context is only tokenized when it lands within a few tokens of the
+    budget. When not even one document fits, the first one is truncated
+    to the budget.
+    """
+    if not documents:
+        return ""
+    if token_counts is None:
+        token_counts = tokenizer.count_many([doc.page_content for doc in documents])
+    # What a separator costs between two chunks, rather than on its own.
+    separator_tokens = tokenizer.count(f"a{CONTEXT_SEPARATOR}a") - 2 * tokenizer.count("a")
+    budget = max_tokens
+    while True:
+        chosen = pack(token_counts, relevances, budget, separator_tokens)
+        if not chosen:
+            return tokenizer.truncate(documents[0].page_content, max_tokens)
+        context = CONTEXT_SEPARATOR.join(documents[i].page_content for i in chosen)
+        boundaries = len(chosen) - 1
+        packed = sum(token_counts[i] for i in chosen) + boundaries * separator_tokens
+        if packed + boundaries * BOUNDARY_TOKENS <= max_tokens:
+            return context
+        overflow = tokenizer.count(context) - max_tokens
+        if overflow <= 0:
+            return context
+        budget -= overflow
@@ -0,0 +1,164 @@
+"""
+Exact and near-duplicate detection for chunks, applied before embedding.
+"""
+import hashlib
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+MINHASH_PERMUTATIONS = 128
+# Locality-sensitive hashing: signatures are split into bands, and only
+# chunks that agree on a whole band are compared. With 16 bands of 8 rows,
+# pairs above ~0.7 Jaccard similarity almost always share a band.
+LSH_BANDS = 16
+_ROWS_PER_BAND = MINHASH_PERMUTATIONS // LSH_BANDS
+# Largest prime below 2**32. The hash family is (a * h + b) mod p with a, b
+# and the 32-bit shingle hashes h below 2**32, so products fit in uint64.
+_PRIME = 4294967291
+_coefficients = np.random.default_rng(1).integers(1, _PRIME, size=(2, MINHASH_PERMUTATIONS), dtype=np.uint64)
+_WORD = re.compile(r"\w+")
+
+
+def content_hash(text: str) -> bytes:
+    """Digest identifying a chunk's exact text."""
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+def minhash(text: str, shingle_size: int = 3) -> np.ndarray:
+    """MinHash signature over word shingles.
+
+    The fraction of positions where two signatures agree estimates the
+    Jaccard similarity of the chunks' shingle sets. Words are lowercased and
+    whitespace is ignored.
+    """
+    words = _WORD.findall(text.lower())
+    shingles = {
+        " ".join(words[i:i + shingle_size])
+        for i in range(max(1, len(words) - shingle_size + 1))
+    }
+    hashes = np.frombuffer(
+        b"".join(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest() for s in shingles),
+        dtype=np.uint32,
+    ).astype(np.uint64)
+    a, b = _coefficients
+    permuted = (np.outer(hashes, a) + b) % np.uint64(_PRIME)
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+class ChunkDeduplicator:
+    """Remembers the chunks already in a store and filters out repeats.
+
+    Exact duplicates are detected by content hash. With
+    ``near_duplicates=True``, chunks whose estimated Jaccard similarity
+    (MinHash over word shingles) to a known chunk is at least ``threshold``
+    are skipped too, e.g. the same page with a different header or
+    whitespace.
+
+    Chunks are only compared with chunks of the same ``source`` metadata:
+    a chunk shared by two files is stored for each, so removing one file
+    never takes the other's content with it.
+    """
+
+    def __init__(self, near_duplicates: bool = False, threshold: float = 0.8, shingle_size: int = 3):
+        """Initialize the deduplicator.
+
+        Args:
+            near_duplicates: Also skip chunks similar to a known one
+            threshold: Jaccard similarity from which a chunk counts as a duplicate
+            shingle_size: Words per shingle in the MinHash signature
+        """
+        self.near_duplicates = near_duplicates
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all known chunks and zero the counters."""
+        # (source, content hash) of every known chunk
+        self._hashes: Set[Tuple[Optional[str], bytes]] = set()
+        # (source, band number, band bytes) -> full signatures (as bytes) in that bucket
+        self._bands: Dict[Tuple[Optional[str], int, bytes], List[bytes]] = defaultdict(list)
+        self.accepted = 0
+        self.exact_duplicates = 0
+        self.near_duplicates_skipped = 0
+
+    def _band_keys(self, source: Optional[str], signature: bytes) -> List[Tuple[Optional[str], int, bytes]]:
+        """(source, band number, band bytes) keys used to bucket a signature."""
+        width = _ROWS_PER_BAND * 4
+        return [(source, band, signature[band * width:(band + 1) * width]) for band in range(LSH_BANDS)]
+
+    def _is_near_duplicate(self, source: Optional[str], signature: bytes) -> bool:
+        """Whether a known chunk of ``source`` sharing a band is similar enough."""
+        values = np.frombuffer(signature, dtype=np.uint32)
+        checked = set()
+        for key in self._band_keys(source, signature):
+            for other in self._bands.get(key, ()):
+                if other in checked:
+                    continue
+                checked.add(other)
+                if np.mean(values == np.frombuffer(other, dtype=np.uint32)) >= self.threshold:
+                    return True
+        return False
+
+    def _signature(self, text: str) -> Optional[bytes]:
+        """MinHash of a chunk, or None when near-duplicates are off."""
+        return minhash(text, self.shingle_size).tobytes() if self.near_duplicates else None
+
+    def add(self, documents: Iterable[Document]) -> None:
+        """Record documents as known without filtering them."""
+        for doc in documents:
+            source = doc.metadata.get("source")
+            self._remember(source, content_hash(doc.page_content), self._signature(doc.page_content))
+
+    def _remember(self, source: Optional[str], digest: bytes, signature: Optional[bytes]) -> None:
+        """Index a chunk's hash (and signature) under its source for later lookups."""
+        self._hashes.add((source, digest))
+        if signature is not None:
+            for key in self._band_keys(source, signature):
+                self._bands[key].append(signature)
+
+    def discard(self, documents: Iterable[Document]) -> None:
+        """Forget documents, e.g. ones that were filtered but never stored."""
+        for doc in documents:
+            source = doc.metadata.get("source")
+            self._hashes.discard((source, content_hash(doc.page_content)))
+            signature = self._signature(doc.page_content)
+            if signature is not None:
+                for key in self._band_keys(source, signature):
+                    bucket = self._bands.get(key)
+                    if bucket and signature in bucket:
+                        bucket.remove(signature)
+
+    def filter(self, documents: Iterable[Document]) -> List[Document]:
+        """Return the documents that are new, and record them as known.
+
+        Duplicates within ``documents`` itself are filtered as well.
+        """
+        accepted = []
+        for doc in documents:
+            text = doc.page_content
+            source = doc.metadata.get("source")
+            digest = content_hash(text)
+            if (source, digest) in self._hashes:
+                self.exact_duplicates += 1
+                continue
+            signature = self._signature(text)
+            if signature is not None and self._is_near_duplicate(source, signature):
+                self.near_duplicates_skipped += 1
+                continue
+            self._remember(source, digest, signature)
+            accepted.append(doc)
+        self.accepted += len(accepted)
+        return accepted
+
+    def stats(self) -> Dict[str, int]:
+        """Get counts of accepted and skipped chunks."""
+        return {
+            "accepted": self.accepted,
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates_skipped,
+            "skipped": self.exact_duplicates + self.near_duplicates_skipped,
+        }
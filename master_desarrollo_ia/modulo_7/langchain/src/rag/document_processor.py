@@ -1,40 +1,179 @@
 """
 Document processing and ingestion for RAG system.
 """
-from typing import List
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from pathlib import Path
 
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 
+from .loaders import LOADERS, Loader
+from .text_splitter import RecursiveTextSplitter
+
+# (path, chunks, error): error is None when the file loaded; chunks is then
+# the file's chunks, otherwise empty.
+LoadResult = Tuple[str, List[Document], Optional[Exception]]
+
+# Below this many bytes in total, files are parsed in-process: starting the
+# worker processes (seconds) costs more than the parsing they would share.
+MIN_PARALLEL_BYTES = 8 * 1024 * 1024
+
+# The DocumentProcessor of a pool worker process, set by _init_worker.
+_worker_processor: Optional["DocumentProcessor"] = None
+
+
+def _init_worker(
+    chunk_size: int,
+    chunk_overlap: int,
+    length_function: Optional[Callable[[str], int]],
+    loaders: Dict[str, Loader]
+) -> None:
+    """Build the worker's own processor once, instead of pickling one per file."""
+    global _worker_processor
+    _worker_processor = DocumentProcessor(chunk_size, chunk_overlap, length_function, loaders)
+
+
+def _load_in_worker(file_path: str) -> List[Document]:
+    """Load and split one file in a pool worker."""
+    return _worker_processor.load_document(file_path)
+
+
+def _total_size(file_paths: List[str]) -> int:
+    """Total size in bytes of the files (missing ones count as empty)."""
+    total = 0
+    for file_path in file_paths:
+        try:
+            total += os.path.getsize(file_path)
+        except OSError:
+            pass  # reported when the file is loaded
+    return total
+
 
 class DocumentProcessor:
     """Process and prepare documents for RAG ingestion."""
     
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        length_function: Optional[Callable[[str], int]] = None,
+        loaders: Optional[Dict[str, Loader]] = None,
+        workers: Optional[int] = None,
+        min_parallel_bytes: int = MIN_PARALLEL_BYTES
+    ):
+        """Initialize the processor.
+        
+        Args:
+            chunk_size: Maximum chunk length
+            chunk_overlap: Overlap between consecutive chunks
+            length_function: Length of a text, e.g. in tokens (characters if
+                None); must be picklable to be used by load_documents workers
+            loaders: Loaders by file extension, added to (or replacing) the
+                registered ones (see rag.loaders.register_loader)
+            workers: Size of the load_documents process pool (defaults to
+                the CPU count)
+            min_parallel_bytes: Smallest total size of a load_documents
+                batch worth sending to the pool
+        """
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.workers = workers or multiprocessing.cpu_count()
+        self.min_parallel_bytes = min_parallel_bytes
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.text_splitter = RecursiveCharacterTextSplitter(
+        self.length_function = length_function
+        self.loaders = {**LOADERS, **{ext.lower(): loader for ext, loader in (loaders or {}).items()}}
+        # Same chunks as LangChain's RecursiveCharacterTextSplitter, computed
+        # on offsets instead of intermediate strings.
+        self.text_splitter = RecursiveTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
-            length_function=len,
+            length_function=length_function,
         )
     
     def load_document(self, file_path: str) -> List[Document]:
         """Load a document based on its file extension."""
-        file_extension = Path(file_path).suffix.lower()
+        return list(self.iter_document(file_path))
+    
+    def iter_document(self, file_path: str) -> Iterator[Document]:
+        """Yield a document's chunks lazily, one page (or text block) at a time.
         
-        if file_extension == '.pdf':
-            return self._load_pdf(file_path)
-        else:
+        Only the piece being split is held in memory, so the caller decides
+        how many chunks are buffered (see InMemoryVectorStore.add_documents_streaming).
+        The loader is chosen by file extension.
+        """
+        file_extension = Path(file_path).suffix.lower()
+        loader = self.loaders.get(file_extension)
+        if loader is None:
             raise ValueError(f"Unsupported file type: {file_extension}")
+        return self._iter_chunks(loader(file_path))
+    
+    def load_documents(self, file_paths: Iterable[str]) -> Iterator[LoadResult]:
+        """Load and split several files, in parallel worker processes if worthwhile.
+        
+        Yields a (path, chunks, error) tuple per file as soon as that file is
+        done, so callers can index early files while later ones are still
+        parsing. A file that fails to load is reported with its error and
+        does not stop the others.
+        
+        Batches with fewer files than ``workers``, or smaller in total than
+        ``min_parallel_bytes``, are loaded in this process, in order: for
+        them the pool would not pay for itself. The pool is started by the
+        first batch that needs it and reused for every later one.
+        """
+        file_paths = list(file_paths)
+        if self.workers <= 1 or len(file_paths) < self.workers or _total_size(file_paths) < self.min_parallel_bytes:
+            for file_path in file_paths:
+                try:
+                    yield file_path, self.load_document(file_path), None
+                except Exception as e:
+                    yield file_path, [], e
+            return
+        
+        pool = self._get_pool()
+        futures: Dict[Future, str] = {
+            pool.submit(_load_in_worker, file_path): file_path for file_path in file_paths
+        }
+        try:
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], [], e
+        finally:
+            for future in futures:
+                future.cancel()
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Get the worker pool, kept between calls so workers start only once."""
+        if self._pool is not None and self._pool_is_broken():
+            self.close()
+        if self._pool is None:
+            # Spawned rather than forked: forking a process that is running
+            # other threads (as the Gradio server is) can deadlock the child.
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.chunk_size, self.chunk_overlap, self.length_function, self.loaders),
+            )
+        return self._pool
+    
+    def _pool_is_broken(self) -> bool:
+        """Whether a worker died and the pool can no longer take work."""
+        return getattr(self._pool, "_broken", False)
+    
+    def close(self) -> None:
+        """Shut down the worker pool, if one was started."""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
     
-    def _load_pdf(self, file_path: str) -> List[Document]:
-        """Load PDF document."""
-        loader = PyPDFLoader(file_path)
-        documents = loader.load()
-        return self.text_splitter.split_documents(documents)
+    def _iter_chunks(self, pieces: Iterable[Document]) -> Iterator[Document]:
+        """Split a loader's pages or blocks one at a time."""
+        for piece in pieces:
+            yield from self.text_splitter.split_documents([piece])
     
     def process_text_input(self, text: str, source: str = "text_input") -> List[Document]:
         """Process raw text input."""
@@ -0,0 +1,143 @@
+"""
+Content-addressed embedding cache: an in-memory LRU tier over a SQLite file.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+SCHEMA = "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL)"
+INSERT = "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)"
+# SQLite's default limit on bound parameters is 999 on older builds.
+LOOKUP_BATCH = 500
+
+
+def embedding_key(model: str, text: str) -> bytes:
+    """Cache key for the embedding of ``text`` by ``model``."""
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """Embeddings keyed by hash(model, text), so identical chunks are embedded once.
+
+    Lookups hit the in-memory LRU first (``max_memory_items`` vectors), then
+    the SQLite file at ``path``; ``path=None`` keeps the cache in memory only.
+    Vectors are stored as raw float32 bytes. The cache is safe to share
+    between threads (Gradio runs handlers in a thread pool).
+    """
+
+    def __init__(self, path: Optional[str] = None, max_memory_items: int = 10_000):
+        """Initialize the cache.
+
+        Args:
+            path: SQLite file for the persistent tier (None for memory only)
+            max_memory_items: Number of vectors kept in the LRU tier
+        """
+        self.path = path
+        self.max_memory_items = max_memory_items
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path is not None:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(SCHEMA)
+        # Time spent embedding misses; its per-text average prices the hits.
+        self.embed_seconds = 0.0
+        self.embedded = 0
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """Zero the hit/miss counters (the embedding time average is kept)."""
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Cached vectors for ``texts`` (None where missing), counting hits and misses."""
+        keys = [embedding_key(model, text) for text in texts]
+        vectors: List[Optional[np.ndarray]] = []
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                vectors.append(vector)
+            missing = [i for i, vector in enumerate(vectors) if vector is None]
+            self.memory_hits += len(keys) - len(missing)
+
+            if self._conn is not None and missing:
+                stored = self._load(list({keys[i] for i in missing}))
+                for i in missing:
+                    vectors[i] = stored.get(keys[i])
+                self.disk_hits += sum(keys[i] in stored for i in missing)
+            self.misses += sum(vector is None for vector in vectors)
+        return vectors
+
+    def _load(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Read ``keys`` from SQLite and promote them to the memory tier."""
+        found = {}
+        for start in range(0, len(keys), LOOKUP_BATCH):
+            batch = keys[start:start + LOOKUP_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+            )
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+                self._remember(key, found[key])
+        return found
+
+    def set_many(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        """Store freshly computed embeddings in both tiers."""
+        keys = [embedding_key(model, text) for text in texts]
+        arrays = [np.asarray(vector, dtype=np.float32) for vector in vectors]
+        with self._lock:
+            for key, vector in zip(keys, arrays):
+                self._remember(key, vector)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.executemany(
+                        INSERT, ((key, vector.tobytes()) for key, vector in zip(keys, arrays))
+                    )
+
+    def _remember(self, key: bytes, vector: np.ndarray) -> None:
+        """Put a vector in the LRU tier, evicting the least recently used."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def record_embedding(self, count: int, seconds: float) -> None:
+        """Account for ``count`` texts that took ``seconds`` to embed (cache misses)."""
+        with self._lock:
+            self.embedded += count
+            self.embed_seconds += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counts and the embedding time the hits saved."""
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        seconds_per_text = self.embed_seconds / self.embedded if self.embedded else 0.0
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "embed_seconds": self.embed_seconds,
+            # Estimated from the average time the misses took to embed.
+            "seconds_saved": hits * seconds_per_text,
+        }
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,254 @@
+"""
+Concurrent, rate-limit-aware embedding of chunks in token-bounded batches.
+"""
+import queue
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from langchain_core.embeddings import Embeddings
+
+# Called with (chunks embedded so far, total chunks); the total is None when
+# the chunks are streamed and their number is not known in advance.
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+T = TypeVar("T")
+
+
+class _EndOfStream:
+    """Queued by prefetch's producer after the last item (or on error)."""
+
+    def __init__(self, error: Optional[BaseException] = None):
+        self.error = error
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Group an iterable into lists of ``size`` items (the last may be shorter)."""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def prefetch(items: Iterable[T], buffer_size: int) -> Iterator[T]:
+    """Iterate ``items`` on a background thread, at most ``buffer_size`` ahead.
+
+    Lets producing the next items (e.g. parsing PDF pages) overlap with
+    consuming the current one (e.g. waiting on embedding requests), while the
+    bounded queue keeps memory use independent of the stream length.
+    """
+    buffer: "queue.Queue" = queue.Queue(maxsize=buffer_size)
+    stopped = threading.Event()
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if stopped.is_set():
+                    return
+                buffer.put(item)
+        except BaseException as error:
+            buffer.put(_EndOfStream(error))
+        else:
+            buffer.put(_EndOfStream())
+
+    threading.Thread(target=produce, name="prefetch", daemon=True).start()
+    try:
+        while True:
+            item = buffer.get()
+            if isinstance(item, _EndOfStream):
+                if item.error is not None:
+                    raise item.error
+                return
+            yield item
+    finally:
+        # Unblock the producer if the consumer stops early.
+        stopped.set()
+        while not buffer.empty():
+            buffer.get_nowait()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (1 token ≈ 4 characters)."""
+    return len(text) // 4 + 1
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether an embedding request failed with a rate limit or server error."""
+    status = getattr(error, "status_code", None)
+    return status == 429 or (status is not None and status >= 500)
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds the server asked us to wait, if the error carries a Retry-After header."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(header)
+        if value is not None:
+            try:
+                return float(value) * scale
+            except ValueError:
+                pass
+    return None
+
+
+class EmbeddingPipeline:
+    """Embeds chunks in token-bounded batches with a bounded pool of workers.
+
+    Texts are grouped into batches of at most ``max_batch_tokens`` tokens and
+    ``max_batch_size`` texts, and up to ``workers`` batches are in flight at
+    once. A request that fails with a 429 (or 5xx) is retried with
+    exponential backoff and jitter (never sooner than Retry-After asks).
+
+    Rate limits also apply backpressure: the backoff is shared, so every
+    worker holds off, and each 429 halves the number of requests allowed in
+    flight, which then grows back by one per round of successful requests
+    (additive increase, multiplicative decrease).
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        workers: int = 4,
+        max_batch_tokens: int = 20_000,
+        max_batch_size: int = 256,
+        max_retries: int = 6,
+        initial_backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        token_counter: Callable[[str], int] = estimate_tokens
+    ):
+        """Initialize the pipeline.
+
+        Args:
+            embeddings: Embeddings implementation that does the requests
+            workers: Maximum number of batches embedded concurrently
+            max_batch_tokens: Token budget of one request
+            max_batch_size: Maximum number of texts in one request
+            max_retries: Retries of a batch before its error is raised
+            initial_backoff: Seconds to wait after the first failure
+            max_backoff: Upper bound on the wait between retries
+            token_counter: Function counting the tokens of a text
+        """
+        self.embeddings = embeddings
+        self.workers = workers
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.token_counter = token_counter
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+        self._resume_at = 0.0
+        self._in_flight = 0
+        self._concurrency = float(workers)
+        self.requests = 0
+        self.retries = 0
+
+    def batches(self, texts: Sequence[str]) -> List[Tuple[int, int]]:
+        """Split ``texts`` into consecutive (start, end) batches within the limits."""
+        batches = []
+        start = tokens = 0
+        for index, text in enumerate(texts):
+            count = self.token_counter(text)
+            if index > start and (tokens + count > self.max_batch_tokens or index - start >= self.max_batch_size):
+                batches.append((start, index))
+                start, tokens = index, 0
+            tokens += count
+        if start < len(texts):
+            batches.append((start, len(texts)))
+        return batches
+
+    def _acquire(self) -> None:
+        """Wait for a request slot and for any shared backoff to pass."""
+        with self._slot_freed:
+            while True:
+                delay = self._resume_at - time.monotonic()
+                if delay > 0:
+                    self._slot_freed.wait(delay)
+                elif self._in_flight >= int(self._concurrency):
+                    self._slot_freed.wait()
+                else:
+                    self._in_flight += 1
+                    self.requests += 1
+                    return
+
+    def _release(self, backoff: Optional[float] = None) -> None:
+        """Free a slot; ``backoff`` (seconds) marks the request as rate limited."""
+        with self._slot_freed:
+            self._in_flight -= 1
+            if backoff is None:
+                self._concurrency = min(self.workers, self._concurrency + 1 / self._concurrency)
+            else:
+                self.retries += 1
+                self._concurrency = max(1.0, self._concurrency / 2)
+                self._resume_at = max(self._resume_at, time.monotonic() + backoff)
+            self._slot_freed.notify_all()
+
+    def _embed_batch(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embed one batch, retrying rate-limited and failed requests."""
+        attempt = 0
+        while True:
+            self._acquire()
+            try:
+                vectors = self.embeddings.embed_documents(list(texts))
+            except Exception as error:
+                if attempt == self.max_retries or not is_retryable(error):
+                    self._release()
+                    raise
+                backoff = min(self.max_backoff, self.initial_backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+                self._release(max(backoff, retry_after(error) or 0.0))
+                attempt += 1
+                continue
+            self._release()
+            return vectors
+
+    def iter_embed(self, texts: Sequence[str]) -> Iterator[Tuple[int, List[List[float]]]]:
+        """Yield (start index, vectors) per batch, in completion order.
+
+        At most ``workers`` batches are submitted ahead of the consumer, so
+        a slow consumer slows the requests down instead of buffering results.
+        """
+        batches = self.batches(texts)
+        if len(batches) <= 1 or self.workers <= 1:
+            for start, end in batches:
+                yield start, self._embed_batch(texts[start:end])
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="embedding") as pool:
+            pending: Dict[Future, int] = {}
+            remaining = iter(batches)
+            try:
+                while True:
+                    for start, end in remaining:
+                        pending[pool.submit(self._embed_batch, texts[start:end])] = start
+                        if len(pending) >= self.workers:
+                            break
+                    if not pending:
+                        return
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield pending.pop(future), future.result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def embed(self, texts: Sequence[str], progress: Optional[ProgressCallback] = None) -> List[List[float]]:
+        """Embed all texts, returning vectors in input order."""
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        done = 0
+        for start, batch in self.iter_embed(texts):
+            vectors[start:start + len(batch)] = batch
+            done += len(batch)
+            if progress is not None:
+                progress(done, len(texts))
+        return vectors
+
+    def stats(self) -> Dict[str, int]:
+        """Get the number of requests sent and retried."""
+        return {"requests": self.requests, "retries": self.retries}
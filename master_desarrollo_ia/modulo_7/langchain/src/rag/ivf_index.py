@@ -0,0 +1,143 @@
+"""
+Inverted-file (IVF) approximate nearest-neighbour index in pure NumPy.
+"""
+from typing import List, Optional
+
+import numpy as np
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray, batch_size: int = 65536) -> np.ndarray:
+    """Index of the most similar centroid for each (normalized) vector."""
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), batch_size):
+        block = vectors[start:start + batch_size]
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+class IVFIndex:
+    """Approximate search by clustering embeddings into ``n_lists`` buckets.
+
+    Vectors are grouped by their nearest centroid (spherical k-means). A
+    query is scored against the centroids first, and then only against the
+    vectors in the ``nprobe`` closest buckets, so its cost is roughly
+    ``nprobe / n_lists`` of an exact scan. Raising ``nprobe`` trades speed
+    for recall.
+
+    The index stores row numbers into the owning store's embedding matrix,
+    not vectors. Until ``min_train_size`` vectors have been added it stays
+    untrained and the store searches exactly; it retrains itself once the
+    store has grown ``retrain_growth`` times past the last training size.
+    """
+
+    def __init__(
+        self,
+        n_lists: Optional[int] = None,
+        nprobe: int = 8,
+        min_train_size: int = 10_000,
+        retrain_growth: float = 4.0,
+        max_train_sample: int = 100_000,
+        iterations: int = 10,
+        seed: int = 0
+    ):
+        """Initialize the index.
+
+        Args:
+            n_lists: Number of clusters (defaults to sqrt of the size at training)
+            nprobe: Number of clusters scanned per query
+            min_train_size: Vectors needed before the index is trained
+            retrain_growth: Retrain when the store grows by this factor
+            max_train_sample: Cap on vectors used to fit the centroids
+            iterations: k-means iterations
+            seed: Random seed for sampling and initialization
+        """
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.retrain_growth = retrain_growth
+        self.max_train_sample = max_train_sample
+        self.iterations = iterations
+        self.seed = seed
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop centroids and bucket contents."""
+        self.centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+        self._sizes: Optional[np.ndarray] = None
+        self._trained_size = 0
+
+    @property
+    def is_trained(self) -> bool:
+        """Whether the index can answer queries."""
+        return self.centroids is not None
+
+    def add(self, vectors: np.ndarray, start: int) -> None:
+        """Index rows ``start:`` of the store's embedding matrix ``vectors``."""
+        if not self.is_trained or len(vectors) >= self._trained_size * self.retrain_growth:
+            if len(vectors) >= self.min_train_size:
+                self.train(vectors)
+            return
+        self._add_rows(np.arange(start, len(vectors)), _assign(vectors[start:], self.centroids))
+
+    def train(self, vectors: np.ndarray) -> None:
+        """Fit centroids with spherical k-means and bucket every row."""
+        rng = np.random.default_rng(self.seed)
+        n_lists = self.n_lists or max(1, int(np.sqrt(len(vectors))))
+        n_lists = min(n_lists, len(vectors))
+
+        sample_size = min(len(vectors), self.max_train_sample, max(n_lists * 256, n_lists))
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+        for _ in range(self.iterations):
+            assignments = _assign(sample, centroids)
+            order = np.argsort(assignments, kind="stable")
+            counts = np.bincount(assignments, minlength=n_lists)
+            # Per-cluster sums in one pass over the sample sorted by cluster.
+            sums = np.zeros_like(centroids)
+            present = counts > 0
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[present]
+            sums[present] = np.add.reduceat(sample[order], starts, axis=0)
+            # Re-seed empty clusters from random sample points.
+            empty = counts == 0
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+
+        self.centroids = centroids
+        self._lists = [np.empty(0, dtype=np.int64) for _ in range(n_lists)]
+        self._sizes = np.zeros(n_lists, dtype=np.int64)
+        self._trained_size = len(vectors)
+        self._add_rows(np.arange(len(vectors)), _assign(vectors, centroids))
+
+    def _add_rows(self, rows: np.ndarray, assignments: np.ndarray) -> None:
+        """Append rows to their buckets, growing bucket arrays geometrically."""
+        order = np.argsort(assignments, kind="stable")
+        rows, assignments = rows[order], assignments[order]
+        lists, bounds = np.unique(assignments, return_index=True)
+        for bucket, chunk in zip(lists, np.split(rows, bounds[1:])):
+            size = self._sizes[bucket]
+            needed = size + len(chunk)
+            if needed > len(self._lists[bucket]):
+                grown = np.empty(max(needed, 2 * len(self._lists[bucket])), dtype=np.int64)
+                grown[:size] = self._lists[bucket][:size]
+                self._lists[bucket] = grown
+            self._lists[bucket][size:needed] = chunk
+            self._sizes[bucket] = needed
+
+    def remap(self, mapping: np.ndarray) -> None:
+        """Renumber rows after the store compacts: row r becomes mapping[r], or is dropped if -1."""
+        if not self.is_trained:
+            return
+        for bucket, rows in enumerate(self._lists):
+            remapped = mapping[rows[:self._sizes[bucket]]]
+            self._lists[bucket] = remapped[remapped >= 0]
+            self._sizes[bucket] = len(self._lists[bucket])
+
+    def candidates(self, query: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        """Rows in the buckets closest to a (normalized) query."""
+        nprobe = min(nprobe or self.nprobe, len(self._lists))
+        centroid_scores = self.centroids @ query
+        probes = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        return np.concatenate([self._lists[bucket][:self._sizes[bucket]] for bucket in probes])
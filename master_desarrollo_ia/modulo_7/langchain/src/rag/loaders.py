@@ -0,0 +1,129 @@
+"""
+File loaders keyed by extension, each yielding a document in bounded pieces.
+"""
+import zipfile
+from functools import partial
+from typing import Callable, Dict, Iterable, Iterator, List
+from xml.etree import ElementTree
+
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
+
+# A loader takes a file path and lazily yields the file's text as Documents
+# (pages, blocks...), each small enough to be split on its own. Loaders must
+# be picklable (module-level functions or partials of them) to be used by
+# DocumentProcessor.load_documents workers.
+Loader = Callable[[str], Iterable[Document]]
+
+# Characters of text per Document yielded by the text and DOCX loaders.
+BLOCK_SIZE = 1 << 20
+
+_WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_PARAGRAPH = _WORD_NAMESPACE + "p"
+_TEXT = _WORD_NAMESPACE + "t"
+_TAB = _WORD_NAMESPACE + "tab"
+_BREAKS = (_WORD_NAMESPACE + "br", _WORD_NAMESPACE + "cr")
+
+
+def load_pdf(file_path: str) -> Iterator[Document]:
+    """Yield a PDF's pages one at a time."""
+    return PyPDFLoader(file_path).lazy_load()
+
+
+def _block_end(text: str) -> int:
+    """Where to cut a block of text: before its last paragraph, line or word break.
+
+    Only breaks in the second half count, so the carried-over rest stays
+    shorter than a block.
+    """
+    for separator in ("\n\n", "\n", " "):
+        position = text.rfind(separator)
+        if position > len(text) // 2:
+            return position
+    return len(text)
+
+
+def load_text(
+    file_path: str,
+    block_size: int = BLOCK_SIZE,
+    encoding: str = "utf-8",
+    doc_type: str = "text"
+) -> Iterator[Document]:
+    """Yield a plain text file in blocks of about ``block_size`` characters.
+
+    The file is read ``block_size`` characters at a time, never whole. Each
+    block is cut at its last paragraph break (or line break, or space) and
+    the remainder is carried over to the next one, so chunks only differ
+    from splitting the whole file where a block boundary falls. Undecodable
+    bytes are replaced rather than failing the upload.
+    """
+    carry = ""
+    with open(file_path, encoding=encoding, errors="replace") as f:
+        while True:
+            block = f.read(block_size)
+            text = carry + block
+            if not block:
+                break
+            end = _block_end(text)
+            carry = text[end:]
+            yield Document(page_content=text[:end], metadata={"source": file_path, "type": doc_type})
+    if text.strip():
+        yield Document(page_content=text, metadata={"source": file_path, "type": doc_type})
+
+
+def _paragraph_text(paragraph: ElementTree.Element) -> str:
+    """Text of a DOCX paragraph, with its tabs and line breaks."""
+    parts = []
+    for element in paragraph.iter():
+        if element.tag == _TEXT:
+            parts.append(element.text or "")
+        elif element.tag == _TAB:
+            parts.append("\t")
+        elif element.tag in _BREAKS:
+            parts.append("\n")
+    return "".join(parts)
+
+
+def load_docx(file_path: str, block_size: int = BLOCK_SIZE) -> Iterator[Document]:
+    """Yield a DOCX file's body text in blocks of about ``block_size`` characters.
+
+    ``word/document.xml`` is decompressed and parsed incrementally, and each
+    paragraph is dropped from the tree once its text is taken, so memory
+    does not grow with the document. Paragraphs are separated by newlines
+    and never cut across blocks.
+    """
+    paragraphs: List[str] = []
+    length = 0
+    with zipfile.ZipFile(file_path) as archive, archive.open("word/document.xml") as xml:
+        parents: List[ElementTree.Element] = []
+        for event, element in ElementTree.iterparse(xml, events=("start", "end")):
+            if event == "start":
+                parents.append(element)
+                continue
+            parents.pop()
+            if element.tag != _PARAGRAPH:
+                continue
+            paragraphs.append(_paragraph_text(element))
+            length += len(paragraphs[-1]) + 1
+            if parents:
+                parents[-1].remove(element)
+            if length >= block_size:
+                yield Document(page_content="\n".join(paragraphs), metadata={"source": file_path, "type": "docx"})
+                paragraphs, length = [], 0
+    text = "\n".join(paragraphs)
+    if text.strip():
+        yield Document(page_content=text, metadata={"source": file_path, "type": "docx"})
+
+
+LOADERS: Dict[str, Loader] = {
+    ".pdf": load_pdf,
+    ".txt": load_text,
+    ".md": partial(load_text, doc_type="markdown"),
+    ".markdown": partial(load_text, doc_type="markdown"),
+    ".docx": load_docx,
+}
+
+
+def register_loader(extension: str, loader: Loader) -> None:
+    """Use ``loader`` for files with ``extension`` (e.g. ".csv") from now on."""
+    LOADERS[extension.lower()] = loader
@@ -0,0 +1,150 @@
+"""
+Inverted indexes from document metadata values to vector store rows.
+"""
+from collections import defaultdict
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+
+# A filter maps metadata fields to the accepted value, or to a list (tuple,
+# set) of accepted values: {"source": "report.pdf", "page": [1, 2, 3]}.
+# A document matches when every field matches.
+MetadataFilter = Mapping[str, Any]
+
+
+class _Postings:
+    """Growable array of row numbers."""
+
+    __slots__ = ("rows", "size")
+
+    def __init__(self):
+        self.rows = np.empty(8, dtype=np.int64)
+        self.size = 0
+
+    def extend(self, rows: Sequence[int]) -> None:
+        """Append rows, growing the array geometrically."""
+        needed = self.size + len(rows)
+        if needed > len(self.rows):
+            grown = np.empty(max(needed, 2 * len(self.rows)), dtype=np.int64)
+            grown[:self.size] = self.rows[:self.size]
+            self.rows = grown
+        self.rows[self.size:needed] = rows
+        self.size = needed
+
+    def view(self) -> np.ndarray:
+        """The rows appended so far."""
+        return self.rows[:self.size]
+
+
+class MetadataIndex:
+    """Rows of a store's documents by metadata field and value.
+
+    A field is indexed from the first time it is asked for (filtering on a
+    new field costs one pass over the documents) and then kept up to date
+    incrementally: ``update`` only looks at rows added since its last call.
+    Posting lists are NumPy arrays, so turning a filter into a row mask is
+    a few vectorized writes whatever the number of matching rows.
+
+    Rows of deleted documents are left in the postings (callers mask them
+    out with their tombstones) until ``remap`` renumbers the rows after a
+    compaction. Values that are not hashable (lists, dicts) are not indexed.
+    """
+
+    def __init__(self, fields: Iterable[str] = ("source",)):
+        """Initialize the index.
+
+        Args:
+            fields: Fields indexed from the start
+        """
+        self.fields = list(fields)
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all rows (the indexed fields are kept)."""
+        self._postings: Dict[str, Dict[Hashable, _Postings]] = {field: {} for field in self.fields}
+        self.indexed_rows = 0
+
+    def update(self, documents: Sequence[Document], deleted: np.ndarray, fields: Iterable[str] = ()) -> None:
+        """Index rows added since the last call, and start indexing ``fields``.
+
+        Args:
+            documents: The store's documents, by row
+            deleted: Tombstone mask; deleted rows are not indexed
+            fields: Fields that must be indexed from now on
+        """
+        new_fields = [field for field in dict.fromkeys(fields) if field not in self._postings]
+        if new_fields:
+            self._index(documents, deleted, new_fields, 0, self.indexed_rows)
+            self.fields.extend(new_fields)
+        if self.indexed_rows < len(documents):
+            self._index(documents, deleted, self.fields, self.indexed_rows, len(documents))
+            self.indexed_rows = len(documents)
+
+    def _index(
+        self,
+        documents: Sequence[Document],
+        deleted: np.ndarray,
+        fields: List[str],
+        start: int,
+        end: int
+    ) -> None:
+        """Add rows [start, end) to the postings of ``fields``."""
+        for field in fields:
+            self._postings.setdefault(field, {})
+        added: Dict[str, Dict[Hashable, List[int]]] = {field: defaultdict(list) for field in fields}
+        for row in range(start, end):
+            if deleted[row]:
+                continue
+            metadata = documents[row].metadata
+            for field in fields:
+                if field not in metadata:
+                    continue
+                try:
+                    added[field][metadata[field]].append(row)
+                except TypeError:
+                    pass  # unhashable value
+        for field, by_value in added.items():
+            postings = self._postings[field]
+            for value, rows in by_value.items():
+                postings.setdefault(value, _Postings()).extend(rows)
+
+    def rows(self, field: str, value: Any) -> np.ndarray:
+        """Rows whose ``field`` is ``value`` (deleted ones included)."""
+        try:
+            postings = self._postings.get(field, {}).get(value)
+        except TypeError:
+            postings = None
+        return postings.view() if postings is not None else np.empty(0, dtype=np.int64)
+
+    def values(self, field: str) -> Dict[Hashable, np.ndarray]:
+        """Rows by value of ``field`` (deleted ones included)."""
+        return {value: postings.view() for value, postings in self._postings.get(field, {}).items()}
+
+    def mask(self, metadata_filter: MetadataFilter, size: int) -> np.ndarray:
+        """Boolean mask over ``size`` rows of the documents matching a filter.
+
+        Every field in the filter must have been passed to ``update``.
+        """
+        mask: Optional[np.ndarray] = None
+        for field, accepted in metadata_filter.items():
+            if not isinstance(accepted, (list, tuple, set, frozenset)):
+                accepted = [accepted]
+            field_mask = np.zeros(size, dtype=bool)
+            for value in accepted:
+                field_mask[self.rows(field, value)] = True
+            mask = field_mask if mask is None else np.logical_and(mask, field_mask, out=mask)
+        return mask if mask is not None else np.ones(size, dtype=bool)
+
+    def remap(self, mapping: np.ndarray) -> None:
+        """Renumber rows after a compaction: row r becomes mapping[r], or is dropped if -1."""
+        for field, postings in self._postings.items():
+            remapped_postings = {}
+            for value, rows in postings.items():
+                remapped = mapping[rows.view()]
+                remapped = remapped[remapped >= 0]
+                if len(remapped):
+                    remapped_postings[value] = _Postings()
+                    remapped_postings[value].extend(remapped)
+            self._postings[field] = remapped_postings
+        self.indexed_rows = int(np.count_nonzero(mapping[:self.indexed_rows] >= 0))
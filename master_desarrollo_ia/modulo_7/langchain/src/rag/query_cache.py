@@ -0,0 +1,148 @@
+"""
+LRU + TTL caches for query embeddings and retrieval results.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .metadata_index import MetadataFilter
+
+
+def filter_key(metadata_filter: Optional[MetadataFilter]) -> Hashable:
+    """Hashable form of a metadata filter; lists of values compare as sets."""
+    if not metadata_filter:
+        return None
+    return tuple(sorted(
+        (field, frozenset(value) if isinstance(value, (list, tuple, set, frozenset)) else value)
+        for field, value in metadata_filter.items()
+    ))
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries also expire ``ttl`` seconds after being stored.
+
+    Entries carry a version: a lookup with a different version is a miss
+    and drops the entry, so a cache of results computed from a store is
+    invalidated by bumping the store's version rather than by clearing it.
+    Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        max_items: int = 1024,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """Initialize the cache.
+
+        Args:
+            max_items: Entries kept before the least recently used is evicted
+            ttl: Seconds an entry stays valid (None for no expiry)
+            clock: Time source, in seconds
+        """
+        self.max_items = max_items
+        self.ttl = ttl
+        self.clock = clock
+        # key -> (expiry time, version, value)
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """Zero the hit/miss counters."""
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidated = 0
+
+    def get(self, key: Hashable, version: Any = None) -> Optional[Any]:
+        """The value cached for ``key`` at ``version``, or None (counted as a miss)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, entry_version, value = entry
+            if entry_version != version or expires < self.clock():
+                del self._entries[key]
+                if entry_version != version:
+                    self.invalidated += 1
+                else:
+                    self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, version: Any = None) -> None:
+        """Cache ``value`` for ``key`` at ``version``, evicting the least recently used."""
+        expires = self.clock() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            self._entries[key] = (expires, version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every entry (the counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        """Return the number of cached entries."""
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counts, why the misses missed, and the hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "invalidated": self.invalidated,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self),
+        }
+
+
+class QueryCache:
+    """Caches for ``RAGRetriever``: query -> embedding, and query -> results.
+
+    Query embeddings depend only on the text and the model, so they are
+    reused until they expire or are evicted, and outlive the results by
+    default: a question whose results went stale costs a search, not an
+    embedding call. Results are stored with the vector store's
+    ``version``, which every add, removal and clear bumps, so a result
+    cached before the store changed is never served.
+    """
+
+    def __init__(
+        self,
+        max_embeddings: int = 10_000,
+        max_results: int = 10_000,
+        ttl: Optional[float] = 3600.0,
+        embedding_ttl: Optional[float] = 86400.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """Initialize the caches.
+
+        Args:
+            max_embeddings: Query embeddings kept
+            max_results: Retrieval results kept
+            ttl: Seconds before a cached result expires (None for never)
+            embedding_ttl: Seconds before a cached query embedding expires (None for never)
+            clock: Time source, in seconds
+        """
+        self.embeddings = TTLCache(max_embeddings, embedding_ttl, clock)
+        self.results = TTLCache(max_results, ttl, clock)
+
+    def clear(self) -> None:
+        """Drop every cached embedding and result."""
+        self.embeddings.clear()
+        self.results.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get the statistics of both caches."""
+        return {"embeddings": self.embeddings.stats(), "results": self.results.stats()}
@@ -0,0 +1,196 @@
+"""
+Recursive text splitter that works on offsets into the original text.
+"""
+import copy
+import re
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+DEFAULT_SEPARATORS = ["\n\n", "\n", " ", ""]
+
+Span = Tuple[int, int]
+
+
+def _copy_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-chunk copy of a document's metadata (deep only when needed)."""
+    if all(isinstance(value, (str, int, float, bool, type(None))) for value in metadata.values()):
+        return dict(metadata)
+    return copy.deepcopy(metadata)
+
+
+class RecursiveTextSplitter:
+    """Drop-in replacement for LangChain's ``RecursiveCharacterTextSplitter``.
+
+    Produces the same chunks as ``RecursiveCharacterTextSplitter`` with its
+    defaults (``keep_separator=True``, ``strip_whitespace=True``, literal
+    separators) for the same ``chunk_size``, ``chunk_overlap`` and length
+    function. Because separators are kept, every chunk is a contiguous span
+    of the input: pieces are tracked as (start, end) offsets and merged with
+    prefix sums and binary search, and only the final chunks are sliced out
+    of the text.
+
+    Length is measured in characters by default; pass ``length_function``
+    (e.g. a token counter, see ``from_tiktoken_encoder``) to measure it in
+    tokens, exactly as LangChain does: by summing the lengths of the pieces
+    a chunk is merged from.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 4000,
+        chunk_overlap: int = 200,
+        separators: Optional[List[str]] = None,
+        length_function: Optional[Callable[[str], int]] = None,
+        add_start_index: bool = False
+    ):
+        """Initialize the splitter.
+
+        Args:
+            chunk_size: Maximum chunk length
+            chunk_overlap: Length of the overlap kept between consecutive chunks
+            separators: Separators tried in order (default paragraphs, lines, words, characters)
+            length_function: Length of a piece of text (characters if None)
+            add_start_index: Add each chunk's offset in its document as metadata["start_index"]
+        """
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be > 0, got {chunk_size}")
+        if chunk_overlap < 0:
+            raise ValueError(f"chunk_overlap must be >= 0, got {chunk_overlap}")
+        if chunk_overlap > chunk_size:
+            raise ValueError(
+                f"Got a larger chunk overlap ({chunk_overlap}) than chunk size ({chunk_size}), should be smaller."
+            )
+        if length_function is not None and length_function("") != 0:
+            raise ValueError("length_function('') must be 0")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = separators or DEFAULT_SEPARATORS
+        self.length_function = length_function
+        self.add_start_index = add_start_index
+        self._patterns = [re.compile(re.escape(separator)) for separator in self.separators]
+
+    @classmethod
+    def from_tiktoken_encoder(cls, encoding_name: str = "cl100k_base", **kwargs: Any) -> "RecursiveTextSplitter":
+        """Splitter measuring length in tokens of a tiktoken encoding."""
+        import tiktoken
+
+        encoding = tiktoken.get_encoding(encoding_name)
+        return cls(length_function=lambda text: len(encoding.encode(text, disallowed_special=())), **kwargs)
+
+    def split_spans(self, text: str) -> List[Span]:
+        """(start, end) offsets of the chunks of ``text``."""
+        spans: List[Span] = []
+        self._split(text, 0, len(text), 0, spans)
+        return spans
+
+    def split_text(self, text: str) -> List[str]:
+        """Split text into chunks."""
+        return [text[start:end] for start, end in self.split_spans(text)]
+
+    def create_documents(self, texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None) -> List[Document]:
+        """Create chunk documents from texts, copying each text's metadata."""
+        metadatas = metadatas or [{}] * len(texts)
+        documents = []
+        for text, metadata in zip(texts, metadatas):
+            for start, end in self.split_spans(text):
+                chunk_metadata = _copy_metadata(metadata)
+                if self.add_start_index:
+                    chunk_metadata["start_index"] = start
+                documents.append(Document(page_content=text[start:end], metadata=chunk_metadata))
+        return documents
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        """Split documents into chunks, keeping their metadata."""
+        documents = list(documents)
+        return self.create_documents(
+            [doc.page_content for doc in documents], [doc.metadata for doc in documents]
+        )
+
+    def _boundaries(self, text: str, start: int, end: int, level: int) -> List[int]:
+        """Piece boundaries of text[start:end] when split at separator ``level``.
+
+        Each piece after the first begins with its separator; empty pieces
+        are dropped.
+        """
+        if self.separators[level] == "":
+            return list(range(start, end + 1))
+        boundaries = [start]
+        for match in self._patterns[level].finditer(text, start, end):
+            if match.start() != boundaries[-1]:
+                boundaries.append(match.start())
+        boundaries.append(end)
+        return boundaries
+
+    def _split(self, text: str, start: int, end: int, level: int, spans: List[Span]) -> None:
+        """Append the chunk spans of text[start:end], trying separators from ``level``."""
+        # The first separator present in the text is used; "" always matches.
+        # The next levels are only used for pieces that are still too long.
+        separator_level = len(self.separators) - 1
+        next_level = len(self.separators)
+        for index in range(level, len(self.separators)):
+            if self.separators[index] == "":
+                separator_level = index
+                break
+            if self._patterns[index].search(text, start, end):
+                separator_level, next_level = index, index + 1
+                break
+
+        boundaries = self._boundaries(text, start, end, separator_level)
+        if self.length_function is None:
+            lengths = [b - a for a, b in zip(boundaries, boundaries[1:])]
+        else:
+            lengths = [self.length_function(text[a:b]) for a, b in zip(boundaries, boundaries[1:])]
+
+        # Runs of pieces shorter than chunk_size are merged; longer pieces
+        # are split further at the next separator.
+        run_start = 0
+        for piece, length in enumerate(lengths):
+            if length < self.chunk_size:
+                continue
+            if run_start < piece:
+                self._merge(text, boundaries[run_start:piece + 1], lengths[run_start:piece], spans)
+            if next_level < len(self.separators):
+                self._split(text, boundaries[piece], boundaries[piece + 1], next_level, spans)
+            else:
+                spans.append((boundaries[piece], boundaries[piece + 1]))
+            run_start = piece + 1
+        if run_start < len(lengths):
+            self._merge(text, boundaries[run_start:], lengths[run_start:], spans)
+
+    def _merge(self, text: str, boundaries: List[int], lengths: List[int], spans: List[Span]) -> None:
+        """Merge consecutive pieces into chunks with overlap (LangChain's ``_merge_splits``).
+
+        A chunk grows while its total length stays within chunk_size. Before
+        the next one starts, pieces are dropped from the front until the
+        rest is at most chunk_overlap long and leaves room for the next
+        piece (or nothing is left).
+        """
+        totals = [0, *accumulate(lengths)]
+        count = len(lengths)
+        first = 0
+        while True:
+            # Pieces [first, last) fit; piece `last` would overflow.
+            last = bisect_right(totals, totals[first] + self.chunk_size) - 1
+            self._emit(text, boundaries[first], boundaries[last], spans)
+            if last >= count:
+                return
+            first = min(
+                max(
+                    bisect_left(totals, totals[last] - self.chunk_overlap, first),
+                    bisect_left(totals, totals[last + 1] - self.chunk_size, first),
+                ),
+                bisect_left(totals, totals[last], first),
+            )
+
+    @staticmethod
+    def _emit(text: str, start: int, end: int, spans: List[Span]) -> None:
+        """Append a merged chunk's span with surrounding whitespace stripped."""
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            spans.append((start, end))
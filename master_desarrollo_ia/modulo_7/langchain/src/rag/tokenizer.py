@@ -0,0 +1,68 @@
+"""
+Token counting with a cached tiktoken encoding, falling back to an estimate.
+"""
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence
+
+from .embedding_pipeline import estimate_tokens
+
+DEFAULT_ENCODING = "o200k_base"
+
+
+class Tokenizer:
+    """Counts and truncates text in tokens of a tiktoken encoding.
+
+    Without an encoding (tiktoken missing, or its encoding files not
+    downloadable), counts are estimated at 4 characters per token and
+    ``exact`` is False.
+    """
+
+    def __init__(self, encoding: Optional[Any] = None):
+        """Initialize the tokenizer.
+
+        Args:
+            encoding: A ``tiktoken.Encoding`` (None to estimate)
+        """
+        self.encoding = encoding
+        self.exact = encoding is not None
+        self.name = encoding.name if encoding is not None else "estimate"
+
+    def count(self, text: str) -> int:
+        """Number of tokens in ``text``."""
+        if self.encoding is None:
+            return estimate_tokens(text)
+        return len(self.encoding.encode_ordinary(text))
+
+    def count_many(self, texts: Sequence[str]) -> List[int]:
+        """Token counts of several texts (encoded in parallel by tiktoken)."""
+        if self.encoding is None:
+            return [estimate_tokens(text) for text in texts]
+        return [len(tokens) for tokens in self.encoding.encode_ordinary_batch(list(texts))]
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """The longest prefix of ``text`` (at a token boundary) with at most ``max_tokens`` tokens."""
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is None:
+            # The estimate counts len(text) // 4 + 1.
+            return text[:max_tokens * 4 - 1]
+        return self.encoding.decode(self.encoding.encode_ordinary(text)[:max_tokens])
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(model: Optional[str] = None, encoding_name: str = DEFAULT_ENCODING) -> Tokenizer:
+    """The tokenizer of ``model`` (or ``encoding_name``), loaded once per process."""
+    try:
+        import tiktoken
+    except ImportError:
+        return Tokenizer()
+    if model is not None:
+        try:
+            encoding_name = tiktoken.encoding_name_for_model(model)
+        except KeyError:
+            pass
+    try:
+        return Tokenizer(tiktoken.get_encoding(encoding_name))
+    except Exception:
+        # Encoding files are downloaded on first use; offline, estimate.
+        return Tokenizer()
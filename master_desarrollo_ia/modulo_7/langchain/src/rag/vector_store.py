@@ -1,69 +1,1002 @@
 """
-Vector store implementation using LangChain's built-in InMemoryVectorStore for RAG system.
+Vector store implementation for the RAG system, backed by a NumPy embedding matrix.
 """
+import io
+import json
+import mmap
 import os
-from typing import List, Optional, Tuple
+import threading
+import time
+import uuid
+from collections.abc import Sequence as SequenceABC
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
+import numpy as np
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_openai import OpenAIEmbeddings
-from langchain_core.vectorstores import InMemoryVectorStore as LangChainInMemoryVectorStore
+
+from .bm25_index import BM25Index
+from .context_packing import pack_context
+from .dedup import ChunkDeduplicator
+from .embedding_cache import EmbeddingCache
+from .embedding_pipeline import EmbeddingPipeline, ProgressCallback, batched, prefetch
+from .ivf_index import IVFIndex
+from .metadata_index import MetadataFilter, MetadataIndex
+from .query_cache import QueryCache, filter_key
+from .tokenizer import Tokenizer, get_tokenizer
+
+# A filter matching at most this fraction of the rows is searched by
+# scoring only the matching rows rather than the whole matrix.
+PREFILTER_FRACTION = 0.25
+
+# Reciprocal-rank fusion constant: a document ranked r-th (from 1) by a
+# retriever contributes 1 / (RRF_K + r) to its fused score.
+RRF_K = 60
+# Hybrid retrieval fuses this many candidates per k results from each retriever.
+HYBRID_CANDIDATES = 4
+
+# Files written by InMemoryVectorStore.save inside the snapshot directory.
+# The manifest is replaced last: it records how many rows (and bytes of the
+# sidecar) belong to the snapshot, so anything an interrupted save appended
+# after them is ignored, and the embedding model and dimension they were
+# made with, so that load refuses a store using another model.
+VECTORS_FILE = "embeddings.npy"
+DOCUMENTS_FILE = "documents.jsonl"
+DELETED_FILE = "deleted.npy"
+MANIFEST_FILE = "snapshot.json"
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize vectors (rows) in place, leaving zero vectors as they are."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors /= norms
+    return vectors
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, without a full sort."""
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[Document]], k: int = RRF_K) -> List[Tuple[Document, float]]:
+    """Merge rankings of documents (best first) by the sum of 1 / (k + rank), returning (document, fused score).
+    
+    Documents are identified by ``id``, so the same chunk returned by two
+    retrievers is counted once with both contributions.
+    """
+    scores: Dict[str, float] = {}
+    by_id: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            scores[doc.id] = scores.get(doc.id, 0.0) + 1.0 / (k + rank)
+            by_id.setdefault(doc.id, doc)
+    return [(by_id[doc_id], scores[doc_id]) for doc_id in sorted(scores, key=scores.get, reverse=True)]
+
+
+def _check_snapshot_model(path: str, manifest: Dict[str, Any], model_name: str, embeddings: Embeddings) -> None:
+    """Raise ValueError if a snapshot's embeddings were made by another model (or dimension)."""
+    saved_model = manifest.get("embedding_model")
+    if saved_model is not None and saved_model != model_name:
+        raise ValueError(
+            f"Snapshot at {path} was embedded with {saved_model!r}, not {model_name!r}"
+        )
+    saved_dimension = manifest.get("dimension")
+    dimension = getattr(embeddings, "dimensions", None)
+    if saved_dimension is not None and dimension is not None and saved_dimension != dimension:
+        raise ValueError(
+            f"Snapshot at {path} has {saved_dimension}-dimensional embeddings, "
+            f"but the embedding model makes {dimension}-dimensional ones"
+        )
+
+
+def _npy_data_offset(path: str) -> int:
+    """Byte offset of the array data in an ``.npy`` file."""
+    with open(path, "rb") as f:
+        if np.lib.format.read_magic(f) == (1, 0):
+            np.lib.format.read_array_header_1_0(f)
+        else:
+            np.lib.format.read_array_header_2_0(f)
+        return f.tell()
+
+
+def _npy_header(shape: Tuple[int, int]) -> bytes:
+    """Version 1.0 ``.npy`` header of a C-ordered float32 matrix."""
+    header = io.BytesIO()
+    np.lib.format.write_array_header_1_0(
+        header, {"descr": np.lib.format.dtype_to_descr(np.dtype(np.float32)), "fortran_order": False, "shape": shape}
+    )
+    return header.getvalue()
+
+
+def _document_record(doc: Document) -> str:
+    """Serialize a document as one JSON line."""
+    record = {"page_content": doc.page_content, "metadata": doc.metadata}
+    if doc.id is not None:
+        record["id"] = doc.id
+    return json.dumps(record, ensure_ascii=False, default=str) + "\n"
+
+
+class SnapshotDocuments(SequenceABC):
+    """Documents of a loaded snapshot, parsed from the JSONL sidecar on access.
+
+    Loading only memory-maps the sidecar and finds line boundaries, so its
+    cost does not depend on building a ``Document`` per chunk; a search
+    parses just the k documents it returns. Documents added after loading
+    are kept in an ordinary list.
+    """
+    
+    def __init__(self, path: str, size: Optional[int] = None):
+        """Map the JSONL file at ``path`` and index its lines (only those in its first ``size`` bytes, if given)."""
+        with open(path, "rb") as f:
+            file_size = os.fstat(f.fileno()).st_size
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if file_size else b""
+        ends = np.flatnonzero(np.frombuffer(self._data, dtype=np.uint8) == ord("\n"))
+        if size is not None:
+            ends = ends[ends < size]
+        self._starts = np.concatenate(([0], ends[:-1] + 1)) if len(ends) else ends
+        self._ends = ends
+        self._parsed: List[Optional[Document]] = [None] * len(ends)
+        self._added: List[Document] = []
+    
+    def __len__(self) -> int:
+        """Return the number of documents."""
+        return len(self._parsed) + len(self._added)
+    
+    def __getitem__(self, index: Union[int, slice]) -> Union[Document, List[Document]]:
+        """Get a document (or a list for a slice), parsing it on first access."""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index >= len(self._parsed):
+            return self._added[index - len(self._parsed)]
+        doc = self._parsed[index]
+        if doc is None:
+            line = self._data[self._starts[index]:self._ends[index]]
+            doc = self._parsed[index] = Document(**json.loads(line))
+        return doc
+    
+    def __iter__(self) -> Iterator[Document]:
+        """Iterate over all documents in order."""
+        for index in range(len(self)):
+            yield self[index]
+    
+    def extend(self, documents: Iterable[Document]) -> None:
+        """Add documents after the snapshot's own."""
+        self._added.extend(documents)
+    
+    def subset(self, rows: np.ndarray) -> "SnapshotDocuments":
+        """The documents at (increasing) ``rows``, sharing this snapshot's mapping."""
+        subset = SnapshotDocuments.__new__(SnapshotDocuments)
+        snapshot_rows = rows[rows < len(self._parsed)]
+        subset._data = self._data
+        subset._starts = self._starts[snapshot_rows]
+        subset._ends = self._ends[snapshot_rows]
+        subset._parsed = [self._parsed[row] for row in snapshot_rows]
+        subset._added = [self._added[row - len(self._parsed)] for row in rows[len(snapshot_rows):]]
+        return subset
+    
+    def iter_records(self) -> Iterator[Union[bytes, str]]:
+        """JSON lines for all documents, copying unparsed ones verbatim."""
+        for index, doc in enumerate(self._parsed):
+            if doc is None:
+                yield self._data[self._starts[index]:self._ends[index] + 1]
+            else:
+                yield _document_record(doc)
+        for doc in self._added:
+            yield _document_record(doc)
 
 
 class InMemoryVectorStore:
-    """Wrapper around LangChain's InMemoryVectorStore for document retrieval."""
+    """In-memory vector store that keeps every embedding in one NumPy matrix.
+
+    Embeddings are L2-normalized when added and stored as rows of a single
+    contiguous float32 matrix, so cosine similarity against all documents is
+    one matrix-vector product, followed by an ``argpartition`` top-k.
+
+    Passing an ``IVFIndex`` as ``ann_index`` switches searches to approximate
+    mode: only the embeddings in the clusters nearest the query are scored.
+
+    ``save`` writes the matrix as a plain ``.npy`` file and ``load`` maps it
+    back read-only, so a snapshot opens without re-embedding or copying and
+    processes that load the same snapshot share its pages. Saving again to
+    the same directory appends the rows added since and records tombstones
+    rather than compacting, so it costs time proportional to the change.
+
+    With an ``EmbeddingCache``, ``add_documents`` only sends chunks whose
+    text has not been embedded before (by the same model) to the embedder.
+
+    ``add_documents`` skips chunks whose exact text is already stored for
+    the same source (and, with ``near_duplicates=True``, chunks nearly
+    identical to one) before embedding them. Chunks added with
+    ``add_embeddings`` are not filtered, but later ``add_documents`` calls
+    are checked against them.
+
+    Chunks are embedded through an ``EmbeddingPipeline``: token-bounded
+    batches sent concurrently, with backoff on rate limits.
+
+    Documents are grouped by their ``source`` metadata. ``remove_source``
+    and ``upsert_source`` only mark the affected rows as deleted
+    (tombstones, skipped by searches), so their cost depends on the size of
+    that source, not of the store; once ``compact_threshold`` of the rows
+    are tombstones, the matrix is compacted on a background thread while
+    searches go on. Documents are stored as copies (the caller's objects
+    are left alone), and every stored copy gets an ``id`` if it has none.
+
+    Searches take a ``filter`` on metadata ({"source": ..., "page": [1, 2]}),
+    resolved through a ``MetadataIndex`` into a row mask before any
+    similarity is computed, so the k results all match it.
     
-    def __init__(self, embedding_model: str = "text-embedding-3-small", api_key: Optional[str] = None):
-        """Initialize the vector store with an OpenAI embedding model."""
-        import os
+    With a ``BM25Index`` as ``keyword_index``, documents are also indexed
+    by their words as they are added, for ``keyword_search_with_score``.
+    The documents of a loaded snapshot are indexed by the first keyword
+    search instead, so loading does not parse them.
+    
+    ``version`` is incremented whenever the stored documents change (adds,
+    removals, clear; not compactions), so results cached by callers can be
+    checked against it.
+    
+    Every chunk's token count (by ``tokenizer``) is recorded in a row-indexed
+    array when it is added, so building a prompt from retrieved chunks does
+    not tokenize them again (``token_counts``). Counts are not saved with a
+    snapshot: a loaded store counts each chunk the first time it is asked
+    for, with its own tokenizer.
+    """
+    
+    def __init__(
+        self,
+        embedding_model: str = "text-embedding-3-small",
+        api_key: Optional[str] = None,
+        embeddings: Optional[Embeddings] = None,
+        ann_index: Optional[IVFIndex] = None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        deduplicate: bool = True,
+        near_duplicates: bool = False,
+        embedding_pipeline: Optional[EmbeddingPipeline] = None,
+        compact_threshold: float = 0.25,
+        keyword_index: Optional[BM25Index] = None,
+        tokenizer: Optional[Tokenizer] = None
+    ):
+        """Initialize the vector store with an OpenAI embedding model.
         
+        Args:
+            embedding_model: OpenAI embedding model name
+            api_key: OpenAI API key (defaults to the environment)
+            embeddings: Embeddings implementation to use instead of OpenAI
+            ann_index: Approximate index to search with instead of a full scan
+            embedding_cache: Cache consulted before embedding documents
+            deduplicate: Skip chunks whose text is already stored for their source
+            near_duplicates: Also skip chunks nearly identical to a stored one
+            embedding_pipeline: Batching and concurrency settings for embedding
+            compact_threshold: Fraction of deleted rows that triggers a compaction
+            keyword_index: BM25 index kept up to date for keyword search
+            tokenizer: Counts chunk tokens (defaults to get_tokenizer())
+        """
         # Set the API key in environment if provided
         if api_key:
             os.environ["OPENAI_API_KEY"] = api_key
         
-        self.embedding_model = OpenAIEmbeddings(model=embedding_model)
-        self.vector_store: Optional[LangChainInMemoryVectorStore] = None
-        self.documents: List[Document] = []
+        self.embedding_model = embeddings if embeddings is not None else OpenAIEmbeddings(model=embedding_model)
+        # Part of the cache key, so vectors from different models never mix.
+        self.embedding_model_name = getattr(self.embedding_model, "model", None) or type(self.embedding_model).__name__
+        self.embedding_cache = embedding_cache
+        self.embedding_pipeline = embedding_pipeline or EmbeddingPipeline(self.embedding_model)
+        self.deduplicator = ChunkDeduplicator(near_duplicates) if deduplicate or near_duplicates else None
+        self.compact_threshold = compact_threshold
+        self.ann_index = ann_index
+        self.keyword_index = keyword_index
+        self.tokenizer = tokenizer or get_tokenizer()
+        # Writers (adding, removing, compacting) hold _write_lock for their
+        # whole run, and _lock only while they swap or update the arrays,
+        # which searches hold to see a consistent matrix and document list.
+        self._write_lock = threading.RLock()
+        self._lock = threading.RLock()
+        self._compaction: Optional[threading.Thread] = None
+        self.version = 0
+        self.metadata_index = MetadataIndex()
+        self._reset()
+    
+    def _reset(self) -> None:
+        """Empty the matrix, documents and row bookkeeping."""
+        # Documents before this row are known to the deduplicator; the rest
+        # (loaded from a snapshot or added with add_embeddings) are indexed
+        # on the next add_documents call.
+        self._deduplicated_rows = 0
+        self.documents: Union[List[Document], SnapshotDocuments] = []
+        # Rows [0, len(documents)) are in use; the rest is spare capacity so
+        # that adding documents does not copy the whole matrix every time.
+        self._vectors: Optional[np.ndarray] = None
+        # Tombstones: rows of removed documents, left out of searches until
+        # the next compaction drops them.
+        self._deleted = np.zeros(0, dtype=bool)
+        self._deleted_count = 0
+        # Token count per row (-1 until counted) and the row of each
+        # document id: of every added document, but of a loaded snapshot's
+        # only once a search has returned it (so loading parses nothing).
+        self._token_counts = np.zeros(0, dtype=np.int32)
+        self._rows_by_id: Dict[str, int] = {}
+        # Indexed lazily like the deduplicator, so loading a snapshot does
+        # not parse every document.
+        self.metadata_index.reset()
+        # The snapshot last saved or loaded, while its rows still match the
+        # store's: {"path", "rows", "documents_bytes", "data_offset"}.
+        self._snapshot: Optional[Dict[str, Union[str, int]]] = None
+    
+    @property
+    def vectors(self) -> np.ndarray:
+        """The (row count x dimension) matrix of normalized embeddings.
+        
+        Rows of removed documents stay in it until the next compaction.
+        """
+        if self._vectors is None:
+            return np.empty((0, 0), dtype=np.float32)
+        return self._vectors[:len(self.documents)]
+    
+    def add_documents(self, documents: List[Document], progress: Optional[ProgressCallback] = None) -> None:
+        """Embed documents and add them to the vector store.
+        
+        ``progress`` is called with (chunks embedded, chunks to embed) as
+        embedding batches complete.
+        """
+        with self._write_lock:
+            if self.deduplicator is not None:
+                self._sync_deduplicator()
+                documents = self.deduplicator.filter(documents)
+            if not documents:
+                return
+            
+            try:
+                embeddings = self._embed([doc.page_content for doc in documents], progress)
+                self.add_embeddings(documents, embeddings)
+            except Exception:
+                # Not stored after all, so they must not count as duplicates.
+                if self.deduplicator is not None:
+                    self.deduplicator.discard(documents)
+                raise
+            self._deduplicated_rows = len(self.documents)
+    
+    def _sync_deduplicator(self) -> None:
+        """Make the deduplicator aware of rows stored without going through it."""
+        self.deduplicator.add(
+            self.documents[row] for row in range(self._deduplicated_rows, len(self.documents))
+            if not self._deleted[row]
+        )
+        self._deduplicated_rows = len(self.documents)
+    
+    def add_documents_streaming(
+        self,
+        documents: Iterable[Document],
+        batch_size: int = 256,
+        buffer_batches: int = 2,
+        progress: Optional[ProgressCallback] = None
+    ) -> int:
+        """Add documents from a lazy iterable in bounded batches.
+        
+        The iterable is consumed on a background thread at most
+        ``buffer_batches`` batches ahead while the current batch is embedded
+        and indexed, so peak memory depends on ``batch_size``, not on how
+        many documents the stream yields. Returns the number added.
+        
+        Args:
+            documents: Chunks to add, e.g. DocumentProcessor.iter_document(path)
+            batch_size: Chunks embedded and indexed together
+            buffer_batches: Batches read ahead of the one being embedded
+            progress: Called with (chunks processed, None) after each batch
+        """
+        added = processed = 0
+        for batch in prefetch(batched(documents, batch_size), buffer_batches):
+            before = len(self)
+            self.add_documents(batch)
+            added += len(self) - before
+            processed += len(batch)
+            if progress is not None:
+                progress(processed, None)
+        return added
     
-    def add_documents(self, documents: List[Document]) -> None:
-        """Add documents to the vector store."""
+    def _embed(self, texts: List[str], progress: Optional[ProgressCallback] = None) -> List[Sequence[float]]:
+        """Embed texts through the cache, if there is one, and the pipeline."""
+        if self.embedding_cache is None:
+            return self.embedding_pipeline.embed(texts, progress)
+        return self._embed_with_cache(texts, progress)
+    
+    def _embed_with_cache(self, texts: List[str], progress: Optional[ProgressCallback] = None) -> List[Sequence[float]]:
+        """Embed texts, sending only (distinct) cache misses to the embedder."""
+        cache = self.embedding_cache
+        cached = cache.get_many(self.embedding_model_name, texts)
+        misses = list(dict.fromkeys(text for text, vector in zip(texts, cached) if vector is None))
+        if not misses:
+            return cached
+        
+        start = time.perf_counter()
+        computed = self.embedding_pipeline.embed(misses, progress)
+        cache.record_embedding(len(misses), time.perf_counter() - start)
+        cache.set_many(self.embedding_model_name, misses, computed)
+        by_text = dict(zip(misses, computed))
+        return [by_text[text] if vector is None else vector for text, vector in zip(texts, cached)]
+    
+    def add_embeddings(self, documents: List[Document], embeddings: Sequence[Sequence[float]]) -> None:
+        """Add documents whose embeddings have already been computed."""
         if not documents:
             return
         
-        # Store documents
-        self.documents.extend(documents)
+        vectors = normalize_rows(np.array(embeddings, dtype=np.float32, ndmin=2))
+        if len(vectors) != len(documents):
+            raise ValueError("Expected one embedding per document")
+        documents = [
+            Document(id=doc.id or uuid.uuid4().hex, page_content=doc.page_content, metadata=dict(doc.metadata))
+            for doc in documents
+        ]
+        counts = self.tokenizer.count_many([doc.page_content for doc in documents])
         
-        if self.vector_store is None:
-            # Create new vector store
-            self.vector_store = LangChainInMemoryVectorStore(self.embedding_model)
-            self.vector_store.add_documents(documents)
-        else:
-            # Add to existing vector store
-            self.vector_store.add_documents(documents)
+        with self._write_lock, self._lock:
+            start = len(self.documents)
+            self._reserve(start + len(vectors), vectors.shape[1])
+            self._vectors[start:start + len(vectors)] = vectors
+            self._token_counts[start:start + len(vectors)] = counts
+            self.documents.extend(documents)
+            self._rows_by_id.update((doc.id, row) for row, doc in enumerate(documents, start))
+            if self.ann_index is not None:
+                self.ann_index.add(self.vectors, start)
+            if self.keyword_index is not None and self.keyword_index.size == start:
+                self.keyword_index.add(documents, start)
+            self.version += 1
+    
+    def _reserve(self, rows: int, dimension: int) -> None:
+        """Make room for ``rows`` embeddings, growing capacity geometrically."""
+        if self._vectors is None:
+            self._vectors = np.empty((max(rows, 64), dimension), dtype=np.float32)
+            self._deleted = np.zeros(len(self._vectors), dtype=bool)
+            self._token_counts = np.full(len(self._vectors), -1, dtype=np.int32)
+            return
+        
+        capacity, current_dimension = self._vectors.shape
+        if dimension != current_dimension:
+            raise ValueError(
+                f"Embedding dimension {dimension} does not match the store ({current_dimension})"
+            )
+        if rows > capacity:
+            grown = np.empty((max(rows, capacity * 2), dimension), dtype=np.float32)
+            grown[:len(self.documents)] = self.vectors
+            self._vectors = grown
+            self._deleted = np.concatenate((self._deleted, np.zeros(len(grown) - capacity, dtype=bool)))
+            self._token_counts = np.concatenate(
+                (self._token_counts, np.full(len(grown) - capacity, -1, dtype=np.int32))
+            )
+    
+    def _update_metadata_index(self, fields: Iterable[str] = ()) -> None:
+        """Index the rows stored since the last call (and ``fields``) by metadata."""
+        with self._lock:
+            self.metadata_index.update(self.documents, self._deleted, fields)
+    
+    def _source_rows(self, source: str) -> np.ndarray:
+        """Rows of the live documents from ``source``."""
+        with self._lock:
+            self._update_metadata_index(["source"])
+            rows = self.metadata_index.rows("source", source)
+            return rows[~self._deleted[rows]]
     
-    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
-        """Search for similar documents."""
-        if self.vector_store is None:
+    def get_sources(self) -> Dict[str, int]:
+        """Get the number of live documents per source."""
+        with self._lock:
+            self._update_metadata_index(["source"])
+            counts = {
+                source: int(np.count_nonzero(~self._deleted[rows]))
+                for source, rows in self.metadata_index.values("source").items()
+            }
+        return {source: count for source, count in counts.items() if count}
+    
+    def remove_source(self, source: str) -> int:
+        """Remove every document from ``source``, returning how many were removed."""
+        with self._write_lock:
+            rows = self._source_rows(source)
+            if not len(rows):
+                return 0
+            if self.deduplicator is not None:
+                self._sync_deduplicator()
+                self.deduplicator.discard(self.documents[row] for row in rows)
+            self._delete_rows(rows)
+            return len(rows)
+    
+    def upsert_source(
+        self,
+        source: str,
+        documents: Iterable[Document],
+        progress: Optional[ProgressCallback] = None,
+        batch_size: int = 256,
+        buffer_batches: int = 2
+    ) -> int:
+        """Replace the documents from ``source`` with ``documents``.
+        
+        Chunks whose text was already stored for that source keep their
+        embedding; only new or changed chunks are embedded. ``documents``
+        may be a lazy iterable (e.g. DocumentProcessor.iter_document): it is
+        consumed in batches as in ``add_documents_streaming``. The old
+        version stays searchable until the whole new one is stored, and is
+        kept if storing it fails. Returns the number of documents stored
+        for the source.
+        
+        Args:
+            source: Source being replaced (documents without one get it)
+            documents: The source's new chunks
+            progress: Called with (chunks processed, total) after each batch;
+                total is None when ``documents`` has no length
+            batch_size: Chunks embedded and indexed together
+            buffer_batches: Batches read ahead of the one being embedded
+        """
+        total = len(documents) if isinstance(documents, SequenceABC) else None
+        with self._write_lock:
+            old_rows = self._source_rows(source)
+            old_documents = [self.documents[row] for row in old_rows]
+            if self.deduplicator is not None:
+                # The old version must not make the new one look duplicated.
+                self._sync_deduplicator()
+                self.deduplicator.discard(old_documents)
+            reusable = {doc.page_content: row for doc, row in zip(old_documents, old_rows)}
+            first_row = len(self.documents)
+            stored = processed = 0
+            try:
+                for batch in prefetch(batched(documents, batch_size), buffer_batches):
+                    processed += len(batch)
+                    stored += self._upsert_batch(source, batch, reusable)
+                    if progress is not None:
+                        progress(processed, total)
+            except Exception:
+                # Drop the part of the new version stored so far.
+                new_rows = np.arange(first_row, len(self.documents))
+                if self.deduplicator is not None:
+                    self.deduplicator.discard(self.documents[row] for row in new_rows)
+                    self.deduplicator.add(old_documents)
+                if len(new_rows):
+                    self._delete_rows(new_rows)
+                self._deduplicated_rows = len(self.documents)
+                raise
+            self._deduplicated_rows = len(self.documents)
+            self._delete_rows(old_rows)
+            return stored
+    
+    def _upsert_batch(self, source: str, documents: List[Document], reusable: Dict[str, int]) -> int:
+        """Store one batch of ``upsert_source``, reusing the embeddings in ``reusable`` (text -> row)."""
+        for doc in documents:
+            if doc.metadata.get("source", source) != source:
+                raise ValueError(f"Document from {doc.metadata['source']!r} upserted as {source!r}")
+        documents = [
+            doc if "source" in doc.metadata
+            else Document(id=doc.id, page_content=doc.page_content, metadata={**doc.metadata, "source": source})
+            for doc in documents
+        ]
+        if self.deduplicator is not None:
+            documents = self.deduplicator.filter(documents)
+        new_texts = list(dict.fromkeys(
+            doc.page_content for doc in documents if doc.page_content not in reusable
+        ))
+        try:
+            embedded = dict(zip(new_texts, self._embed(new_texts) if new_texts else []))
+            vectors = [
+                self.vectors[reusable[doc.page_content]] if doc.page_content in reusable
+                else embedded[doc.page_content]
+                for doc in documents
+            ]
+            self.add_embeddings(documents, vectors)
+        except Exception:
+            if self.deduplicator is not None:
+                self.deduplicator.discard(documents)
+            raise
+        return len(documents)
+    
+    def _delete_rows(self, rows: np.ndarray) -> None:
+        """Tombstone rows, and compact in the background once there are enough."""
+        with self._lock:
+            self._deleted[rows] = True
+            self._deleted_count += len(rows)
+            self.version += 1
+        if self._deleted_count >= max(1, self.compact_threshold * len(self.documents)):
+            if self._compaction is None or not self._compaction.is_alive():
+                self._compaction = threading.Thread(target=self.compact, name="compaction", daemon=True)
+                self._compaction.start()
+    
+    def wait_for_compaction(self) -> None:
+        """Block until a running background compaction is done."""
+        if self._compaction is not None:
+            self._compaction.join()
+    
+    def compact(self) -> None:
+        """Drop the rows of removed documents from the matrix and renumber the rest.
+        
+        The live rows are copied while only writers wait; searches keep
+        using the old matrix until the new one is swapped in.
+        """
+        with self._write_lock:
+            if not self._deleted_count:
+                return
+            rows = len(self.documents)
+            deleted = self._deleted[:rows]
+            keep = np.flatnonzero(~deleted)
+            vectors = np.empty((max(len(keep), 64), self._vectors.shape[1]), dtype=np.float32)
+            np.take(self.vectors, keep, axis=0, out=vectors[:len(keep)])
+            if isinstance(self.documents, SnapshotDocuments):
+                documents = self.documents.subset(keep)
+            else:
+                documents = [self.documents[row] for row in keep]
+            # Old row -> new row (-1 for removed rows).
+            mapping = np.full(rows, -1, dtype=np.int64)
+            mapping[keep] = np.arange(len(keep))
+            
+            with self._lock:
+                # Rows are renumbered: the next save rewrites the snapshot.
+                self._snapshot = None
+                token_counts = np.full(len(vectors), -1, dtype=np.int32)
+                token_counts[:len(keep)] = self._token_counts[keep]
+                self._vectors = vectors
+                self.documents = documents
+                self._token_counts = token_counts
+                self._deduplicated_rows = int(np.count_nonzero(~deleted[:self._deduplicated_rows]))
+                self._rows_by_id = {
+                    doc_id: int(mapping[row]) for doc_id, row in self._rows_by_id.items() if mapping[row] >= 0
+                }
+                self.metadata_index.remap(mapping)
+                self._deleted = np.zeros(len(vectors), dtype=bool)
+                self._deleted_count = 0
+                if self.ann_index is not None:
+                    self.ann_index.remap(mapping)
+                if self.keyword_index is not None:
+                    self.keyword_index.remap(mapping)
+    
+    def token_counts(self, documents: Sequence[Document]) -> List[int]:
+        """Token counts of stored ``documents`` (as returned by searches).
+        
+        Counts recorded when the documents were added are looked up by id;
+        the rest (e.g. documents of a loaded snapshot) are counted now and
+        recorded for next time. Only the given documents are looked up.
+        """
+        with self._lock:
+            rows = [self._rows_by_id.get(doc.id, -1) for doc in documents]
+            counts = [int(self._token_counts[row]) if row >= 0 else -1 for row in rows]
+        
+        missing = [i for i, count in enumerate(counts) if count < 0]
+        if missing:
+            for i, count in zip(missing, self.tokenizer.count_many([documents[i].page_content for i in missing])):
+                counts[i] = count
+            with self._lock:
+                for i in missing:
+                    # Rows are renumbered by compactions: check the id still maps there.
+                    if rows[i] >= 0 and self._rows_by_id.get(documents[i].id) == rows[i]:
+                        self._token_counts[rows[i]] = counts[i]
+        return counts
+    
+    def embed_query(self, query: str) -> np.ndarray:
+        """Embed and normalize a query."""
+        return normalize_rows(np.array(self.embedding_model.embed_query(query), dtype=np.float32))
+    
+    def _filter_mask(self, metadata_filter: Optional[MetadataFilter]) -> Optional[np.ndarray]:
+        """Mask of the rows matching a metadata filter (None without a filter)."""
+        if not metadata_filter:
+            return None
+        self._update_metadata_index(metadata_filter.keys())
+        return self.metadata_index.mask(metadata_filter, len(self.documents))
+    
+    def _live_mask(self, mask: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """``mask`` without the deleted rows (None if every row is allowed)."""
+        if not self._deleted_count:
+            return mask
+        live = ~self._deleted[:len(self.documents)]
+        return live if mask is None else np.logical_and(mask, live, out=live)
+    
+    def _search_vector(
+        self,
+        vector: np.ndarray,
+        k: int,
+        exact: bool = False,
+        mask: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        """Return (row, cosine similarity) pairs for the top-k live documents within ``mask``."""
+        rows = len(self.documents)
+        mask = self._live_mask(mask)
+        allowed = rows if mask is None else int(np.count_nonzero(mask))
+        k = min(k, allowed)
+        if k <= 0:
             return []
         
-        return self.vector_store.similarity_search(query, k=k)
+        use_ann = not exact and self.ann_index is not None and self.ann_index.is_trained
+        if use_ann:
+            # Rows an approximate search scores anyway.
+            prefilter_limit = rows * min(1.0, self.ann_index.nprobe / len(self.ann_index.centroids))
+        else:
+            prefilter_limit = rows * PREFILTER_FRACTION
+        
+        if mask is not None and allowed <= prefilter_limit:
+            # Selective filter: score only the matching rows, exactly.
+            candidates = np.flatnonzero(mask)
+        elif use_ann:
+            candidates = self.ann_index.candidates(vector)
+            if mask is not None:
+                candidates = candidates[mask[candidates]]
+                if len(candidates) < k:
+                    candidates = np.flatnonzero(mask)
+        else:
+            scores = self.vectors @ vector
+            if mask is not None:
+                scores[~mask] = -np.inf
+            top = top_k_indices(scores, k)
+            return [(int(row), float(scores[row])) for row in top]
+        
+        scores = self.vectors[candidates] @ vector
+        best = top_k_indices(scores, k)
+        return [(int(candidates[i]), float(scores[i])) for i in best]
     
-    def similarity_search_with_score(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
-        """Search for similar documents with relevance scores."""
-        if self.vector_store is None:
+    def _search_documents(
+        self,
+        vector: np.ndarray,
+        k: int,
+        exact: bool = False,
+        metadata_filter: Optional[MetadataFilter] = None
+    ) -> List[Tuple[Document, float]]:
+        """Return (document, cosine similarity) pairs for the top-k documents."""
+        with self._lock:
+            mask = self._filter_mask(metadata_filter)
+            return self._hits(self._search_vector(vector, k, exact, mask))
+    
+    def _hits(self, rows_and_scores: List[Tuple[int, float]]) -> List[Tuple[Document, float]]:
+        """(document, score) pairs of search hits, noting each document's row for ``token_counts``."""
+        hits = []
+        for row, score in rows_and_scores:
+            doc = self.documents[row]
+            if doc.id is not None:
+                self._rows_by_id[doc.id] = row
+            hits.append((doc, score))
+        return hits
+    
+    def _search(
+        self,
+        query: str,
+        k: int,
+        metadata_filter: Optional[MetadataFilter] = None
+    ) -> List[Tuple[Document, float]]:
+        """Embed the query and return its top-k (document, score) pairs."""
+        if len(self) == 0 or k <= 0:
             return []
+        return self._search_documents(self.embed_query(query), k, metadata_filter=metadata_filter)
+    
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[MetadataFilter] = None) -> List[Document]:
+        """Search for similar documents, optionally only among those matching ``filter``."""
+        return [doc for doc, _ in self._search(query, k, filter)]
+    
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[MetadataFilter] = None
+    ) -> List[Tuple[Document, float]]:
+        """Search for similar documents with relevance scores (cosine similarity)."""
+        return self._search(query, k, filter)
+    
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: Sequence[float],
+        k: int = 4,
+        exact: bool = False,
+        filter: Optional[MetadataFilter] = None
+    ) -> List[Tuple[Document, float]]:
+        """Search with an embedding; ``exact`` bypasses the approximate index."""
+        vector = normalize_rows(np.array(embedding, dtype=np.float32))
+        return self._search_documents(vector, k, exact, filter)
+    
+    def keyword_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[MetadataFilter] = None
+    ) -> List[Tuple[Document, float]]:
+        """Rank documents by BM25 score for the query's words (no embedding involved).
         
-        return self.vector_store.similarity_search_with_score(query, k=k)
+        Only documents containing at least one query word are returned.
+        """
+        if self.keyword_index is None:
+            raise ValueError("Keyword search needs a store created with a keyword_index")
+        if k <= 0:
+            return []
+        with self._lock:
+            self._update_keyword_index()
+            mask = self._live_mask(self._filter_mask(filter))
+            return self._hits(self.keyword_index.search(query, k, mask))
+    
+    def _update_keyword_index(self) -> None:
+        """Index the rows the keyword index has not seen (a loaded snapshot's)."""
+        start = self.keyword_index.size
+        if start < len(self.documents):
+            self.keyword_index.add(self.documents[start:], start)
     
     def clear(self) -> None:
         """Clear all documents from the vector store."""
-        if self.vector_store is not None:
-            # Create a new empty vector store
-            self.vector_store = LangChainInMemoryVectorStore(self.embedding_model)
-        self.documents = []
+        with self._write_lock, self._lock:
+            self._reset()
+            self.version += 1
+            if self.ann_index is not None:
+                self.ann_index.reset()
+            if self.keyword_index is not None:
+                self.keyword_index.reset()
+            if self.deduplicator is not None:
+                self.deduplicator.reset()
+    
+    def save(self, path: str) -> None:
+        """Write the store to directory ``path`` (embeddings, JSONL sidecar, tombstones).
+        
+        Removed documents are saved as tombstones, not compacted away. If
+        ``path`` holds the snapshot this store last saved or loaded and no
+        compaction has renumbered the rows since, only the rows added since
+        are appended and the tombstones rewritten; otherwise the snapshot is
+        written whole.
+        """
+        with self._write_lock:
+            if self._can_append(path):
+                self._append(path)
+            else:
+                self._save(path)
+    
+    def _can_append(self, path: str) -> bool:
+        """Whether ``path`` still holds the rows of ``_snapshot``, unchanged."""
+        snapshot = self._snapshot
+        if snapshot is None or snapshot["path"] != os.path.abspath(path) or not snapshot["rows"]:
+            return False
+        try:
+            with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return (
+            manifest.get("rows") == snapshot["rows"]
+            and manifest.get("documents_bytes") == snapshot["documents_bytes"]
+            and len(_npy_header((len(self.documents), self._vectors.shape[1]))) == snapshot["data_offset"]
+        )
+    
+    def _save(self, path: str) -> None:
+        """Write the whole matrix and documents."""
+        os.makedirs(path, exist_ok=True)
+        vectors_path = os.path.join(path, VECTORS_FILE)
+        documents_path = os.path.join(path, DOCUMENTS_FILE)
+        
+        # Write both files under temporary names first so that readers (and
+        # a store memory-mapping the old snapshot) never see a partial file.
+        with open(vectors_path + ".tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(self.vectors))
+        if isinstance(self.documents, SnapshotDocuments):
+            records = self.documents.iter_records()
+        else:
+            records = map(_document_record, self.documents)
+        documents_bytes = 0
+        with open(documents_path + ".tmp", "wb") as f:
+            for record in records:
+                documents_bytes += f.write(record if isinstance(record, bytes) else record.encode("utf-8"))
+        # The old manifest does not describe the new files.
+        if os.path.exists(os.path.join(path, MANIFEST_FILE)):
+            os.remove(os.path.join(path, MANIFEST_FILE))
+        os.replace(vectors_path + ".tmp", vectors_path)
+        os.replace(documents_path + ".tmp", documents_path)
+        self._commit(path, documents_bytes, _npy_data_offset(vectors_path))
+    
+    def _append(self, path: str) -> None:
+        """Append the rows added since ``_snapshot`` to its files and commit."""
+        snapshot = self._snapshot
+        saved_rows, rows = snapshot["rows"], len(self.documents)
+        documents_bytes = snapshot["documents_bytes"]
+        if rows > saved_rows:
+            dimension = self._vectors.shape[1]
+            with open(os.path.join(path, VECTORS_FILE), "r+b") as f:
+                # Drop whatever an interrupted save left after the snapshot.
+                f.truncate(snapshot["data_offset"] + saved_rows * dimension * 4)
+                f.seek(0, os.SEEK_END)
+                f.write(np.ascontiguousarray(self.vectors[saved_rows:]).tobytes())
+                # The header is padded, so the new row count fits in place.
+                f.seek(0)
+                f.write(_npy_header((rows, dimension)))
+            with open(os.path.join(path, DOCUMENTS_FILE), "r+b") as f:
+                f.truncate(documents_bytes)
+                f.seek(0, os.SEEK_END)
+                for row in range(saved_rows, rows):
+                    documents_bytes += f.write(_document_record(self.documents[row]).encode("utf-8"))
+        self._commit(path, documents_bytes, snapshot["data_offset"])
+    
+    def _commit(self, path: str, documents_bytes: int, data_offset: int) -> None:
+        """Write the tombstones, then the manifest that makes the snapshot current."""
+        rows = len(self.documents)
+        deleted_path = os.path.join(path, DELETED_FILE)
+        with open(deleted_path + ".tmp", "wb") as f:
+            np.save(f, np.packbits(self._deleted[:rows]))
+        os.replace(deleted_path + ".tmp", deleted_path)
+        manifest_path = os.path.join(path, MANIFEST_FILE)
+        with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({
+                "rows": rows,
+                "documents_bytes": documents_bytes,
+                "embedding_model": self.embedding_model_name,
+                "dimension": self._vectors.shape[1] if self._vectors is not None else None,
+            }, f)
+        os.replace(manifest_path + ".tmp", manifest_path)
+        self._snapshot = {
+            "path": os.path.abspath(path),
+            "rows": rows,
+            "documents_bytes": documents_bytes,
+            "data_offset": data_offset,
+        }
+    
+    @classmethod
+    def load(
+        cls,
+        path: str,
+        embedding_model: str = "text-embedding-3-small",
+        api_key: Optional[str] = None,
+        embeddings: Optional[Embeddings] = None,
+        ann_index: Optional[IVFIndex] = None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        mmap: bool = True,
+        keyword_index: Optional[BM25Index] = None,
+        tokenizer: Optional[Tokenizer] = None
+    ) -> "InMemoryVectorStore":
+        """Open a snapshot written by ``save``, with its tombstones.
+        
+        Args:
+            path: Snapshot directory
+            embedding_model: OpenAI embedding model name (must match the snapshot's,
+                as must the model's dimensions if it sets them; ValueError otherwise)
+            api_key: OpenAI API key (defaults to the environment)
+            embeddings: Embeddings implementation to use instead of OpenAI
+            ann_index: Approximate index, rebuilt from the loaded embeddings
+            embedding_cache: Cache consulted before embedding documents
+            mmap: Memory-map the embeddings read-only instead of reading them
+            keyword_index: BM25 index, built from the loaded documents by the first keyword search
+            tokenizer: Counts chunk tokens (defaults to get_tokenizer())
+        """
+        store = cls(
+            embedding_model, api_key, embeddings, ann_index, embedding_cache,
+            keyword_index=keyword_index, tokenizer=tokenizer
+        )
+        vectors_path = os.path.join(path, VECTORS_FILE)
+        vectors = np.load(vectors_path, mmap_mode="r" if mmap else None)
+        manifest_path = os.path.join(path, MANIFEST_FILE)
+        manifest = None
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            # Rows an interrupted save wrote past the manifest are not part of the snapshot.
+            vectors = vectors[:manifest["rows"]]
+            _check_snapshot_model(path, manifest, store.embedding_model_name, store.embedding_model)
+        documents = SnapshotDocuments(
+            os.path.join(path, DOCUMENTS_FILE), manifest["documents_bytes"] if manifest else None
+        )
+        if len(vectors) != len(documents) or (manifest and len(vectors) != manifest["rows"]):
+            raise ValueError(
+                f"Snapshot at {path} has {len(vectors)} embeddings for {len(documents)} documents"
+            )
+        
+        if len(documents):
+            # A plain ndarray view of the mapping: no copy. The first
+            # add_documents call grows the matrix into private memory.
+            store._vectors = np.asarray(vectors)
+            store._deleted = np.zeros(len(vectors), dtype=bool)
+            store._token_counts = np.full(len(vectors), -1, dtype=np.int32)
+            store.documents = documents
+            deleted_path = os.path.join(path, DELETED_FILE)
+            if manifest and os.path.exists(deleted_path):
+                store._deleted[:] = np.unpackbits(np.load(deleted_path), count=len(vectors)).astype(bool)
+                store._deleted_count = int(np.count_nonzero(store._deleted))
+            if ann_index is not None:
+                ann_index.add(store.vectors, 0)
+        if manifest:
+            store._snapshot = {
+                "path": os.path.abspath(path),
+                "rows": manifest["rows"],
+                "documents_bytes": manifest["documents_bytes"],
+                "data_offset": _npy_data_offset(vectors_path),
+            }
+        return store
     
     def get_document_count(self) -> int:
         """Get the number of documents in the store."""
-        return len(self.documents)
+        return len(self.documents) - self._deleted_count
     
     def __len__(self) -> int:
         """Return the number of documents in the store."""
@@ -71,52 +1004,157 @@ class InMemoryVectorStore:
 
 
 class RAGRetriever:
-    """RAG retriever that combines vector search with relevance filtering."""
+    """RAG retriever that combines vector search with relevance filtering.
+    
+    ``mode`` selects the ranking: "dense" (embedding similarity), "sparse"
+    (BM25 over the store's ``keyword_index``) or "hybrid", which fuses both
+    rankings with reciprocal-rank fusion so that chunks matching exact
+    identifiers or rare terms are found even when their embedding is not
+    among the closest. Sparse and hybrid modes need a store created with a
+    ``keyword_index``.
+    
+    With a ``QueryCache``, a repeated query reuses its embedding (no call to
+    the embedding API) and, while the store's ``version`` is unchanged, its
+    results (no search at all).
+    """
     
-    def __init__(self, vector_store: InMemoryVectorStore, min_score: float = 0.3):
+    MODES = ("dense", "sparse", "hybrid")
+    
+    def __init__(
+        self,
+        vector_store: InMemoryVectorStore,
+        min_score: float = 0.3,
+        mode: str = "dense",
+        rrf_k: int = RRF_K,
+        cache: Optional[QueryCache] = None
+    ):
         """Initialize the RAG retriever.
         
         Args:
             vector_store: The vector store to retrieve from
             min_score: Minimum similarity score (0-1, higher is more similar for cosine similarity)
+            mode: Default ranking, one of "dense", "sparse" or "hybrid"
+            rrf_k: Reciprocal-rank fusion constant for hybrid retrieval
+            cache: Cache of query embeddings and results
         """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown retrieval mode {mode!r}, expected one of {self.MODES}")
         self.vector_store = vector_store
         self.min_score = min_score
+        self.mode = mode
+        self.rrf_k = rrf_k
+        self.cache = cache
     
-    def retrieve(self, query: str, k: int = 4) -> List[Document]:
-        """Retrieve relevant documents for a query."""
+    def retrieve(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[MetadataFilter] = None,
+        mode: Optional[str] = None
+    ) -> List[Document]:
+        """Retrieve relevant documents for a query, optionally restricted by a metadata ``filter``.
+        
+        ``mode`` overrides the retriever's default ranking for this call.
+        """
+        return [doc for doc, _ in self.retrieve_with_scores(query, k, filter, mode)]
+    
+    def retrieve_with_scores(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[MetadataFilter] = None,
+        mode: Optional[str] = None
+    ) -> List[Tuple[Document, float]]:
+        """Like ``retrieve``, with each document's score in its ranking.
+        
+        Scores are cosine similarities (dense), BM25 scores (sparse) or
+        fused reciprocal-rank scores (hybrid).
+        """
+        mode = mode or self.mode
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown retrieval mode {mode!r}, expected one of {self.MODES}")
+        if self.cache is None:
+            return self._retrieve(query, k, filter, mode)
+        
+        key = (mode, query, k, filter_key(filter))
+        try:
+            hash(key)
+        except TypeError:
+            # Unhashable filter values: not cacheable.
+            return self._retrieve(query, k, filter, mode)
+        # Read before searching: if the store changes meanwhile, the entry
+        # is already stale.
+        version = self.vector_store.version
+        cached = self.cache.results.get(key, version)
+        if cached is not None:
+            return list(cached)
+        results = self._retrieve(query, k, filter, mode)
+        self.cache.results.put(key, tuple(results), version)
+        return results
+    
+    def _retrieve(
+        self,
+        query: str,
+        k: int,
+        filter: Optional[MetadataFilter],
+        mode: str
+    ) -> List[Tuple[Document, float]]:
+        """Search the store for ``retrieve_with_scores``."""
+        if mode == "sparse":
+            return self.vector_store.keyword_search_with_score(query, k=k, filter=filter)
+        
         # Get documents with scores
-        docs_with_scores = self.vector_store.similarity_search_with_score(query, k=k)
+        fetch = k * HYBRID_CANDIDATES if mode == "hybrid" else k
+        docs_with_scores = self._dense_search(query, fetch, filter)
         
         # Filter by minimum score (higher scores are better in cosine similarity)
-        filtered_docs = [
-            doc for doc, score in docs_with_scores 
+        filtered = [
+            (doc, score) for doc, score in docs_with_scores 
             if score >= self.min_score
         ]
         
-        return filtered_docs if filtered_docs else [doc for doc, _ in docs_with_scores[:k//2]]
-    
-    def get_context(self, query: str, max_tokens: int = 2000) -> str:
-        """Get context string for the query, respecting token limits."""
-        relevant_docs = self.retrieve(query)
-        
-        context_parts = []
-        current_length = 0
+        if mode == "hybrid":
+            keyword_docs = [
+                doc for doc, _ in self.vector_store.keyword_search_with_score(query, k=fetch, filter=filter)
+            ]
+            filtered = reciprocal_rank_fusion([[doc for doc, _ in filtered], keyword_docs], self.rrf_k)[:k]
         
-        for doc in relevant_docs:
-            content = doc.page_content
-            # Rough token estimation (1 token ≈ 4 characters)
-            content_tokens = len(content) // 4
-            
-            if current_length + content_tokens > max_tokens:
-                # Truncate the last document if needed
-                remaining_tokens = max_tokens - current_length
-                remaining_chars = remaining_tokens * 4
-                content = content[:remaining_chars] + "..."
-                context_parts.append(content)
-                break
-            
-            context_parts.append(content)
-            current_length += content_tokens
+        return filtered if filtered else docs_with_scores[:k//2]
+    
+    def _dense_search(self, query: str, k: int, filter: Optional[MetadataFilter]) -> List[Tuple[Document, float]]:
+        """Similarity search, embedding the query through the cache if there is one."""
+        if self.cache is None:
+            return self.vector_store.similarity_search_with_score(query, k=k, filter=filter)
+        if len(self.vector_store) == 0 or k <= 0:
+            return []
+        key = (self.vector_store.embedding_model_name, query)
+        vector = self.cache.embeddings.get(key)
+        if vector is None:
+            vector = self.vector_store.embed_query(query)
+            self.cache.embeddings.put(key, vector)
+        return self.vector_store.similarity_search_by_vector_with_score(vector, k, filter=filter)
+    
+    def get_context(
+        self,
+        query: str,
+        max_tokens: int = 2000,
+        filter: Optional[MetadataFilter] = None,
+        k: int = 4
+    ) -> str:
+        """Get context string for the query, respecting token limits.
         
-        return "\n\n---\n\n".join(context_parts)
+        Of the top ``k`` chunks, the set with the highest total score whose
+        exact token count (separators included) fits ``max_tokens`` is
+        kept, in rank order; chunks are never cut (see ``pack_context``).
+        """
+        results = self.retrieve_with_scores(query, k=k, filter=filter)
+        documents = [doc for doc, _ in results]
+        # Every retrieved chunk is worth including if it fits, even one
+        # with a zero or negative similarity.
+        return pack_context(
+            documents,
+            [max(score, 1e-6) for _, score in results],
+            max_tokens,
+            self.vector_store.tokenizer,
+            self.vector_store.token_counts(documents),
+        )
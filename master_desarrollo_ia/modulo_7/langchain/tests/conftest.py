@@ -0,0 +1,59 @@
+"""
+Shared fixtures: a store whose embeddings need no API.
+"""
+import hashlib
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from rag.vector_store import InMemoryVectorStore  # noqa: E402
+
+_WORD = re.compile(r"\w+")
+
+
+class WordEmbeddings(Embeddings):
+    """Bag-of-words vectors (words hashed into ``dim`` buckets), counting the texts embedded.
+
+    Texts sharing words are similar, so searches return what a reader
+    would expect without calling an embedding API.
+    """
+
+    def __init__(self, dim: int = 64):
+        self.dim = dim
+        self.embedded = 0
+
+    def _vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in _WORD.findall(text.lower()):
+            bucket = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=4).digest(), "little")
+            vector[bucket % self.dim] += 1.0
+        return vector
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+def chunk(text: str, source: str, **metadata) -> Document:
+    """A chunk from ``source``."""
+    return Document(page_content=text, metadata={"source": source, **metadata})
+
+
+@pytest.fixture
+def embeddings():
+    return WordEmbeddings()
+
+
+@pytest.fixture
+def store(embeddings):
+    return InMemoryVectorStore(embeddings=embeddings)
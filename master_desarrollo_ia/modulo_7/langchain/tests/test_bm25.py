@@ -0,0 +1,132 @@
+"""
+BM25 keyword index, reciprocal-rank fusion and hybrid retrieval.
+"""
+import math
+
+import numpy as np
+import pytest
+from conftest import chunk
+from langchain_core.documents import Document
+
+from rag.bm25_index import BM25Index, tokenize
+from rag.vector_store import InMemoryVectorStore, RAGRetriever, reciprocal_rank_fusion
+
+TEXTS = [
+    "the quick brown fox",
+    "the lazy dog sleeps",
+    "quick quick fox jumps over the dog",
+    "error E4521 disk quota exceeded",
+    "",
+]
+
+
+def reference_scores(texts, query, k1=1.5, b=0.75):
+    """BM25 scores computed term by term from the formula."""
+    docs = [tokenize(text) for text in texts]
+    average_length = sum(map(len, docs)) / len(docs)
+    scores = []
+    for words in docs:
+        score = 0.0
+        for term in dict.fromkeys(tokenize(query)):
+            df = sum(term in other for other in docs)
+            tf = words.count(term)
+            if not tf:
+                continue
+            idf = math.log(1.0 + (len(docs) - df + 0.5) / (df + 0.5))
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(words) / average_length))
+        scores.append(score)
+    return scores
+
+
+def index_of(texts, batches=1):
+    index = BM25Index()
+    bounds = np.linspace(0, len(texts), batches + 1).astype(int)
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        index.add([Document(page_content=text) for text in texts[start:end]], int(start))
+    return index
+
+
+@pytest.mark.parametrize("batches", [1, 3])
+@pytest.mark.parametrize("query", ["quick fox", "the dog", "E4521", "fox fox unknown", "nothing"])
+def test_scores_match_the_formula(query, batches):
+    np.testing.assert_allclose(
+        index_of(TEXTS, batches).scores(query), reference_scores(TEXTS, query), rtol=1e-5, atol=1e-6
+    )
+
+
+def test_search_ranks_within_the_mask():
+    index = index_of(TEXTS)
+    scores = reference_scores(TEXTS, "quick fox")
+    assert [row for row, _ in index.search("quick fox", k=5)] == sorted((0, 2), key=lambda row: -scores[row])
+    mask = np.array([True, True, False, True, True])
+    assert [row for row, _ in index.search("quick fox", k=5, mask=mask)] == [0]
+    assert index.search("nothing", k=5) == []
+
+
+def test_rows_must_be_added_in_order():
+    index = index_of(TEXTS[:2])
+    with pytest.raises(ValueError):
+        index.add([Document(page_content="late")], 3)
+
+
+def test_remap_matches_an_index_of_the_kept_rows():
+    index = index_of(TEXTS, batches=2)
+    mapping = np.array([0, -1, 1, -1, 2])
+    index.remap(mapping)
+    kept = [TEXTS[0], TEXTS[2], TEXTS[4]]
+    for query in ["quick fox", "the dog", "E4521"]:
+        np.testing.assert_allclose(index.scores(query), reference_scores(kept, query), rtol=1e-5, atol=1e-6)
+    index.add([Document(page_content="a dog again")], 3)
+    assert [row for row, _ in index.search("dog", k=5)] == [3, 1]
+
+
+def test_reciprocal_rank_fusion_merges_by_id():
+    a, b, c = (Document(id=name, page_content=name) for name in "abc")
+    fused = reciprocal_rank_fusion([[a, b], [Document(id="b", page_content="b"), c]], k=60)
+    assert [doc.id for doc, _ in fused] == ["b", "a", "c"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
+    assert fused[1][1] == pytest.approx(1 / 61)
+
+
+@pytest.fixture
+def hybrid_store(embeddings):
+    store = InMemoryVectorStore(embeddings=embeddings, keyword_index=BM25Index(), compact_threshold=1.0)
+    store.add_documents(
+        [chunk(f"what does this error message mean, part {i}", "faq.md") for i in range(2)]
+        + [chunk("E4521 disk quota exceeded", "codes.md")]
+        + [chunk(f"meeting notes from week {i}", "notes.md") for i in range(8)]
+    )
+    return store
+
+
+def test_hybrid_retrieval_finds_an_identifier(hybrid_store):
+    retriever = RAGRetriever(hybrid_store, min_score=0.3)
+    query = "what does error E4521 mean"
+    assert "E4521 disk quota exceeded" not in [doc.page_content for doc in retriever.retrieve(query, k=3)]
+    assert "E4521 disk quota exceeded" in [doc.page_content for doc in retriever.retrieve(query, k=3, mode="sparse")]
+    assert "E4521 disk quota exceeded" in [doc.page_content for doc in retriever.retrieve(query, k=3, mode="hybrid")]
+
+
+def test_keyword_search_skips_removed_and_compacted_rows(hybrid_store):
+    hybrid_store.remove_source("codes.md")
+    assert hybrid_store.keyword_search_with_score("E4521") == []
+    hybrid_store.compact()
+    hybrid_store.add_documents([chunk("E4521 quota raised", "codes.md")])
+    hits = hybrid_store.keyword_search_with_score("E4521")
+    assert [doc.page_content for doc, _ in hits] == ["E4521 quota raised"]
+    assert len(hybrid_store.keyword_search_with_score("notes", k=20)) == 8
+
+
+def test_loaded_snapshot_is_keyword_indexed_on_first_search(hybrid_store, embeddings, tmp_path):
+    hybrid_store.save(str(tmp_path))
+    loaded = InMemoryVectorStore.load(str(tmp_path), embeddings=embeddings, keyword_index=BM25Index())
+    assert loaded.keyword_index.size == 0
+    assert not any(doc is not None for doc in loaded.documents._parsed)
+
+    loaded.add_documents([chunk("E4521 was raised again", "codes_2.md")])
+    loaded.remove_source("notes.md")
+    loaded.compact()
+    hits = loaded.keyword_search_with_score("E4521", k=5)
+    assert sorted(doc.page_content for doc, _ in hits) == ["E4521 disk quota exceeded", "E4521 was raised again"]
+    assert loaded.keyword_index.size == len(loaded.documents)
+    assert loaded.keyword_search_with_score("notes") == []
@@ -0,0 +1,92 @@
+"""
+Context packing: token budgets and the counts the store records.
+"""
+import random
+
+from conftest import chunk
+from rag.context_packing import CONTEXT_SEPARATOR, pack, pack_context
+from rag.tokenizer import Tokenizer
+from rag.vector_store import InMemoryVectorStore, RAGRetriever
+
+
+def brute_force(counts, relevances, budget, separator_tokens):
+    """Best total relevance over every subset that fits."""
+    best = 0.0
+    for mask in range(1 << len(counts)):
+        chosen = [i for i in range(len(counts)) if mask >> i & 1]
+        cost = sum(counts[i] for i in chosen) + max(0, len(chosen) - 1) * separator_tokens
+        if cost <= budget:
+            best = max(best, sum(relevances[i] for i in chosen))
+    return best
+
+
+def test_pack_is_optimal_and_within_budget():
+    rng = random.Random(0)
+    for _ in range(150):
+        n = rng.randint(1, 13)
+        counts = [rng.randint(1, 400) for _ in range(n)]
+        relevances = [rng.uniform(0.0, 1.0) for _ in range(n)]
+        budget = rng.randint(0, 1200)
+        chosen = pack(counts, relevances, budget, separator_tokens=3)
+        assert chosen == sorted(set(chosen))
+        assert sum(counts[i] for i in chosen) + 3 * max(0, len(chosen) - 1) <= budget
+        assert abs(sum(relevances[i] for i in chosen) - brute_force(counts, relevances, budget, 3)) < 1e-9
+
+
+def test_pack_context_fits_budget():
+    tokenizer = Tokenizer()
+    documents = [chunk("word " * size, "a.txt") for size in (120, 300, 80, 500, 40)]
+    for max_tokens in (0, 50, 200, 400, 800):
+        context = pack_context(documents, [0.9, 0.8, 0.7, 0.6, 0.5], max_tokens, tokenizer)
+        assert context == "" or tokenizer.count(context) <= max_tokens
+        # Whole chunks, never cut, unless not even one fits.
+        parts = context.split(CONTEXT_SEPARATOR) if context else []
+        if len(parts) > 1:
+            assert all(part in {doc.page_content for doc in documents} for part in parts)
+
+
+def test_store_records_token_counts_without_touching_documents(store):
+    documents = [chunk("alpha beta gamma " * 20, "a.txt"), chunk("delta " * 7, "a.txt")]
+    store.add_documents(documents)
+    assert all(doc.id is None and set(doc.metadata) == {"source"} for doc in documents)
+
+    stored = store.similarity_search("alpha beta", k=2)
+    assert all("token_count" not in doc.metadata for doc in stored)
+    assert store.token_counts(stored) == [store.tokenizer.count(doc.page_content) for doc in stored]
+
+
+def test_loaded_snapshot_counts_with_its_own_tokenizer(store, embeddings, tmp_path):
+    store.add_documents([chunk("some words to count " * 10, "a.txt")])
+    store.save(str(tmp_path))
+
+    class DoubleTokenizer(Tokenizer):
+        def count(self, text):
+            return 2 * super().count(text)
+
+        def count_many(self, texts):
+            return [self.count(text) for text in texts]
+
+    loaded = InMemoryVectorStore.load(str(tmp_path), embeddings=embeddings, tokenizer=DoubleTokenizer())
+    [doc] = loaded.similarity_search("words", k=1)
+    assert loaded.token_counts([doc]) == [2 * Tokenizer().count(doc.page_content)]
+
+
+def test_counting_after_load_parses_only_the_retrieved_documents(store, embeddings, tmp_path):
+    store.add_documents([chunk(f"document {i} about subject {i % 7}", "a.txt") for i in range(200)])
+    store.save(str(tmp_path))
+    loaded = InMemoryVectorStore.load(str(tmp_path), embeddings=embeddings)
+
+    context = RAGRetriever(loaded, min_score=-1.0).get_context("subject 3", max_tokens=1000, k=3)
+    assert context
+    assert sum(doc is not None for doc in loaded.documents._parsed) == 3
+    documents = loaded.similarity_search("subject 3", k=3)
+    assert loaded.token_counts(documents) == [loaded.tokenizer.count(doc.page_content) for doc in documents]
+    assert (loaded._token_counts[:len(loaded.documents)] >= 0).sum() == 3
+
+
+def test_get_context_respects_max_tokens(store):
+    store.add_documents([chunk(f"topic {i} " + "filler text " * (20 * i), "a.txt") for i in range(1, 9)])
+    retriever = RAGRetriever(store, min_score=-1.0)
+    for max_tokens in (60, 250, 700):
+        context = retriever.get_context("topic filler", max_tokens=max_tokens, k=8)
+        assert 0 < store.tokenizer.count(context) <= max_tokens
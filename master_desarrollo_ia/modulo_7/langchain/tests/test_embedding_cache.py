@@ -0,0 +1,94 @@
+"""
+Embedding cache: LRU tier, SQLite persistence, counters and use by the store.
+"""
+import numpy as np
+import pytest
+from conftest import WordEmbeddings, chunk
+
+from rag.embedding_cache import EmbeddingCache
+from rag.vector_store import InMemoryVectorStore
+
+
+def vector(value):
+    return np.full(4, value, dtype=np.float32)
+
+
+def test_memory_tier_evicts_the_least_recently_used():
+    cache = EmbeddingCache(max_memory_items=2)
+    cache.set_many("model", ["a", "b"], [vector(1), vector(2)])
+    cache.get_many("model", ["a"])
+    cache.set_many("model", ["c"], [vector(3)])
+    a, b, c = cache.get_many("model", ["a", "b", "c"])
+    assert b is None
+    np.testing.assert_array_equal(a, vector(1))
+    np.testing.assert_array_equal(c, vector(3))
+
+
+def test_counters_split_memory_hits_disk_hits_and_misses(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"), max_memory_items=1)
+    cache.set_many("model", ["a", "b"], [vector(1), vector(2)])
+    cache.get_many("model", ["b", "a", "x"])
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+    cache.reset_stats()
+    assert cache.stats()["misses"] == 0
+    cache.close()
+
+
+def test_sqlite_tier_persists_across_instances(tmp_path):
+    path = str(tmp_path / "nested" / "cache.sqlite")
+    cache = EmbeddingCache(path)
+    cache.set_many("model", ["a", "b"], [vector(1), vector(2)])
+    cache.close()
+
+    reopened = EmbeddingCache(path)
+    a, b, missing = reopened.get_many("model", ["a", "b", "c"])
+    np.testing.assert_array_equal(a, vector(1))
+    np.testing.assert_array_equal(b, vector(2))
+    assert missing is None
+    assert reopened.stats()["disk_hits"] == 2
+    # Promoted to the memory tier by the first lookup.
+    reopened.get_many("model", ["a"])
+    assert reopened.stats()["memory_hits"] == 1
+    reopened.close()
+
+
+def test_keys_include_the_model_name():
+    cache = EmbeddingCache()
+    cache.set_many("small", ["a"], [vector(1)])
+    assert cache.get_many("large", ["a"]) == [None]
+    np.testing.assert_array_equal(cache.get_many("small", ["a"])[0], vector(1))
+
+
+class NamedEmbeddings(WordEmbeddings):
+    def __init__(self, model, dim=64):
+        super().__init__(dim)
+        self.model = model
+
+
+def test_store_embeds_only_the_cache_misses(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"))
+    embeddings = NamedEmbeddings("model-a")
+    store = InMemoryVectorStore(embeddings=embeddings, embedding_cache=cache)
+    store.add_documents([chunk("alpha", "a.txt"), chunk("beta", "a.txt"), chunk("beta", "b.txt")])
+    assert embeddings.embedded == 2
+
+    other = InMemoryVectorStore(embeddings=embeddings, embedding_cache=cache)
+    other.add_documents([chunk("beta", "c.txt"), chunk("gamma", "c.txt")])
+    assert embeddings.embedded == 3
+    assert cache.stats()["misses"] == 4
+    assert [doc.page_content for doc in other.similarity_search("beta", k=1)] == ["beta"]
+    cache.close()
+
+
+def test_switching_models_does_not_reuse_vectors():
+    cache = EmbeddingCache()
+    InMemoryVectorStore(embeddings=NamedEmbeddings("model-a"), embedding_cache=cache).add_documents(
+        [chunk("alpha", "a.txt")]
+    )
+    model_b = NamedEmbeddings("model-b", dim=32)
+    store = InMemoryVectorStore(embeddings=model_b, embedding_cache=cache)
+    store.add_documents([chunk("alpha", "a.txt")])
+    assert model_b.embedded == 1
+    assert store.vectors.shape == (1, 32)
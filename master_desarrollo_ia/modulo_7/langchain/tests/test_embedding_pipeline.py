@@ -0,0 +1,130 @@
+"""
+Embedding pipeline: batching limits, rate-limit retries, backpressure and ordering.
+"""
+import threading
+import time
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from rag.embedding_pipeline import EmbeddingPipeline
+
+
+class StatusError(Exception):
+    """An API error carrying an HTTP status and optional response headers."""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type("Response", (), {"headers": headers or {}})()
+
+
+class FakeEmbeddings(Embeddings):
+    """Embeds a text as [the number it ends with], raising ``errors`` first."""
+
+    def __init__(self, errors=(), delay=None):
+        self.errors = list(errors)
+        self.delay = delay
+        self.calls = []
+        self.in_flight = self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.calls.append((time.monotonic(), list(texts)))
+            if self.errors:
+                raise self.errors.pop(0)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.delay is not None:
+                time.sleep(self.delay(texts))
+            return [[float(text.split()[-1])] for text in texts]
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def texts(count):
+    return [f"text {i}" for i in range(count)]
+
+
+def test_batches_respect_token_and_size_limits():
+    pipeline = EmbeddingPipeline(FakeEmbeddings(), max_batch_tokens=10, max_batch_size=3, token_counter=len)
+    items = ["aaaa", "bbbb", "cc", "d", "e", "f", "g" * 25, "hh"]
+    batches = pipeline.batches(items)
+    assert batches == [(0, 3), (3, 6), (6, 7), (7, 8)]
+    assert [i for start, end in batches for i in range(start, end)] == list(range(len(items)))
+    for start, end in batches:
+        assert end - start <= 3
+        # Only a text over the budget on its own may exceed it.
+        assert sum(map(len, items[start:end])) <= 10 or end - start == 1
+
+
+def test_rate_limited_request_waits_for_retry_after():
+    embeddings = FakeEmbeddings(errors=[StatusError(429, {"retry-after-ms": "150"})])
+    pipeline = EmbeddingPipeline(embeddings, workers=1, initial_backoff=0.001)
+    assert pipeline.embed(texts(3)) == [[0.0], [1.0], [2.0]]
+    (first, _), (second, batch) = embeddings.calls
+    assert second - first >= 0.15
+    assert batch == texts(3)
+    assert pipeline.stats() == {"requests": 2, "retries": 1}
+
+
+def test_server_errors_are_retried_until_max_retries():
+    embeddings = FakeEmbeddings(errors=[StatusError(503)] * 3)
+    pipeline = EmbeddingPipeline(embeddings, workers=1, max_retries=2, initial_backoff=0.001)
+    with pytest.raises(StatusError):
+        pipeline.embed(texts(2))
+    assert len(embeddings.calls) == 3
+
+
+@pytest.mark.parametrize("error", [ValueError("bad input"), StatusError(400)])
+def test_non_retryable_errors_propagate_at_once(error):
+    embeddings = FakeEmbeddings(errors=[error])
+    pipeline = EmbeddingPipeline(embeddings, workers=1, initial_backoff=0.001)
+    with pytest.raises(type(error)):
+        pipeline.embed(texts(2))
+    assert len(embeddings.calls) == 1
+    assert pipeline.stats()["retries"] == 0
+
+
+def test_rate_limits_halve_concurrency_and_successes_restore_it():
+    pipeline = EmbeddingPipeline(FakeEmbeddings(), workers=8)
+    for expected in (4.0, 2.0, 1.0, 1.0):
+        pipeline._acquire()
+        pipeline._release(backoff=0.0)
+        assert pipeline._concurrency == expected
+    # Additive increase: about one more slot per round of successful requests.
+    history = []
+    for _ in range(40):
+        pipeline._acquire()
+        pipeline._release()
+        history.append(pipeline._concurrency)
+    assert history[0] == 2.0
+    assert all(a < b or a == b == 8 for a, b in zip(history, history[1:]))
+    assert history[-1] == 8
+
+
+def test_rate_limits_reduce_requests_in_flight():
+    embeddings = FakeEmbeddings(errors=[StatusError(429)] * 2, delay=lambda batch: 0.02)
+    pipeline = EmbeddingPipeline(embeddings, workers=4, max_batch_size=1, initial_backoff=0.001)
+    assert pipeline.embed(texts(12)) == [[float(i)] for i in range(12)]
+    assert embeddings.max_in_flight <= 4
+    assert pipeline.stats()["retries"] == 2
+
+
+def test_vectors_keep_input_order_when_batches_complete_out_of_order():
+    # Earlier batches are slower, so they finish last.
+    embeddings = FakeEmbeddings(delay=lambda batch: 0.05 - 0.01 * (int(batch[0].split()[-1]) // 2))
+    pipeline = EmbeddingPipeline(embeddings, workers=4, max_batch_size=2)
+    completed = [start for start, _ in pipeline.iter_embed(texts(8))]
+    assert sorted(completed) == [0, 2, 4, 6] and completed != [0, 2, 4, 6]
+
+    progress = []
+    vectors = pipeline.embed(texts(8), progress=lambda done, total: progress.append((done, total)))
+    assert vectors == [[float(i)] for i in range(8)]
+    assert progress == [(2, 8), (4, 8), (6, 8), (8, 8)]
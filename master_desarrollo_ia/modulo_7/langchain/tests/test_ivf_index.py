@@ -0,0 +1,108 @@
+"""
+IVF index: training, incremental adds, retraining, removals and recall.
+"""
+import numpy as np
+from conftest import chunk
+
+from rag.ivf_index import IVFIndex
+from rag.vector_store import InMemoryVectorStore, normalize_rows
+
+
+def clustered(count, dim=32, clusters=20, seed=0):
+    """Normalized vectors scattered around ``clusters`` random directions."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim))
+    points = centers[rng.integers(clusters, size=count)] + 0.5 * rng.standard_normal((count, dim))
+    return normalize_rows(points.astype(np.float32))
+
+
+def indexed_rows(index):
+    return np.sort(np.concatenate([rows[:size] for rows, size in zip(index._lists, index._sizes)]))
+
+
+def test_trains_once_min_train_size_rows_are_added():
+    vectors = clustered(300)
+    index = IVFIndex(n_lists=8, min_train_size=100)
+    index.add(vectors[:99], 0)
+    assert not index.is_trained
+    index.add(vectors[:100], 99)
+    assert index.is_trained and len(index.centroids) == 8
+    np.testing.assert_array_equal(indexed_rows(index), np.arange(100))
+
+
+def test_adds_after_training_are_bucketed_without_retraining():
+    vectors = clustered(300)
+    index = IVFIndex(n_lists=8, min_train_size=100, retrain_growth=4.0)
+    index.add(vectors[:100], 0)
+    centroids = index.centroids.copy()
+    start = 100
+    for end in (150, 220, 300):
+        index.add(vectors[:end], start)
+        start = end
+    np.testing.assert_array_equal(index.centroids, centroids)
+    np.testing.assert_array_equal(indexed_rows(index), np.arange(300))
+    # Every row is in the bucket of its closest centroid.
+    for bucket, (rows, size) in enumerate(zip(index._lists, index._sizes)):
+        assert np.all(np.argmax(vectors[rows[:size]] @ centroids.T, axis=1) == bucket)
+
+
+def test_retrains_when_the_store_has_grown_enough():
+    vectors = clustered(500)
+    index = IVFIndex(min_train_size=100, retrain_growth=4.0)
+    index.add(vectors[:100], 0)
+    assert len(index.centroids) == 10
+    index.add(vectors[:399], 100)
+    assert index._trained_size == 100
+    index.add(vectors[:400], 399)
+    # Retrained: sqrt(400) lists, every row bucketed once.
+    assert index._trained_size == 400 and len(index.centroids) == 20
+    np.testing.assert_array_equal(indexed_rows(index), np.arange(400))
+
+
+def test_remap_drops_removed_rows():
+    vectors = clustered(200)
+    index = IVFIndex(n_lists=8, min_train_size=100)
+    index.add(vectors, 0)
+    mapping = np.arange(200)
+    mapping[::3] = -1
+    kept = mapping >= 0
+    mapping[kept] = np.arange(np.count_nonzero(kept))
+    index.remap(mapping)
+    np.testing.assert_array_equal(indexed_rows(index), np.arange(np.count_nonzero(kept)))
+
+
+def test_store_search_skips_removed_documents(embeddings):
+    store = InMemoryVectorStore(
+        embeddings=embeddings, ann_index=IVFIndex(n_lists=4, nprobe=4, min_train_size=20), compact_threshold=1.0
+    )
+    store.add_documents([chunk(f"topic {i % 5} note {i}", f"file_{i % 4}.txt") for i in range(40)])
+    assert store.ann_index.is_trained
+    store.remove_source("file_1.txt")
+    # Tombstoned, then compacted away.
+    for _ in range(2):
+        results = store.similarity_search("topic 1 note", k=20)
+        assert len(results) == 20
+        assert all(doc.metadata["source"] != "file_1.txt" for doc in results)
+        store.compact()
+
+
+def test_recall_grows_with_nprobe():
+    vectors = clustered(4000, seed=1)
+    queries = clustered(50, seed=2)
+    index = IVFIndex(n_lists=32, min_train_size=1000)
+    index.add(vectors, 0)
+    k = 10
+    exact = [set(np.argsort(-(vectors @ query))[:k]) for query in queries]
+
+    def recall(nprobe):
+        found = 0
+        for query, truth in zip(queries, exact):
+            candidates = index.candidates(query, nprobe)
+            top = candidates[np.argsort(-(vectors[candidates] @ query))[:k]]
+            found += len(truth & set(top))
+        return found / (k * len(queries))
+
+    recalls = [recall(nprobe) for nprobe in (1, 2, 4, 8, 32)]
+    assert recalls == sorted(recalls)
+    assert recalls[0] < recalls[-1] == 1.0
+    assert recalls[3] > 0.9
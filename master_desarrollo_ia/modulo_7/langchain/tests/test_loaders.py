@@ -0,0 +1,88 @@
+"""
+Text and DOCX loaders, and the processor that picks them by extension.
+"""
+import zipfile
+
+import pytest
+
+from rag.document_processor import DocumentProcessor
+from rag.loaders import load_docx, load_text
+
+WORD = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def write_docx(path, paragraphs):
+    """A minimal DOCX: just word/document.xml, with runs, tabs and breaks."""
+    body = "".join(f"<w:p>{paragraph}</w:p>" for paragraph in paragraphs)
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("word/document.xml", f"<w:document {WORD}><w:body>{body}</w:body></w:document>")
+
+
+def test_docx_paragraphs_runs_tabs_and_breaks(tmp_path):
+    path = tmp_path / "report.docx"
+    write_docx(path, [
+        "<w:r><w:t>Hello </w:t></w:r><w:r><w:t>world</w:t></w:r>",
+        "<w:r><w:t>a</w:t><w:tab/><w:t>b</w:t><w:br/><w:t>c</w:t></w:r>",
+        "<w:tbl><w:tr><w:tc><w:p><w:r><w:t>in a table</w:t></w:r></w:p></w:tc></w:tr></w:tbl>",
+    ])
+    [document] = load_docx(str(path))
+    assert document.page_content == "Hello world\na\tb\nc\nin a table\n"
+    assert document.metadata == {"source": str(path), "type": "docx"}
+
+
+def test_docx_blocks_never_cut_paragraphs(tmp_path):
+    path = tmp_path / "long.docx"
+    paragraphs = [f"paragraph {i} " + "word " * 20 for i in range(50)]
+    write_docx(path, [f"<w:r><w:t>{text}</w:t></w:r>" for text in paragraphs])
+    blocks = list(load_docx(str(path), block_size=300))
+    assert len(blocks) > 1
+    assert [text for block in blocks for text in block.page_content.split("\n")] == paragraphs
+
+
+def test_text_blocks_are_cut_at_breaks(tmp_path):
+    path = tmp_path / "notes.md"
+    text = "\n\n".join(f"Paragraph {i} " + "word " * 30 for i in range(40))
+    path.write_text(text, encoding="utf-8")
+    blocks = list(load_text(str(path), block_size=500, doc_type="markdown"))
+    assert len(blocks) > 1
+    # Blocks are cut before a separator; only trailing whitespace is dropped.
+    assert "".join(block.page_content for block in blocks) == text.rstrip()
+    assert all(block.page_content.startswith("\n\nParagraph") for block in blocks[1:])
+
+
+def test_processor_picks_loader_by_extension(tmp_path):
+    path = tmp_path / "notes.TXT"
+    path.write_text("some notes " * 200, encoding="utf-8")
+    processor = DocumentProcessor(chunk_size=100, chunk_overlap=0)
+    chunks = processor.load_document(str(path))
+    assert chunks and all(len(doc.page_content) <= 100 for doc in chunks)
+    with pytest.raises(ValueError):
+        processor.load_document(str(tmp_path / "image.png"))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_load_documents_reports_a_corrupt_file_and_loads_the_rest(tmp_path, workers):
+    paths = []
+    for i in range(3):
+        paths.append(str(tmp_path / f"notes_{i}.txt"))
+        (tmp_path / f"notes_{i}.txt").write_text(f"notes number {i}")
+    broken = tmp_path / "broken.docx"
+    broken.write_bytes(b"not a zip archive")
+    paths.insert(1, str(broken))
+    # min_parallel_bytes=0 sends these small files through the process pool.
+    processor = DocumentProcessor(workers=workers, min_parallel_bytes=0)
+    try:
+        results = {path: (chunks, error) for path, chunks, error in processor.load_documents(paths)}
+        pool = processor._pool
+        # A smaller batch is loaded in-process, and the pool is kept.
+        assert [error for _, _, error in processor.load_documents(paths[:1])] == [None]
+        assert processor._pool is pool
+    finally:
+        processor.close()
+    assert (pool is None) == (workers == 1)
+    assert set(results) == set(paths)
+    chunks, error = results.pop(str(broken))
+    assert chunks == [] and error is not None
+    assert sorted(
+        " ".join(chunk.page_content.strip() for chunk in chunks) for chunks, error in results.values() if error is None
+    ) == [f"notes number {i}" for i in range(3)]
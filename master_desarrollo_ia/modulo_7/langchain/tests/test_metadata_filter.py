@@ -0,0 +1,82 @@
+"""
+Metadata-filtered searches, before and after tombstones are compacted away.
+"""
+import pytest
+from conftest import chunk
+
+from rag.bm25_index import BM25Index
+from rag.ivf_index import IVFIndex
+from rag.vector_store import InMemoryVectorStore
+
+
+def expected(store, metadata_filter):
+    """Texts of the live documents matching ``metadata_filter``, by brute force."""
+    def matches(doc):
+        return all(
+            doc.metadata.get(field) in (value if isinstance(value, list) else [value])
+            for field, value in metadata_filter.items()
+        )
+    vector = store.embedding_model.embed_query("chunk")
+    live = store.similarity_search_by_vector_with_score(vector, len(store), exact=True)
+    return sorted(doc.page_content for doc, _ in live if matches(doc))
+
+
+FILTERS = [
+    {"source": "file_1.pdf"},
+    {"type": "docx"},
+    {"page": [0, 2]},
+    {"page": [0, 1, 2]},
+    {"source": ["file_0.pdf", "file_3.pdf"], "page": 1},
+    {"type": "missing"},
+]
+
+
+@pytest.fixture(params=["exact", "ann"])
+def filtered_store(request, embeddings):
+    ann_index = IVFIndex(n_lists=4, nprobe=2, min_train_size=8) if request.param == "ann" else None
+    store = InMemoryVectorStore(
+        embeddings=embeddings, ann_index=ann_index, keyword_index=BM25Index(), compact_threshold=1.0
+    )
+    store.add_documents([
+        chunk(f"chunk {source} page {page}", f"file_{source}.pdf", page=page, type="docx" if source % 2 else "pdf")
+        for source in range(5) for page in range(4)
+    ])
+    if ann_index is not None:
+        ann_index.train(store.vectors)
+    return store
+
+
+def search(store, metadata_filter):
+    return sorted(doc.page_content for doc in store.similarity_search("chunk", k=100, filter=metadata_filter))
+
+
+def check(store, metadata_filter):
+    """Filtered results are exact, or for a broad filter on the ANN path a subset of the matches."""
+    got, matching = search(store, metadata_filter), expected(store, metadata_filter)
+    if store.ann_index is None or len(matching) <= len(store) // 2:
+        assert got == matching, metadata_filter
+    else:
+        assert got and set(got) <= set(matching), metadata_filter
+
+
+def test_filters_after_remove_and_compaction(filtered_store):
+    store = filtered_store
+    # Index the fields before the rows are renumbered.
+    for metadata_filter in FILTERS:
+        check(store, metadata_filter)
+
+    store.remove_source("file_1.pdf")
+    store.upsert_source("file_3.pdf", [chunk("chunk 3 page 9 rewritten", "file_3.pdf", page=9, type="docx")])
+    for metadata_filter in FILTERS:
+        check(store, metadata_filter)
+
+    store.compact()
+    assert not store._deleted_count
+    store.add_documents([chunk("chunk 5 page 0", "file_5.pdf", page=0, type="pdf")])
+    for metadata_filter in FILTERS:
+        check(store, metadata_filter)
+    assert search(store, {"source": "file_1.pdf"}) == []
+    assert "chunk 5 page 0" in search(store, {"page": [0, 2]})
+
+    keyword = store.keyword_search_with_score("rewritten", k=5, filter={"type": "docx"})
+    assert [doc.page_content for doc, _ in keyword] == ["chunk 3 page 9 rewritten"]
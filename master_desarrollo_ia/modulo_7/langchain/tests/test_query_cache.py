@@ -0,0 +1,113 @@
+"""
+Query embedding and result caches, and their invalidation when the store changes.
+"""
+import pytest
+from conftest import chunk
+
+from rag.query_cache import QueryCache, TTLCache, filter_key
+from rag.vector_store import RAGRetriever
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_evicts_the_least_recently_used():
+    cache = TTLCache(max_items=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert len(cache) == 2
+
+
+def test_ttl_cache_expires_entries():
+    clock = FakeClock()
+    cache = TTLCache(ttl=10.0, clock=clock)
+    cache.put("a", 1)
+    clock.now = 10.0
+    assert cache.get("a") == 1
+    clock.now = 10.5
+    assert cache.get("a") is None
+    assert cache.stats()["expired"] == 1
+    assert len(cache) == 0
+
+
+def test_ttl_cache_misses_on_another_version():
+    cache = TTLCache()
+    cache.put("a", 1, version=3)
+    assert cache.get("a", version=3) == 1
+    assert cache.get("a", version=4) is None
+    assert cache.get("a", version=3) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["invalidated"]) == (1, 2, 1)
+
+
+def test_filter_key_compares_lists_as_sets():
+    assert filter_key({"page": [1, 2], "source": "a.pdf"}) == filter_key({"source": "a.pdf", "page": (2, 1)})
+    assert filter_key({"page": [1, 2]}) != filter_key({"page": [1, 3]})
+    assert filter_key({}) is None and filter_key(None) is None
+
+
+@pytest.fixture
+def cached_retriever(store, embeddings):
+    store.add_documents([
+        chunk("cats sleep most of the day", "cats.md"),
+        chunk("dogs need a daily walk", "dogs.md"),
+    ])
+    queries = []
+    embed_query = embeddings.embed_query
+    embeddings.embed_query = lambda text: queries.append(text) or embed_query(text)
+    retriever = RAGRetriever(store, min_score=0.3, cache=QueryCache())
+    return retriever, queries
+
+
+def texts(retriever, query, **kwargs):
+    return [doc.page_content for doc in retriever.retrieve(query, **kwargs)]
+
+
+def test_repeated_query_reuses_embedding_and_results(cached_retriever):
+    retriever, queries = cached_retriever
+    assert texts(retriever, "do cats sleep", k=1) == ["cats sleep most of the day"]
+    assert texts(retriever, "do cats sleep", k=1) == ["cats sleep most of the day"]
+    assert queries == ["do cats sleep"]
+    assert retriever.cache.results.stats()["hits"] == 1
+
+
+@pytest.mark.parametrize("change", ["add", "remove", "upsert", "clear"])
+def test_results_are_fresh_after_the_store_changes(cached_retriever, change):
+    retriever, queries = cached_retriever
+    store = retriever.vector_store
+    before = texts(retriever, "do cats sleep", k=2)
+    assert "cats sleep most of the day" in before
+    version = store.version
+    if change == "add":
+        store.add_documents([chunk("cats sleep in the sun", "more_cats.md")])
+    elif change == "remove":
+        store.remove_source("cats.md")
+    elif change == "upsert":
+        store.upsert_source("cats.md", [chunk("cats sleep sixteen hours", "cats.md")])
+    else:
+        store.clear()
+    assert store.version > version
+    after = texts(retriever, "do cats sleep", k=2)
+    # The query embedding survives the change; only the results were recomputed.
+    assert queries == ["do cats sleep"]
+    assert retriever.cache.results.stats()["invalidated"] == 1
+    assert after != before
+    assert after == texts(RAGRetriever(store, min_score=0.3), "do cats sleep", k=2)
+
+
+def test_equivalent_filters_share_a_cache_entry(cached_retriever):
+    retriever, _ = cached_retriever
+    retriever.retrieve("walk", k=1, filter={"source": ["dogs.md", "cats.md"]})
+    retriever.retrieve("walk", k=1, filter={"source": ["cats.md", "dogs.md"]})
+    assert retriever.cache.results.stats()["hits"] == 1
+    retriever.retrieve("walk", k=1, filter={"source": "dogs.md"})
+    assert retriever.cache.results.stats()["hits"] == 1
@@ -0,0 +1,108 @@
+"""
+Streaming ingestion: bounded read-ahead of prefetch and add_documents_streaming.
+"""
+import threading
+import time
+
+import pytest
+from conftest import chunk
+
+from rag.embedding_pipeline import prefetch
+
+
+class Source:
+    """An iterable of numbered items counting how many were produced."""
+
+    def __init__(self, count, fail_at=None):
+        self.count = count
+        self.fail_at = fail_at
+        self.produced = 0
+
+    def __iter__(self):
+        for i in range(self.count):
+            if i == self.fail_at:
+                raise RuntimeError(f"item {i} is corrupt")
+            self.produced += 1
+            yield i
+
+
+def settle():
+    """Give the producer thread time to run as far ahead as it can."""
+    time.sleep(0.02)
+
+
+def prefetch_threads():
+    return [thread for thread in threading.enumerate() if thread.name == "prefetch"]
+
+
+@pytest.mark.parametrize("buffer_size", [1, 3])
+def test_producer_stays_within_the_buffer(buffer_size):
+    source = Source(20)
+    consumed = 0
+    for item in prefetch(source, buffer_size):
+        assert item == consumed
+        consumed += 1
+        settle()
+        # The queue is full and the producer holds at most one more item.
+        assert source.produced - consumed <= buffer_size + 1
+    assert consumed == 20
+
+
+def test_producer_error_is_raised_in_the_consumer():
+    received = []
+    with pytest.raises(RuntimeError, match="item 5 is corrupt"):
+        for item in prefetch(Source(10, fail_at=5), 2):
+            received.append(item)
+    assert received == [0, 1, 2, 3, 4]
+
+
+def test_closing_the_consumer_stops_the_producer():
+    before = set(prefetch_threads())
+    source = Source(1000)
+    items = prefetch(source, 2)
+    assert next(items) == 0
+    settle()
+    items.close()
+    for thread in set(prefetch_threads()) - before:
+        thread.join(timeout=1.0)
+        assert not thread.is_alive()
+    produced = source.produced
+    settle()
+    assert source.produced == produced < 10
+
+
+def test_add_documents_streaming_reads_a_bounded_number_of_batches_ahead(store, embeddings):
+    batch_size, buffer_batches = 4, 2
+    documents = Source(60)
+    ahead = []
+    embed_documents = embeddings.embed_documents
+
+    def embed_and_measure(texts):
+        settle()
+        ahead.append(documents.produced - embeddings.embedded)
+        return embed_documents(texts)
+
+    embeddings.embed_documents = embed_and_measure
+    progress = []
+    added = store.add_documents_streaming(
+        (chunk(f"document {i}", "stream.txt") for i in documents),
+        batch_size=batch_size,
+        buffer_batches=buffer_batches,
+        progress=lambda done, total: progress.append((done, total)),
+    )
+    assert added == len(store) == 60
+    # The batch being embedded, the queued ones, and one in the producer's hands.
+    assert max(ahead) <= (buffer_batches + 2) * batch_size
+    assert progress[-1] == (60, None) and len(progress) == 60 // batch_size
+
+
+def test_add_documents_streaming_keeps_batches_added_before_an_error(store):
+    def documents():
+        for i in range(10):
+            if i == 7:
+                raise RuntimeError("parse error")
+            yield chunk(f"document {i}", "stream.txt")
+
+    with pytest.raises(RuntimeError, match="parse error"):
+        store.add_documents_streaming(documents(), batch_size=3)
+    assert len(store) == 6
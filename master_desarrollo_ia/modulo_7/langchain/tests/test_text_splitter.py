@@ -0,0 +1,50 @@
+"""
+RecursiveTextSplitter: same chunks as LangChain's RecursiveCharacterTextSplitter.
+"""
+import random
+
+import pytest
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from rag.text_splitter import RecursiveTextSplitter
+
+
+def random_text(rng: random.Random, words: int) -> str:
+    """Words of random length separated by spaces, line and paragraph breaks."""
+    separators = [" "] * 12 + ["\n"] * 2 + ["\n\n"]
+    return "".join(
+        "x" * rng.randint(1, 30) + rng.choice(separators) for _ in range(words)
+    )
+
+
+@pytest.mark.parametrize("chunk_size, chunk_overlap", [(1000, 200), (100, 0), (50, 20), (7, 3)])
+def test_matches_langchain(chunk_size, chunk_overlap):
+    rng = random.Random(chunk_size)
+    ours = RecursiveTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    theirs = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    for _ in range(20):
+        text = random_text(rng, rng.randint(0, 400))
+        assert ours.split_text(text) == theirs.split_text(text)
+
+
+def test_length_function_in_words():
+    def words(text):
+        return len(text.split())
+
+    text = random_text(random.Random(1), 500)
+    ours = RecursiveTextSplitter(chunk_size=40, chunk_overlap=10, length_function=words)
+    theirs = RecursiveCharacterTextSplitter(chunk_size=40, chunk_overlap=10, length_function=words)
+    assert ours.split_text(text) == theirs.split_text(text)
+
+
+def test_split_documents_keeps_metadata_and_start_index():
+    text = random_text(random.Random(2), 300)
+    document = Document(page_content=text, metadata={"source": "a.txt", "page": 3})
+    chunks = RecursiveTextSplitter(chunk_size=200, chunk_overlap=40, add_start_index=True).split_documents([document])
+    assert len(chunks) > 1
+    for piece in chunks:
+        start = piece.metadata["start_index"]
+        assert text[start:start + len(piece.page_content)] == piece.page_content
+        assert (piece.metadata["source"], piece.metadata["page"]) == ("a.txt", 3)
+    assert document.metadata == {"source": "a.txt", "page": 3}
@@ -0,0 +1,128 @@
+"""
+InMemoryVectorStore: deduplication, removal and upserts by source.
+"""
+import os
+
+import pytest
+
+from conftest import WordEmbeddings, chunk
+from rag.vector_store import DOCUMENTS_FILE, VECTORS_FILE, InMemoryVectorStore
+
+
+def test_chunk_shared_by_two_sources_survives_removing_one(store):
+    store.add_documents([chunk("shared disclaimer text", "a.pdf"), chunk("alpha only", "a.pdf")])
+    store.add_documents([chunk("shared disclaimer text", "b.pdf"), chunk("beta only", "b.pdf")])
+    assert store.get_sources() == {"a.pdf": 2, "b.pdf": 2}
+
+    assert store.remove_source("a.pdf") == 2
+    assert store.get_sources() == {"b.pdf": 2}
+    results = store.similarity_search("shared disclaimer text", k=4, filter={"source": "b.pdf"})
+    assert [doc.page_content for doc in results][:1] == ["shared disclaimer text"]
+
+
+def test_duplicates_within_a_source_are_skipped(store, embeddings):
+    store.add_documents([chunk("same text", "a.pdf"), chunk("same text", "a.pdf")])
+    store.add_documents([chunk("same text", "a.pdf")])
+    assert len(store) == 1
+    assert embeddings.embedded == 1
+    assert store.deduplicator.stats()["exact_duplicates"] == 2
+
+
+def test_incremental_save_appends_and_keeps_tombstones(store, embeddings, tmp_path):
+    path = str(tmp_path)
+    store.add_documents([chunk(f"alpha {i}", "a.pdf") for i in range(10)])
+    store.add_documents([chunk(f"beta {i}", "b.pdf") for i in range(10)])
+    store.save(path)
+    vectors_inode = os.stat(tmp_path / VECTORS_FILE).st_ino
+
+    store.compact_threshold = 1.0
+    store.remove_source("a.pdf")
+    store.add_documents([chunk("gamma 0", "c.pdf")])
+    store.save(path)
+    # Appended in place, not rewritten.
+    assert os.stat(tmp_path / VECTORS_FILE).st_ino == vectors_inode
+
+    loaded = InMemoryVectorStore.load(path, embeddings=embeddings)
+    assert loaded.get_sources() == {"b.pdf": 10, "c.pdf": 1}
+    assert loaded.similarity_search("gamma 0", k=1)[0].page_content == "gamma 0"
+    assert not loaded.similarity_search("alpha 3", k=20, filter={"source": "a.pdf"})
+
+    # Saving the loaded store again appends too, and survives a compaction.
+    loaded.add_documents([chunk("delta 0", "d.pdf")])
+    loaded.save(path)
+    loaded.compact()
+    loaded.save(path)
+    reloaded = InMemoryVectorStore.load(path, embeddings=embeddings)
+    assert reloaded.get_sources() == {"b.pdf": 10, "c.pdf": 1, "d.pdf": 1}
+    assert len(reloaded.documents) == 12
+
+
+def test_interrupted_save_leaves_previous_snapshot(store, embeddings, tmp_path):
+    path = str(tmp_path)
+    store.add_documents([chunk(f"alpha {i}", "a.pdf") for i in range(5)])
+    store.save(path)
+    # What a save interrupted before its manifest was replaced leaves behind.
+    with open(tmp_path / VECTORS_FILE, "ab") as f:
+        f.write(b"\0" * 4 * embeddings.dim)
+    with open(tmp_path / DOCUMENTS_FILE, "a") as f:
+        f.write('{"page_content": "partial", "metadata": {}}\n')
+
+    loaded = InMemoryVectorStore.load(path, embeddings=embeddings)
+    assert len(loaded) == 5
+    loaded.add_documents([chunk("beta 0", "b.pdf")])
+    loaded.save(path)
+    assert [doc.page_content for doc in InMemoryVectorStore.load(path, embeddings=embeddings).documents][-1] == "beta 0"
+
+
+class ModelEmbeddings(WordEmbeddings):
+    """Word embeddings under a model name, optionally declaring their dimensions."""
+
+    def __init__(self, model, dimensions=None):
+        super().__init__(dimensions or 64)
+        self.model = model
+        self.dimensions = dimensions
+
+
+def test_load_rejects_another_embedding_model(tmp_path):
+    path = str(tmp_path)
+    store = InMemoryVectorStore(embeddings=ModelEmbeddings("small", dimensions=64))
+    store.add_documents([chunk("alpha", "a.pdf")])
+    store.save(path)
+
+    assert len(InMemoryVectorStore.load(path, embeddings=ModelEmbeddings("small"))) == 1
+    with pytest.raises(ValueError, match="'small', not 'large'"):
+        InMemoryVectorStore.load(path, embeddings=ModelEmbeddings("large"))
+    with pytest.raises(ValueError, match="64-dimensional"):
+        InMemoryVectorStore.load(path, embeddings=ModelEmbeddings("small", dimensions=32))
+
+
+def test_remove_then_upsert_then_search(store, embeddings):
+    store.add_documents([chunk(f"alpha part {i}", "a.pdf") for i in range(3)])
+    store.add_documents([chunk(f"beta part {i}", "b.pdf") for i in range(3)])
+    assert store.remove_source("b.pdf") == 3
+    assert not store.similarity_search("beta part", k=6, filter={"source": "b.pdf"})
+
+    embedded = embeddings.embedded
+    # A lazy stream, with one chunk changed.
+    new_version = (chunk(text, "a.pdf") for text in ["alpha part 0", "alpha part 1", "alpha part two"])
+    assert store.upsert_source("a.pdf", new_version, batch_size=2) == 3
+    assert embeddings.embedded == embedded + 1
+    assert store.get_sources() == {"a.pdf": 3}
+    texts = [doc.page_content for doc in store.similarity_search("alpha part", k=6)]
+    assert sorted(texts) == ["alpha part 0", "alpha part 1", "alpha part two"]
+
+
+def test_failed_upsert_keeps_the_old_version(store):
+    store.add_documents([chunk(f"alpha part {i}", "a.pdf") for i in range(3)])
+
+    def broken():
+        yield chunk("alpha new 0", "a.pdf")
+        raise OSError("upload interrupted")
+
+    with pytest.raises(OSError):
+        store.upsert_source("a.pdf", broken(), batch_size=1)
+    assert sorted(doc.page_content for doc in store.similarity_search("alpha", k=6)) == [
+        "alpha part 0", "alpha part 1", "alpha part 2"
+    ]
+    # The chunks stored before the failure are not counted as duplicates either.
+    assert store.upsert_source("a.pdf", [chunk("alpha new 0", "a.pdf")]) == 1